@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""dbbench.py - measure hole by hole score commits per engine profile."""
+import os
+import tempfile
+import time
+
+from golf_db.db_sqlalchemy import (
+    Player,
+    Hole,
+    Tee,
+    Course,
+    Round,
+    Result,
+    Database,
+    ENGINE_PROFILES,
+)
+
+
+def _setup(db, num_rounds, num_players):
+    """Create course, players and empty rounds, return list of round_ids."""
+    session = db.create_session()
+    course = Course(name="Bench Course")
+    for n in range(18):
+        course.holes.append(Hole(num=n + 1, par=4, handicap=n + 1))
+    tee = Tee(gender="mens", name="Blue", rating=70.1, slope=120)
+    course.tees.append(tee)
+    session.add(course)
+    players = [
+        Player(
+            email="bench{}@tl.com".format(n),
+            first_name="First{}".format(n),
+            last_name="Last{}".format(n),
+            nick_name="Nick{}".format(n),
+            gender="man",
+            handicap=float(n),
+        )
+        for n in range(num_players)
+    ]
+    session.add_all(players)
+    session.flush()
+    round_ids = []
+    for _ in range(num_rounds):
+        golf_round = Round(course=course)
+        for player in players:
+            Result(round=golf_round, player=player, tee_id=tee.tee_id, handicap=0.0)
+        golf_round.addGame(session, "gross", {})
+        session.add(golf_round)
+        session.flush()
+        round_ids.append(golf_round.round_id)
+    session.commit()
+    session.close()
+    return round_ids
+
+
+def bench(profile, num_rounds, num_players):
+    """Enter every hole of every round with its own commit.
+
+    Returns:
+      tuple of (commits, seconds).
+    """
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    os.close(fd)
+    try:
+        db = Database("sqlite:///{}".format(path), profile=profile)
+        db.create_tables()
+        round_ids = _setup(db, num_rounds, num_players)
+        session = db.create_session()
+        commits = 0
+        start = time.time()
+        for round_id in round_ids:
+            golf_round = session.query(Round).filter(Round.round_id == round_id).one()
+            for hole in range(1, 19):
+                golf_round.addScores(
+                    session,
+                    hole,
+                    {"lstGross": [4] * num_players, "lstPutts": [2] * num_players},
+                )
+                session.commit()
+                commits += 1
+        elapsed = time.time() - start
+        session.close()
+        db.engine.dispose()
+    finally:
+        for ext in ("", "-wal", "-shm"):
+            if os.path.exists(path + ext):
+                os.remove(path + ext)
+    return commits, elapsed
+
+
+def main():
+    from optparse import OptionParser
+
+    parser = OptionParser()
+    parser.add_option(
+        "-r",
+        "--rounds",
+        dest="rounds",
+        type="int",
+        default=20,
+        help="Number of rounds to enter. Default is 20",
+    )
+    parser.add_option(
+        "-n",
+        "--players",
+        dest="players",
+        type="int",
+        default=4,
+        help="Number of players per round. Default is 4",
+    )
+    parser.add_option(
+        "-p",
+        "--profile",
+        dest="profiles",
+        default=",".join(sorted(ENGINE_PROFILES)),
+        help="Comma separated list of profiles to run. Default is all",
+    )
+    (options, args) = parser.parse_args()
+
+    for profile in options.profiles.split(","):
+        commits, elapsed = bench(profile, options.rounds, options.players)
+        print(
+            "{:<8} {:5} commits in {:6.2f} sec - {:8.1f} commits/sec".format(
+                profile, commits, elapsed, commits / elapsed
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
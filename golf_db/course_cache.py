@@ -0,0 +1,71 @@
+"""course_cache.py - process wide cache of course data used by the games.
+
+Courses, holes and tees almost never change. The stroke allocation for every
+course handicap, the par totals and the scorecard header lines are computed
+once per course and shared by all game instances. Courses are keyed by the
+database engine and course_id, two databases can use the same course_id for
+different courses. Call invalidate() when a course, its holes or tees change.
+"""
+import threading
+from sqlalchemy import inspect
+
+# largest course handicap with a precomputed bumps table
+MAX_HANDICAP = 54
+
+
+class CourseEntry:
+    """Precomputed data for one course."""
+
+    def __init__(self, course):
+        pars = [hole.par for hole in course.holes]
+        self.out_tot = sum(pars[:9])
+        self.in_tot = sum(pars[9:])
+        self.total = self.in_tot + self.out_tot
+        self.bumps = [
+            tuple(course._calcBumps(handicap)) for handicap in range(MAX_HANDICAP + 1)
+        ]
+        self.scorecard = {
+            ESC: course._renderScorecard(self.out_tot, self.in_tot, self.total, ESC)
+            for ESC in (False, True)
+        }
+
+
+_catalog = {}
+_lock = threading.Lock()
+
+
+def get(course):
+    """Return the CourseEntry for a course, None if the course is not cached.
+
+    Only courses loaded from the database without pending changes are cached.
+    """
+    if course.course_id is None:
+        return None
+    state = inspect(course)
+    if state.session is None:
+        return None
+    key = (state.session.bind, course.course_id)
+    entry = _catalog.get(key)
+    if entry is None:
+        if not state.persistent or state.modified:
+            return None
+        entry = CourseEntry(course)
+        with _lock:
+            _catalog[key] = entry
+    return entry
+
+
+def invalidate(course_id=None, bind=None):
+    """Drop a course from the cache, all courses if course_id is None.
+
+    Args:
+      course_id: course to drop, all courses if None.
+      bind: engine of the database, the course of every database if None.
+    """
+    with _lock:
+        if course_id is None and bind is None:
+            _catalog.clear()
+            return
+        for key in list(_catalog):
+            if course_id in (None, key[1]) and bind in (None, key[0]):
+                del _catalog[key]
@@ -0,0 +1,118 @@
+"""course_search.py - ranked course name search.
+
+Course names are normalized to a name key: lower case words separated by a
+single space, punctuation removed. The database indexes the name key for
+exact lookups. Ranked searches use an in-memory token index of all course
+names, built once per database engine with a single query and dropped by
+invalidate() when a course is added, renamed or removed.
+"""
+import bisect
+import re
+import threading
+import weakref
+from collections import namedtuple
+
+# rank of a match, lower is better
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_PHRASE = 2
+RANK_WORDS = 3
+
+CourseMatch = namedtuple("CourseMatch", "course_id name rank")
+
+_non_word = re.compile(r"[\W_]+")
+
+
+def name_key(name):
+    """Return the normalized search key of a course name."""
+    return " ".join(_non_word.sub(" ", name.lower()).split())
+
+
+class CourseIndex:
+    """Token and prefix index of course names.
+
+    Args:
+      rows: iterable of (course_id, name).
+    """
+
+    def __init__(self, rows):
+        self.names = {}
+        self.keys = {}
+        self.postings = {}
+        for course_id, name in rows:
+            key = name_key(name)
+            self.names[course_id] = name
+            self.keys[course_id] = key
+            for token in set(key.split()):
+                self.postings.setdefault(token, set()).add(course_id)
+        self.tokens = sorted(self.postings)
+
+    def _prefix_match(self, prefix):
+        """Return course_ids with a word starting with prefix."""
+        course_ids = set()
+        n = bisect.bisect_left(self.tokens, prefix)
+        while n < len(self.tokens) and self.tokens[n].startswith(prefix):
+            course_ids |= self.postings[self.tokens[n]]
+            n += 1
+        return course_ids
+
+    def search(self, text, limit=10):
+        """Return courses where every word of text starts a word of the name.
+
+        Args:
+          text: words to search for.
+          limit: maximum matches returned.
+        Returns:
+          list of CourseMatch, best rank first, then shortest name.
+        """
+        key = name_key(text)
+        words = key.split()
+        if not words:
+            return []
+        # longest word first, usually the rarest, keeps the intersection small
+        candidates = None
+        for word in sorted(words, key=len, reverse=True):
+            course_ids = self._prefix_match(word)
+            candidates = course_ids if candidates is None else candidates & course_ids
+            if not candidates:
+                return []
+        matches = []
+        for course_id in candidates:
+            course_key = self.keys[course_id]
+            if course_key == key:
+                rank = RANK_EXACT
+            elif course_key.startswith(key):
+                rank = RANK_PREFIX
+            elif " {}".format(key) in " {}".format(course_key):
+                rank = RANK_PHRASE
+            else:
+                rank = RANK_WORDS
+            matches.append(CourseMatch(course_id, self.names[course_id], rank))
+        matches.sort(key=lambda match: (match.rank, len(match.name), match.name))
+        return matches[:limit]
+
+
+_indexes = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def get_index(bind, load):
+    """Return the CourseIndex of a database engine.
+
+    Args:
+      bind: engine the courses are read from.
+      load: function returning (course_id, name) rows, called if the index
+        is not built.
+    """
+    index = _indexes.get(bind)
+    if index is None:
+        index = CourseIndex(load())
+        with _lock:
+            _indexes[bind] = index
+    return index
+
+
+def invalidate():
+    """Drop the course indexes of all engines."""
+    with _lock:
+        _indexes.clear()
@@ -0,0 +1,257 @@
+"""db_import.py - streaming import of course catalogs and player rosters.
+
+Files are read one record at a time and written in batches with bulk
+inserts, so memory use does not depend on the file size. Records already in
+the database, or repeated in the file, are skipped by Course.name and
+Player.email.
+
+JSON lines - one object per line.
+  players: {"email": ..., "first_name": ..., "last_name": ..., "nick_name": ...,
+            "handicap": ..., "gender": "man"|"woman"}
+  courses: {"name": ..., "holes": [{"par": ..., "handicap": ...}, ...],
+            "tees": [{"gender": ..., "name": ..., "rating": ..., "slope": ...}]}
+
+CSV - header line with column names.
+  players: email,first_name,last_name,nick_name,handicap,gender
+  courses: name,pars,handicaps,tees
+    pars and handicaps are space separated per hole, tees are separated by
+    ';' with gender/name/rating/slope for each tee.
+"""
+import csv
+import json
+import time
+from collections import namedtuple
+
+from . import course_cache, course_search
+from .db_sqlalchemy import Player, Course, Hole, Tee
+from .exceptions import GolfDBException
+from util.tl_logger import TLLog
+
+log = TLLog.getLogger("import")
+
+DEF_BATCH_SIZE = 500
+
+ImportResult = namedtuple("ImportResult", "rows inserted duplicates seconds")
+
+PLAYER_FIELDS = ("email", "first_name", "last_name", "nick_name", "handicap", "gender")
+
+
+def is_import_file(path):
+    """Return True if path names a file import_players/import_courses read."""
+    return path.endswith((".csv", ".jsonl", ".json"))
+
+
+def _file_format(path):
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        return "jsonl"
+    raise GolfDBException('file "{}" must be .csv or .jsonl'.format(path))
+
+
+def _read_records(path):
+    """Yield (line number, dictionary) for every record in the file."""
+    fmt = _file_format(path)
+    with open(path, newline="") as fp:
+        if fmt == "csv":
+            reader = csv.DictReader(fp)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_num, line in enumerate(fp, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_num, json.loads(line)
+                except ValueError as ex:
+                    raise GolfDBException("line {} - {}".format(line_num, ex))
+
+
+def _batches(records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _player_row(line_num, dct):
+    """Validate and convert a player record to a players table row."""
+    # empty csv fields are missing, a handicap of 0 is a scratch player
+    row = {key: None if dct.get(key) == "" else dct.get(key) for key in PLAYER_FIELDS}
+    if not row["email"]:
+        raise GolfDBException("line {} - player email required".format(line_num))
+    if row["gender"] not in Player.dct_plural_gender:
+        raise GolfDBException(
+            'line {} - player gender "{}" must be man or woman'.format(
+                line_num, row["gender"]
+            )
+        )
+    if row["handicap"] is not None:
+        row["handicap"] = float(row["handicap"])
+    return row
+
+
+def _course_rows(line_num, dct):
+    """Validate and convert a course record to name, holes and tees rows."""
+    try:
+        return _convert_course(line_num, dct)
+    except (AttributeError, KeyError, TypeError, ValueError) as ex:
+        raise GolfDBException(
+            "line {} - bad course record - {}: {}".format(
+                line_num, type(ex).__name__, ex
+            )
+        )
+
+
+def _convert_course(line_num, dct):
+    if "pars" in dct:
+        # csv record, tees are optional and a trailing ; is allowed
+        pars, handicaps = dct["pars"].split(), dct["handicaps"].split()
+        if len(pars) != len(handicaps):
+            raise GolfDBException(
+                "line {} - {} pars and {} handicaps".format(
+                    line_num, len(pars), len(handicaps)
+                )
+            )
+        holes = [
+            {"par": int(par), "handicap": int(handicap)}
+            for par, handicap in zip(pars, handicaps)
+        ]
+        tees = []
+        for tee in (dct.get("tees") or "").split(";"):
+            if not tee.strip():
+                continue
+            gender, name, rating, slope = [field.strip() for field in tee.split("/")]
+            tees.append(
+                {"gender": gender, "name": name, "rating": rating, "slope": slope}
+            )
+    else:
+        holes = dct.get("holes", [])
+        tees = dct.get("tees", [])
+    if not dct.get("name"):
+        raise GolfDBException("line {} - course name required".format(line_num))
+    hole_rows = []
+    for n, hole in enumerate(holes):
+        if hole["par"] not in Hole.valid_pars:
+            raise GolfDBException(
+                "line {} - hole {} par must be {}".format(
+                    line_num, n + 1, Hole.valid_pars
+                )
+            )
+        if hole["handicap"] not in Hole.valid_handicaps:
+            raise GolfDBException(
+                "line {} - hole {} handicap must be 1-18".format(line_num, n + 1)
+            )
+        hole_rows.append(
+            {"num": n + 1, "par": hole["par"], "handicap": hole["handicap"]}
+        )
+    tee_rows = []
+    for tee in tees:
+        if tee["gender"] not in Player.dct_plural_gender.values():
+            raise GolfDBException(
+                'line {} - tee gender "{}" must be mens or womens'.format(
+                    line_num, tee["gender"]
+                )
+            )
+        tee_rows.append(
+            {
+                "gender": tee["gender"],
+                "name": tee["name"],
+                "rating": float(tee["rating"]),
+                "slope": int(tee["slope"]),
+            }
+        )
+    return dct["name"], hole_rows, tee_rows
+
+
+def import_players(session, path, batch_size=DEF_BATCH_SIZE):
+    """Import a player roster file.
+
+    Args:
+      session: sqlalchemy session.
+      path: .jsonl or .csv file.
+      batch_size: players written per INSERT and commit.
+    Returns:
+      ImportResult.
+    Raises:
+      GolfDBException - bad record, batches before it are committed.
+    """
+    start = time.time()
+    rows_read, inserted = 0, 0
+    for batch in _batches(_read_records(path), batch_size):
+        rows_read += len(batch)
+        rows = {}
+        for line_num, dct in batch:
+            row = _player_row(line_num, dct)
+            rows.setdefault(row["email"], row)
+        existing = session.query(Player.email).filter(Player.email.in_(list(rows)))
+        for (email,) in existing:
+            del rows[email]
+        if rows:
+            session.execute(Player.__table__.insert(), list(rows.values()))
+        session.commit()
+        inserted += len(rows)
+    result = ImportResult(
+        rows_read, inserted, rows_read - inserted, time.time() - start
+    )
+    log.info("import_players() - {} {}".format(path, result))
+    return result
+
+
+def import_courses(session, path, batch_size=DEF_BATCH_SIZE):
+    """Import a course catalog file with holes and tees.
+
+    Args:
+      session: sqlalchemy session.
+      path: .jsonl or .csv file.
+      batch_size: courses written per INSERT and commit.
+    Returns:
+      ImportResult.
+    Raises:
+      GolfDBException - bad record, batches before it are committed.
+    """
+    start = time.time()
+    rows_read, inserted = 0, 0
+    for batch in _batches(_read_records(path), batch_size):
+        rows_read += len(batch)
+        courses = {}
+        for line_num, dct in batch:
+            name, hole_rows, tee_rows = _course_rows(line_num, dct)
+            courses.setdefault(name, (hole_rows, tee_rows))
+        existing = session.query(Course.name).filter(Course.name.in_(list(courses)))
+        for (name,) in existing:
+            del courses[name]
+        if courses:
+            session.execute(
+                Course.__table__.insert(),
+                [
+                    {"name": name, "name_key": course_search.name_key(name)}
+                    for name in courses
+                ],
+            )
+            course_ids = session.query(Course.name, Course.course_id).filter(
+                Course.name.in_(list(courses))
+            )
+            holes, tees = [], []
+            for name, course_id in course_ids:
+                hole_rows, tee_rows = courses[name]
+                holes.extend([dict(row, course_id=course_id) for row in hole_rows])
+                tees.extend([dict(row, course_id=course_id) for row in tee_rows])
+                course_cache.invalidate(course_id, session.bind)
+            if holes:
+                session.execute(Hole.__table__.insert(), holes)
+            if tees:
+                session.execute(Tee.__table__.insert(), tees)
+            course_search.invalidate()
+        session.commit()
+        inserted += len(courses)
+    result = ImportResult(
+        rows_read, inserted, rows_read - inserted, time.time() - start
+    )
+    log.info("import_courses() - {} {}".format(path, result))
+    return result
@@ -0,0 +1,117 @@
+"""db_ingest.py - bulk score ingestion for many holes and many rounds."""
+from collections import namedtuple
+from sqlalchemy import func
+
+from .db_sqlalchemy import Round, Result, Hole, Game, Score, load_round_snapshot
+from .exceptions import GolfDBException
+from util.tl_logger import TLLog
+
+log = TLLog.getLogger("ingest")
+
+ScoreRecord = namedtuple("ScoreRecord", "round_id hole gross putts options")
+ScoreRecord.__new__.__defaults__ = (None, None)
+
+
+def ingest_scores(session, records):
+    """Write a batch of hole scores in a single transaction.
+
+    All score rows are upserted with one executemany, each round version is
+    bumped and the game results of each round are recomputed once at the end.
+
+    Args:
+      session: sqlalchemy session.
+      records: iterable of ScoreRecord(round_id, hole, gross, putts, options).
+        gross - list of gross scores per player (required)
+        putts - list of putts per player.
+        options - dictionary of game data for this hole, keyed by game type.
+    Returns:
+      dictionary of round_id: list of GolfGameException for games that need
+      more information to resolve a hole.
+    Raises:
+      GolfDBException - bad record, nothing is written.
+    """
+    records = list(records)
+    round_ids = sorted(set([rec.round_id for rec in records]))
+    if not round_ids:
+        return {}
+    # result ids in player order and hole count for every round
+    dct_results = {round_id: [] for round_id in round_ids}
+    query = (
+        session.query(Result.round_id, Result.result_id)
+        .filter(Result.round_id.in_(round_ids))
+        .order_by(Result.round_id, Result.result_id)
+    )
+    for round_id, result_id in query:
+        dct_results[round_id].append(result_id)
+    dct_holes = dict(
+        session.query(Round.round_id, func.count(Hole.hole_id))
+        .join(Hole, Hole.course_id == Round.course_id)
+        .filter(Round.round_id.in_(round_ids))
+        .group_by(Round.round_id)
+    )
+    rows = []
+    dct_options = {}
+    for rec in records:
+        if rec.round_id not in dct_holes:
+            raise GolfDBException("round {} not found".format(rec.round_id))
+        result_ids = dct_results[rec.round_id]
+        if rec.hole < 1 or rec.hole > dct_holes[rec.round_id]:
+            raise GolfDBException(
+                "hole number must be in 1-{}".format(dct_holes[rec.round_id])
+            )
+        if len(rec.gross) != len(result_ids):
+            raise GolfDBException("gross scores do not match number of players")
+        if rec.putts and len(rec.putts) != len(result_ids):
+            raise GolfDBException("putts do not match number of players")
+        for n, result_id in enumerate(result_ids):
+            rows.append(
+                {
+                    "result_id": result_id,
+                    "num": rec.hole,
+                    "gross": rec.gross[n],
+                    "putts": rec.putts[n] if rec.putts else None,
+                }
+            )
+        if rec.options:
+            dct_options.setdefault(rec.round_id, []).append((rec.hole, rec.options))
+    # write everything in one transaction
+    try:
+        # corrections to archived rounds
+        archived = (
+            session.query(Result.round_id)
+            .filter(Result.round_id.in_(round_ids), Result.packed.isnot(None))
+            .distinct()
+        )
+        for (round_id,) in archived.all():
+            Round.unarchive(session, round_id)
+        Score.upsert(session, rows)
+        if dct_options:
+            games = session.query(Game).filter(Game.round_id.in_(list(dct_options)))
+            for game in games:
+                for hole, options in dct_options[game.round_id]:
+                    if game.game_type in options:
+                        game.add_hole_dict_data(hole, options[game.game_type])
+        for golf_round in session.query(Round).filter(Round.round_id.in_(round_ids)):
+            golf_round.bump_version()
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    log.info(
+        "ingest_scores() - {} records {} scores {} rounds".format(
+            len(records), len(rows), len(round_ids)
+        )
+    )
+    # one recompute per round
+    session.expire_all()
+    dct_info_needed = {}
+    for round_id in round_ids:
+        golf_round = load_round_snapshot(session, round_id)
+        lst_info_needed = golf_round.refreshGameResults(session)
+        golf_round.postHandicaps(session)
+        if lst_info_needed:
+            dct_info_needed[round_id] = lst_info_needed
+        else:
+            golf_round.postSeasons(session)
+    session.commit()
+    return dct_info_needed
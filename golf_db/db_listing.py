@@ -0,0 +1,126 @@
+"""db_listing.py - paginated round listing.
+
+Rounds are listed newest first, one page at a time, with a keyset cursor on
+(date_played, round_id). Each page reads at most limit rounds from the
+ix_rounds_date index and the players of those rounds, so a page costs the
+same no matter how many rounds are in the database.
+
+round_leaderboard() reads the running totals of the results, no scores are
+loaded.
+"""
+
+from collections import namedtuple
+from sqlalchemy import and_, exists, or_
+
+from .db_sqlalchemy import Player, Course, Round, Result
+
+DEF_PAGE_SIZE = 20
+
+
+class RoundRow(namedtuple("RoundRow", "round_id date_played course_name players")):
+    """Columns of a listed round, players is a list of nick names."""
+
+    __slots__ = ()
+
+    def __str__(self):
+        return "{} {:<30} - {}".format(
+            self.date_played, self.course_name, ",".join(self.players)
+        )
+
+
+RoundPage = namedtuple("RoundPage", "rows cursor")
+
+
+def list_rounds(
+    session,
+    limit=DEF_PAGE_SIZE,
+    cursor=None,
+    player_id=None,
+    course_id=None,
+    start=None,
+    end=None,
+):
+    """Return a page of rounds, newest first.
+
+    Args:
+      session: sqlalchemy session.
+      limit: maximum rounds on the page.
+      cursor: cursor of the previous page, None for the first page.
+      player_id: only rounds this player played.
+      course_id: only rounds played on this course.
+      start: first date played to include, None for all.
+      end: last date played to include, None for all.
+    Returns:
+      RoundPage with list of RoundRow and the cursor of the next page, None if
+      this is the last page.
+    """
+    query = session.query(Round.round_id, Round.date_played, Course.name).join(
+        Course, Course.course_id == Round.course_id
+    )
+    if cursor is not None:
+        date_played, round_id = cursor
+        # the <= bound lets the index seek to the cursor instead of scanning
+        query = query.filter(
+            Round.date_played <= date_played,
+            or_(Round.date_played < date_played, Round.round_id < round_id),
+        )
+    if course_id is not None:
+        query = query.filter(Round.course_id == course_id)
+    if player_id is not None:
+        query = query.filter(
+            exists().where(
+                and_(Result.round_id == Round.round_id, Result.player_id == player_id)
+            )
+        )
+    if start is not None:
+        query = query.filter(Round.date_played >= start)
+    if end is not None:
+        query = query.filter(Round.date_played <= end)
+    query = query.order_by(Round.date_played.desc(), Round.round_id.desc())
+    # one extra row tells if there is a next page
+    page = query.limit(limit + 1).all()
+    more = len(page) > limit
+    page = page[:limit]
+    players = {round_id: [] for round_id, _, _ in page}
+    if players:
+        query = (
+            session.query(Result.round_id, Player.nick_name)
+            .join(Player, Player.player_id == Result.player_id)
+            .filter(Result.round_id.in_(list(players)))
+            .order_by(Result.result_id)
+        )
+        for round_id, nick_name in query:
+            players[round_id].append(nick_name)
+    rows = [
+        RoundRow(round_id, date_played, name, players[round_id])
+        for round_id, date_played, name in page
+    ]
+    cursor = (rows[-1].date_played, rows[-1].round_id) if more else None
+    return RoundPage(rows, cursor)
+
+
+def round_leaderboard(session, round_id):
+    """Return the players of a round ordered by net total.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to list.
+    Returns:
+      list of rows with nick_name, holes_played, gross_out, gross_in,
+      gross_total, putts_total and net_total.
+    """
+    return (
+        session.query(
+            Player.nick_name,
+            Result.holes_played,
+            Result.gross_out,
+            Result.gross_in,
+            Result.gross_total,
+            Result.putts_total,
+            Result.net_total,
+        )
+        .join(Player, Player.player_id == Result.player_id)
+        .filter(Result.round_id == round_id)
+        .order_by(Result.net_total, Result.gross_total, Result.result_id)
+        .all()
+    )
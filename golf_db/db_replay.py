@@ -0,0 +1,149 @@
+"""db_replay.py - compute the games of stored rounds again, in parallel.
+
+After a change to the game rules the results of every round must be computed
+again. replay_rounds() hands the rounds to a pool of processes, one round per
+task. Each process opens its own Database on the same url, computes all games
+of a round from its scores and stores them in the game_results table with
+Round.refreshGameResults(). Rounds do not depend on each other, so the
+rounds are computed on all cores and only the writes take turns.
+
+The version of a replayed round is advanced, so the season standings of a
+completed round are posted again with the new results. After a change to
+the course handicap calculation, replay with course_handicaps to compute
+the course handicaps of the players again from the handicap index stored
+in each result.
+
+A round that fails is reported in ReplayResult.errors, the other rounds are
+still replayed.
+"""
+import functools
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+
+from .db_sqlalchemy import Database, Game, Round, load_round_snapshot
+from .exceptions import GolfDBException
+from util.tl_logger import TLLog
+
+log = TLLog.getLogger("replay")
+
+ReplayResult = namedtuple("ReplayResult", "rounds games info_needed errors seconds")
+
+# Database of a pool process
+_db = None
+
+
+def replay_round(db, round_id, course_handicaps=False):
+    """Compute the games of a round from the first hole and store the results.
+
+    Args:
+      db: Database.
+      round_id: round to replay.
+      course_handicaps: compute the course handicaps of the players first.
+    Returns:
+      (number of games, number of games that need more information).
+    """
+
+    def replay(session):
+        # the cached instances were computed by the rules before the change
+        Game.uncache(
+            session, session.query(Game.game_id).filter(Game.round_id == round_id)
+        )
+        golf_round = load_round_snapshot(session, round_id)
+        if course_handicaps:
+            tees = {tee.tee_id: tee for tee in golf_round.course.tees}
+            for result in golf_round.results:
+                if result.handicap is not None:
+                    result.calcCourseHandicap(tees[result.tee_id])
+        # standings posted at the previous version are posted again
+        golf_round.bump_version()
+        info_needed = golf_round.refreshGameResults(session)
+        if not info_needed:
+            golf_round.postSeasons(session)
+        return len(golf_round.games), len(info_needed)
+
+    return db.retry_unit_of_work(replay)
+
+
+def _replay_one(db, round_id, course_handicaps):
+    """Return (round_id, games, info_needed, error message or None)."""
+    try:
+        return (round_id,) + replay_round(db, round_id, course_handicaps) + (None,)
+    except Exception as ex:
+        # a bad round does not stop the replay
+        return round_id, 0, 0, "{}: {}".format(type(ex).__name__, ex)
+
+
+def _init_process(url, profile):
+    global _db
+    _db = Database(url, profile=profile)
+
+
+def _replay_task(round_id, course_handicaps):
+    return _replay_one(_db, round_id, course_handicaps)
+
+
+def _in_memory(url):
+    return url.drivername.startswith("sqlite") and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def replay_rounds(db, round_ids=None, processes=None, course_handicaps=False):
+    """Replay rounds in a pool of processes.
+
+    Args:
+      db: Database, the processes open the same url and profile.
+      round_ids: list of rounds to replay, all rounds if None.
+      processes: number of processes, the number of cores if None. 1 replays
+        the rounds in this process with db.
+      course_handicaps: compute the course handicaps of the players first.
+    Returns:
+      ReplayResult, errors is a list of (round_id, error message).
+    Raises:
+      GolfDBException - an in-memory database cannot be shared by processes.
+    """
+    start = time.time()
+    if round_ids is None:
+        with db.unit_of_work() as session:
+            round_ids = [
+                row.round_id
+                for row in session.query(Round.round_id).order_by(Round.round_id)
+            ]
+    processes = min(processes or os.cpu_count() or 1, max(len(round_ids), 1))
+    if processes == 1:
+        rows = [_replay_one(db, round_id, course_handicaps) for round_id in round_ids]
+    else:
+        if _in_memory(db.engine.url):
+            raise GolfDBException(
+                "replay in {} processes needs a database file".format(processes)
+            )
+        # spawn, the processes do not inherit the connections and threads of
+        # this process
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            processes, initializer=_init_process, initargs=(db.url, db.profile)
+        ) as pool:
+            task = functools.partial(_replay_task, course_handicaps=course_handicaps)
+            rows = list(pool.imap_unordered(task, round_ids))
+    # results stored by the processes are read again
+    db.close()
+    errors = sorted(
+        [(round_id, error) for round_id, _, _, error in rows if error is not None]
+    )
+    result = ReplayResult(
+        len(rows),
+        sum(row[1] for row in rows),
+        sum(row[2] for row in rows),
+        errors,
+        time.time() - start,
+    )
+    log.info(
+        "replay_rounds() - {} processes {} rounds {} games {} errors {:.2f} sec".format(
+            processes, result.rounds, result.games, len(errors), result.seconds
+        )
+    )
+    return result
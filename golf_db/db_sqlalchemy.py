@@ -1,15 +1,33 @@
 """db_sqlalchemy.py"""
 import ast
 import datetime
+from collections import deque, namedtuple
+from contextlib import contextmanager
+import json
+import random
+import sqlite3
+import time
 
-from sqlalchemy import Table, Column, ForeignKey
-from sqlalchemy import Integer, Float, String, Enum, Text, Date
+from sqlalchemy import Table, Column, ForeignKey, Index
+from sqlalchemy import Integer, Float, String, Enum, Text, Date, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.orm import sessionmaker, relationship, backref
+from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.schema import CreateTable
+from sqlalchemy import create_engine, inspect, event, text, tuple_, bindparam, case
+from sqlalchemy import func
+from sqlalchemy.ext import baked
+from sqlalchemy.orm import sessionmaker, scoped_session, relationship, backref
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import joinedload, selectinload, validates
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import OperationalError
 
 from .sql_game_factory import SqlGolfGameFactory
-from .exceptions import GolfDBException
+from .exceptions import GolfDBConflict, GolfDBException, GolfGameException
+from . import course_cache, course_search, game_cache
+from .handicap import WINDOW_SIZE, score_differential, handicap_index
 from util.tl_logger import TLLog
 
 log = TLLog.getLogger("alchemy")
@@ -17,6 +35,38 @@ log = TLLog.getLogger("alchemy")
 Base = declarative_base()
 
 
+class JSONEncodedDict(TypeDecorator):
+    """Dictionary stored as JSON text, decoded once when the row is loaded.
+
+    JSON turns integer keys into strings, top level digit keys (hole numbers)
+    are restored to int on load. Rows written before JSON storage hold a
+    python repr string, these are still decoded with ast.literal_eval.
+    """
+
+    impl = Text
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return json.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            dct = json.loads(value)
+        except ValueError:
+            dct = ast.literal_eval(value)
+        return {
+            int(key) if isinstance(key, str) and key.isdigit() else key: data
+            for key, data in dct.items()
+        }
+
+
+# mutation tracked dictionary, only written back when changed at flush.
+JSONDict = MutableDict.as_mutable(JSONEncodedDict)
+
+
 class Player(Base):
     __tablename__ = "players"
     player_id = Column(Integer(), primary_key=True)
@@ -52,8 +102,12 @@ class Player(Base):
 
 class Hole(Base):
     __tablename__ = "holes"
+    # course lookups, also covers the par of a hole for the statistics joins
+    __table_args__ = (Index("ix_holes_course_num_par", "course_id", "num", "par"),)
     hole_id = Column(Integer(), primary_key=True)
-    course_id = Column(Integer(), ForeignKey("courses.course_id"), nullable=False)
+    course_id = Column(
+        Integer(), ForeignKey("courses.course_id", ondelete="CASCADE"), nullable=False
+    )
     num = Column(Integer(), nullable=False)
     par = Column(Integer(), nullable=False)
     handicap = Column(Integer(), nullable=False)
@@ -77,8 +131,13 @@ class Hole(Base):
 
 class Tee(Base):
     __tablename__ = "tees"
+    __table_args__ = (
+        Index("ix_tees_course_gender_name", "course_id", "gender", "name"),
+    )
     tee_id = Column(Integer(), primary_key=True)
-    course_id = Column(Integer(), ForeignKey("courses.course_id"), nullable=False)
+    course_id = Column(
+        Integer(), ForeignKey("courses.course_id", ondelete="CASCADE"), nullable=False
+    )
     gender = Column(Enum("mens", "womens", name="gender"), nullable=False)
     name = Column(String(32), nullable=False)
     rating = Column(Float(), nullable=False)
@@ -88,14 +147,68 @@ class Tee(Base):
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (Index("ix_courses_name_key", "name_key"),)
     course_id = Column(Integer(), primary_key=True)
     name = Column(String(132), nullable=False, unique=True)
-    holes = relationship("Hole", order_by=Hole.hole_id, back_populates="course")
-    tees = relationship("Tee", order_by=Tee.tee_id, back_populates="course")
+    # normalized name for searches, see course_search.name_key()
+    name_key = Column(String(132))
+    holes = relationship(
+        "Hole",
+        order_by=Hole.hole_id,
+        back_populates="course",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    tees = relationship(
+        "Tee",
+        order_by=Tee.tee_id,
+        back_populates="course",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     round = relationship("Round", back_populates="course")
 
+    @validates("name")
+    def _validate_name(self, key, name):
+        self.name_key = course_search.name_key(name)
+        return name
+
+    @classmethod
+    def search(cls, session, text, limit=10):
+        """Ranked search of course names.
+
+    Args:
+      session: sqlalchemy session.
+      text: words to search for, each must start a word of the course name.
+      limit: maximum matches returned.
+    Returns:
+      list of course_search.CourseMatch, best match first.
+    """
+        index = course_search.get_index(
+            session.get_bind(), lambda: session.query(cls.course_id, cls.name).all(),
+        )
+        return index.search(text, limit)
+
+    @classmethod
+    def find(cls, session, text):
+        """Return the course best matching text, None if nothing matches."""
+        course = (
+            session.query(cls).filter(cls.name_key == course_search.name_key(text))
+        ).first()
+        if course is None:
+            matches = cls.search(session, text, limit=1)
+            if matches:
+                course = session.query(cls).get(matches[0].course_id)
+        return course
+
     def setStats(self):
         """Par totals."""
+        entry = course_cache.get(self)
+        if entry is not None:
+            self.out_tot = entry.out_tot
+            self.in_tot = entry.in_tot
+            self.total = entry.total
+            return
         self.out_tot = sum([hole.par for hole in self.holes[:9]])
         self.in_tot = sum([hole.par for hole in self.holes[9:]])
         self.total = self.in_tot + self.out_tot
@@ -103,27 +216,37 @@ class Course(Base):
     def getScorecard(self, **kwargs):
         """Return hdr, par and hdcp lines for scorecard."""
         self.setStats()
+        ESC = bool(kwargs.get("ESC", False))
+        entry = course_cache.get(self)
+        if entry is not None:
+            lines = entry.scorecard[ESC]
+        else:
+            lines = self._renderScorecard(self.out_tot, self.in_tot, self.total, ESC)
+        dct = {"title": "{0:*^98}".format(" " + self.name + " ")}
+        dct.update(lines)
+        return dct
+
+    def _renderScorecard(self, out_tot, in_tot, total, ESC):
+        """Render hdr, par and hdcp lines."""
         hdr = "Hole  "
         par = "Par   "
         hdcp = "Hdcp  "
-        ESC = kwargs.get("ESC", False)
         for n, hole in enumerate(self.holes[:9]):
             hdr += " {:>3}".format(n + 1)
             par += " {:>3}".format(hole.par)
             hdcp += " {:>3}".format(hole.handicap)
         hdr += "  Out "
-        par += " {:>4} ".format(self.out_tot)
+        par += " {:>4} ".format(out_tot)
         hdcp += "      "
         for n, hole in enumerate(self.holes[9:]):
             hdr += "{:>3} ".format(n + 10)
             par += "{:>3} ".format(hole.par)
             hdcp += "{:>3} ".format(hole.handicap)
         hdr += "  In  Tot"
-        par += "{:>4} {:>4}".format(self.in_tot, self.total)
+        par += "{:>4} {:>4}".format(in_tot, total)
         if ESC:
             hdr += "  ESC"
         return {
-            "title": "{0:*^98}".format(" " + self.name + " "),
             "hdr": hdr,
             "par": par,
             "hdcp": hdcp,
@@ -162,6 +285,13 @@ class Course(Base):
     Returns:
       list of bumps for each hole.
     """
+        entry = course_cache.get(self)
+        if entry is not None and 0 <= handicap <= course_cache.MAX_HANDICAP:
+            return list(entry.bumps[handicap])
+        return self._calcBumps(handicap)
+
+    def _calcBumps(self, handicap):
+        """Allocate handicap strokes by hole handicap."""
         bumps = [0 for _ in range(len(self.holes))]
         # handicap > 18 will bump all holes
         while handicap > 17:
@@ -186,30 +316,166 @@ class Course(Base):
         )
 
 
+def _invalidate_course(mapper, connection, target):
+    """Course, hole or tee written, drop the cached course."""
+    course_cache.invalidate(target.course_id)
+
+
+def _invalidate_course_search(mapper, connection, target):
+    """Course added, renamed or removed, drop the search index."""
+    course_search.invalidate()
+
+
+for _cls in (Course, Hole, Tee):
+    for _name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_cls, _name, _invalidate_course)
+for _name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Course, _name, _invalidate_course_search)
+
+
+# read only hole score of an archived result, see Score.unpack()
+HoleScore = namedtuple("HoleScore", "result_id num gross putts")
+
+
+# result running total that differs from its hole scores, see Result.checkTotals()
+TotalsMismatch = namedtuple("TotalsMismatch", "result_id column stored expected")
+
+# results loaded at once by Result.checkTotals()
+CHECK_BATCH_SIZE = 500
+
+
 class Score(Base):
     """Player score for a single hole."""
 
     __tablename__ = "scores"
+    # one score per hole, also serves the result_id lookups
+    __table_args__ = (Index("ux_scores_result_num", "result_id", "num", unique=True),)
     score_id = Column(Integer(), primary_key=True)
-    result_id = Column(Integer(), ForeignKey("results.result_id"), nullable=False)
+    result_id = Column(
+        Integer(), ForeignKey("results.result_id", ondelete="CASCADE"), nullable=False
+    )
     num = Column(Integer(), nullable=False)
     gross = Column(Integer(), nullable=False)
     putts = Column(Integer())
     # ADD text field for score options; snake_closest_3_putt, greenie_closest
-    result = relationship("Result", back_populates="scores")
+    result = relationship("Result", back_populates="score_rows")
+
+    UPSERT_SQL = text(
+        "INSERT INTO scores (result_id, num, gross, putts)"
+        " VALUES (:result_id, :num, :gross, :putts)"
+        " ON CONFLICT (result_id, num)"
+        " DO UPDATE SET gross = excluded.gross, putts = excluded.putts"
+    )
+
+    @staticmethod
+    def use_on_conflict(session):
+        """SQLite supports INSERT ... ON CONFLICT DO UPDATE from 3.24."""
+        dialect = session.get_bind().dialect
+        return dialect.name == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)
+
+    @classmethod
+    def upsert(cls, session, rows):
+        """Insert scores, or replace gross and putts of an existing hole score.
+
+    Args:
+      session: sqlalchemy session.
+      rows: list of dictionaries with keys result_id, num, gross, putts.
+    """
+        if not rows:
+            return
+        if cls.use_on_conflict(session):
+            session.execute(cls.UPSERT_SQL, rows)
+            Result.refreshTotals(session, [row["result_id"] for row in rows])
+            return
+        keys = [(row["result_id"], row["num"]) for row in rows]
+        existing = {
+            (score.result_id, score.num): score
+            for score in session.query(cls).filter(
+                tuple_(cls.result_id, cls.num).in_(keys)
+            )
+        }
+        for row in rows:
+            score = existing.get((row["result_id"], row["num"]))
+            if score is None:
+                session.add(cls(**row))
+            else:
+                score.gross = row["gross"]
+                score.putts = row["putts"]
+
+    # putts byte of a hole without putts, all packed bytes stay below 0x80 so
+    # SQLite decodes them with unicode(substr(packed, n, 1))
+    PACKED_NO_PUTTS = 0x7F
+
+    @classmethod
+    def pack(cls, scores):
+        """Return the gross bytes then the putts bytes of a result.
+
+    Args:
+      scores: scores of every hole ordered by num, with num, gross and putts.
+    Raises:
+      GolfDBException - a hole is missing or a value does not fit in a byte.
+    """
+        if [score.num for score in scores] != list(range(1, len(scores) + 1)):
+            raise GolfDBException("scores must be set for every hole to pack")
+        gross = [score.gross for score in scores]
+        putts = [
+            cls.PACKED_NO_PUTTS if score.putts is None else score.putts
+            for score in scores
+        ]
+        if not all(0 < value < cls.PACKED_NO_PUTTS for value in gross) or not all(
+            0 <= value <= cls.PACKED_NO_PUTTS for value in putts
+        ):
+            raise GolfDBException("gross or putts too large to pack")
+        return bytes(gross + putts)
+
+    @classmethod
+    def unpack(cls, result_id, packed):
+        """Return the list of HoleScore of packed bytes."""
+        num_holes = len(packed) // 2
+        return [
+            HoleScore(
+                result_id,
+                n + 1,
+                packed[n],
+                None
+                if packed[num_holes + n] == cls.PACKED_NO_PUTTS
+                else packed[num_holes + n],
+            )
+            for n in range(num_holes)
+        ]
 
 
 class Result(Base):
     """Player score for a round. References Score records."""
 
     __tablename__ = "results"
+    __table_args__ = (Index("ix_results_round_id", "round_id"),)
     result_id = Column(Integer(), primary_key=True)
-    round_id = Column(Integer(), ForeignKey("rounds.round_id"), nullable=False)
+    round_id = Column(
+        Integer(), ForeignKey("rounds.round_id", ondelete="CASCADE"), nullable=False
+    )
     player_id = Column(Integer(), ForeignKey("players.player_id"), nullable=False)
     tee_id = Column(Integer(), ForeignKey("tees.tee_id"), nullable=False)
     handicap = Column(Float())
     course_handicap = Column(Integer())
-    scores = relationship("Score", order_by=Score.num, back_populates="result")
+    # hole scores of an archived round, the score rows are deleted, see
+    # Round.archive()
+    packed = Column(LargeBinary())
+    # running totals of the hole scores, written with the scores and checked
+    # by checkTotals()
+    holes_played = Column(Integer(), nullable=False, default=0, server_default="0")
+    gross_out = Column(Integer(), nullable=False, default=0, server_default="0")
+    gross_in = Column(Integer(), nullable=False, default=0, server_default="0")
+    gross_total = Column(Integer(), nullable=False, default=0, server_default="0")
+    putts_total = Column(Integer(), nullable=False, default=0, server_default="0")
+    net_total = Column(Integer(), nullable=False, default=0, server_default="0")
+    score_rows = relationship(
+        "Score",
+        order_by=Score.num,
+        back_populates="result",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
     round = relationship("Round", back_populates="results")
     # player = relationship("Player", uselist=False, back_populates="result")
     player = relationship("Player", uselist=False)
@@ -227,57 +493,361 @@ class Result(Base):
             )
         )
 
+    # (packed, scores) decoded by the scores property
+    _unpacked = None
+
+    @property
+    def scores(self):
+        """Score rows ordered by num, HoleScore tuples if the round is archived."""
+        if self.packed is None:
+            return self.score_rows
+        if self._unpacked is None or self._unpacked[0] is not self.packed:
+            self._unpacked = (self.packed, Score.unpack(self.result_id, self.packed))
+        return self._unpacked[1]
+
     def get_completed_holes(self):
-        return len(self.scores)
+        if self.holes_played is None:
+            # not flushed yet
+            return len(self.scores)
+        return self.holes_played
+
+    TOTALS = (
+        "holes_played",
+        "gross_out",
+        "gross_in",
+        "gross_total",
+        "putts_total",
+        "net_total",
+    )
+
+    def calcTotals(self, scores):
+        """Return dictionary of the running totals of hole scores."""
+        bumps = self.round.course.calcBumps(self.course_handicap or 0)
+        return {
+            "holes_played": len(scores),
+            "gross_out": sum(score.gross for score in scores if score.num <= 9),
+            "gross_in": sum(score.gross for score in scores if score.num > 9),
+            "gross_total": sum(score.gross for score in scores),
+            "putts_total": sum(score.putts or 0 for score in scores),
+            "net_total": sum(score.gross - bumps[score.num - 1] for score in scores),
+        }
+
+    def updateTotals(self, scores=None):
+        """Set the running totals from scores, default is the result scores."""
+        totals = self.calcTotals(self.scores if scores is None else scores)
+        for name, value in totals.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def refreshTotals(cls, session, result_ids):
+        """Update the running totals of results after a bulk score write.
+
+    Args:
+      session: sqlalchemy session.
+      result_ids: results with changed scores.
+    """
+        result_ids = list(set(result_ids))
+        query = _bakery(
+            lambda session: session.query(
+                Score.result_id, Score.num, Score.gross, Score.putts
+            ).order_by(Score.result_id, Score.num)
+        )
+        query += lambda q: q.filter(
+            Score.result_id.in_(bindparam("result_ids", expanding=True))
+        )
+        dct_scores = {result_id: [] for result_id in result_ids}
+        for row in query(session).params(result_ids=result_ids):
+            dct_scores[row.result_id].append(row)
+        # results being scored are usually loaded
+        results = [
+            session.identity_map.get(identity_key(cls, result_id))
+            for result_id in result_ids
+        ]
+        missing = [rid for rid, result in zip(result_ids, results) if result is None]
+        if missing:
+            results += session.query(cls).filter(cls.result_id.in_(missing)).all()
+        for result in results:
+            if result is not None:
+                result.updateTotals(dct_scores[result.result_id])
+
+    @classmethod
+    def checkTotals(cls, session, repair=False, batch_size=CHECK_BATCH_SIZE):
+        """Compare the running totals of every result to its hole scores.
+
+    Args:
+      session: sqlalchemy session.
+      repair: set the totals that do not match.
+      batch_size: results loaded at once.
+    Returns:
+      list of TotalsMismatch.
+    """
+        mismatches = []
+        last_id = 0
+        while True:
+            results = (
+                session.query(cls)
+                .options(
+                    selectinload(cls.score_rows),
+                    joinedload(cls.round).joinedload(Round.course),
+                )
+                .filter(cls.result_id > last_id)
+                .order_by(cls.result_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not results:
+                break
+            for result in results:
+                for name, value in result.calcTotals(result.scores).items():
+                    if getattr(result, name) != value:
+                        mismatches.append(
+                            TotalsMismatch(
+                                result.result_id, name, getattr(result, name), value
+                            )
+                        )
+                        if repair:
+                            setattr(result, name, value)
+            last_id = results[-1].result_id
+            if repair:
+                session.flush()
+        log.info(
+            "checkTotals() - {} mismatches repair:{}".format(len(mismatches), repair)
+        )
+        return mismatches
+
+
+def _update_result_totals(session, flush_context, instances):
+    """Keep the totals of results with scores or handicap changed by the ORM."""
+    results = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Score):
+            if obj.result is not None:
+                results.add(obj.result)
+        elif isinstance(obj, Result):
+            if inspect(obj).attrs.course_handicap.history.has_changes():
+                results.add(obj)
+    for result in results:
+        if result not in session.deleted and result.round is not None:
+            result.updateTotals()
+
+
+event.listen(Session, "before_flush", _update_result_totals)
+
+
+class Differential(Base):
+    """Handicap differential posted for a completed result."""
+
+    __tablename__ = "differentials"
+    # the most recent differentials of a player are read from the index
+    __table_args__ = (
+        Index("ix_differentials_player_date", "player_id", "date_played", "result_id"),
+    )
+    differential_id = Column(Integer(), primary_key=True)
+    result_id = Column(
+        Integer(),
+        ForeignKey("results.result_id", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    player_id = Column(Integer(), ForeignKey("players.player_id"), nullable=False)
+    date_played = Column(Date(), nullable=False)
+    adjusted_gross = Column(Integer(), nullable=False)
+    differential = Column(Float(), nullable=False)
+
+    @classmethod
+    def recent(cls, session, player_id):
+        """Return the last WINDOW_SIZE differentials of a player, newest first."""
+        return [
+            row.differential
+            for row in session.query(cls.differential)
+            .filter(cls.player_id == player_id)
+            .order_by(cls.date_played.desc(), cls.result_id.desc())
+            .limit(WINDOW_SIZE)
+        ]
 
 
 class Game(Base):
     """Games played in a round."""
 
     __tablename__ = "games"
+    __table_args__ = (Index("ix_games_round_type", "round_id", "game_type"),)
     game_id = Column(Integer(), primary_key=True)
-    round_id = Column(Integer(), ForeignKey("rounds.round_id"), nullable=False)
+    round_id = Column(
+        Integer(), ForeignKey("rounds.round_id", ondelete="CASCADE"), nullable=False
+    )
     game_type = Column(String(32), nullable=False)
-    dict_data = Column(Text, default="{}")
+    dict_data = Column(JSONDict, default=lambda: {})
+    # optimistic lock, an UPDATE of a game changed by another writer fails
+    version = Column(Integer(), nullable=False, default=0, server_default="0")
     round = relationship("Round", back_populates="games")
 
+    __mapper_args__ = {"version_id_col": version}
+
     def CreateGame(self):
-        game_class = SqlGolfGameFactory(self.game_type)
+        """Return the game instance computed with the scores of the round.
+
+    The instance is kept in game_cache. It is returned again while the round
+    version is the same, a new version only applies the changed holes.
+    """
         self._game_data = self.game_data
-        game = game_class(self, self.round, **self._game_data["options"])
-        game.validate()
-        game.update()
+        golf_round = self.round
+        session = inspect(self).session
+        key = None
+        if session is not None and self.game_id is not None:
+            key = (session.bind, self.game_id)
+        setup_key = (
+            golf_round.round_id,
+            self.game_type,
+            json.dumps(self._game_data.get("options"), sort_keys=True),
+            golf_round.course_id,
+            tuple(
+                (result.result_id, result.course_handicap)
+                for result in golf_round.results
+            ),
+        )
+        entry = game_cache.take(key) if key is not None else None
+        if entry is not None and entry.setup_key == setup_key:
+            game = entry.game
+            game.rebind(self, golf_round)
+            if entry.round_version != golf_round.version:
+                game.update()
+        else:
+            game_class = SqlGolfGameFactory(self.game_type)
+            game = game_class(self, golf_round, **self._game_data["options"])
+            game.validate()
+            game.update()
+        if key is not None:
+            entry = game_cache.GameEntry(game, golf_round.version, setup_key)
+            game_cache.put(key, entry)
         return game
 
+    @staticmethod
+    def uncache(session, query):
+        """Drop the instances of games about to be deleted from game_cache.
+
+    Args:
+      session: sqalchemy session.
+      query: query of game_id.
+    """
+        for (game_id,) in query:
+            game_cache.invalidate((session.bind, game_id))
+
     @property
     def game_data(self):
-        return ast.literal_eval(self.dict_data)
+        if self.dict_data is None:
+            self.dict_data = {}
+        return self.dict_data
 
     @game_data.setter
     def game_data(self, value):
-        self.dict_data = str(value)
+        self.dict_data = value
 
     def add_hole_dict_data(self, hole_num, dct_data):
-        dct = self.game_data
-        dct[hole_num] = dct_data
-        self.game_data = dct
+        # game results for this round must be computed again
+        self.round.bump_version()
+        self.game_data[hole_num] = dct_data
+
+
+class GameResult(Base):
+    """Rendered scorecard, leaderboard and status of a game.
+
+    Computed once when the round changes and read directly by viewers. The
+    row is current while round_version matches the version of its round.
+    """
+
+    __tablename__ = "game_results"
+    game_id = Column(
+        Integer(), ForeignKey("games.game_id", ondelete="CASCADE"), primary_key=True
+    )
+    round_version = Column(Integer(), nullable=False)
+    short_description = Column(String(32))
+    scorecard = Column(JSONEncodedDict)
+    leaderboard = Column(JSONEncodedDict)
+    status = Column(Text)
+    # per player numbers of the leaderboard rolled into season standings
+    totals = Column(JSONEncodedDict)
+
+    def update(self, game, round_version):
+        """Render a game instance into this row."""
+        self.round_version = round_version
+        self.short_description = game.short_description
+        dct = game.getScorecard()
+        self.scorecard = {
+            "header": dct["header"],
+            "lines": [player["line"] for player in dct["players"]],
+        }
+        dct = game.getLeaderboard()
+        self.leaderboard = {
+            "hdr": dct["hdr"],
+            "lines": [line["line"] for line in dct["leaderboard"]],
+        }
+        self.totals = {
+            "players": [
+                {
+                    "player_id": line["player"].player_id,
+                    "total": _number(line.get("total")),
+                    "money": _number(line.get("money")),
+                    "pos": line.get("pos"),
+                }
+                for line in dct["leaderboard"]
+                if hasattr(line.get("player"), "player_id")
+            ]
+        }
+        self.status = game.getStatus()["line"]
+
+
+def _number(value):
+    """Return value if it is a number, None otherwise."""
+    return value if isinstance(value, (int, float)) else None
+
+
+# rounds packed per statement by Round.archive()
+ARCHIVE_BATCH_SIZE = 200
 
 
 class Round(Base):
     __tablename__ = "rounds"
+    # round listing pages walk the date index, newest first
+    __table_args__ = (
+        Index("ix_rounds_date", "date_played", "round_id"),
+        Index("ix_rounds_course_date", "course_id", "date_played", "round_id"),
+    )
     round_id = Column(Integer(), primary_key=True)
     course_id = Column(Integer(), ForeignKey("courses.course_id"), nullable=False)
     date_played = Column(Date(), nullable=False, default=datetime.date.today())
-    dict_options = Column(Text, default="{}")
+    dict_options = Column(JSONDict, default=lambda: {})
+    # bumped on every change to scores, players or games so cached rounds and
+    # game results can be invalidated
+    version = Column(Integer(), nullable=False, default=0, server_default="0")
     course = relationship("Course", uselist=False)
-    results = relationship("Result", order_by=Result.result_id, back_populates="round")
-    games = relationship("Game", order_by=Game.game_id, back_populates="round")
+    results = relationship(
+        "Result",
+        order_by=Result.result_id,
+        back_populates="round",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    games = relationship(
+        "Game",
+        order_by=Game.game_id,
+        back_populates="round",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    # the version is also an optimistic lock: bump_version() sets the next
+    # version and the UPDATE fails if another writer changed the round first
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
+    # (version, results, arrays) read by ScoreMatrix.load(), shared by the games
+    _score_arrays = None
 
     OPTIONS = {"calc_course_handicap": {"type": "enum", "values": ("USGA", "simple")}}
 
     def get_option(self, name):
-        dct = ast.literal_eval(self.dict_options)
-        return dct.get(name)
+        if not self.dict_options:
+            return None
+        return self.dict_options.get(name)
 
     def set_option(self, name, value):
         if name not in self.OPTIONS:
@@ -295,12 +865,13 @@ class Round(Base):
                 'option type "{}" not supported'.format(option["type"])
             )
         # set option value
-        dct = ast.literal_eval(self.dict_options)
-        dct[name] = value
-        self.dict_options = str(dct)
+        if self.dict_options is None:
+            self.dict_options = {}
+        self.dict_options[name] = value
 
     def addScores(self, session, hole, dct_scores):
-        """Add some scores for this round.
+        """Add some scores for this round. Scores already entered for this hole
+    are replaced, so the same call corrects a hole.
 
     Args:
       session: sqalchemy session.
@@ -320,11 +891,16 @@ class Round(Base):
         if lstPutts and len(lstPutts) != len(self.results):
             raise GolfDBException("putts do not match number of players")
         # update scores
-        for n, result in enumerate(self.results):
-            score = Score(num=hole, gross=lstGross[n], result=result)
-            if lstPutts:
-                score.putts = lstPutts[n]
-            session.add(score)
+        rows = [
+            {
+                "result_id": result.result_id,
+                "num": hole,
+                "gross": lstGross[n],
+                "putts": lstPutts[n] if lstPutts else None,
+            }
+            for n, result in enumerate(self.results)
+        ]
+        self.upsertScores(session, rows)
         # print('dct_scores:{}'.format(dct_scores))
         options = dct_scores.get("options")
         if options:
@@ -338,17 +914,357 @@ class Round(Base):
                     golf_game.add_hole_dict_data(hole, options[game.game_type])
                     session.commit()
 
+    def upsertScores(self, session, rows):
+        """Insert or replace score rows for results in this round.
+
+    Args:
+      session: sqalchemy session.
+      rows: list of dictionaries with keys result_id, num, gross, putts.
+    """
+        session.flush()
+        if any(result.packed is not None for result in self.results):
+            # a correction to an archived round
+            Round.unarchive(session, self.round_id)
+        Score.upsert(session, rows)
+        result_ids = set([row["result_id"] for row in rows])
+        for result in self.results:
+            if result.result_id in result_ids:
+                session.expire(result, ["score_rows"])
+        self.bump_version()
+
+    @staticmethod
+    def delete(session, round_id):
+        """Delete a round with one DELETE statement.
+
+    Results, scores, games and their dependent rows are removed by the
+    database with ON DELETE CASCADE, none of them are loaded. Players with
+    handicap differentials posted from the round get a new handicap index.
+
+    Args:
+      session: sqalchemy session.
+      round_id: round to delete.
+    Returns:
+      number of rounds deleted.
+    """
+        # standings keep totals of posted rounds, take these out first
+        Season.unpostRounds(
+            session, session.query(SeasonRound).filter(SeasonRound.round_id == round_id)
+        )
+        Game.uncache(
+            session, session.query(Game.game_id).filter(Game.round_id == round_id)
+        )
+        # differentials of the round go with it, their players are posted again
+        player_ids = Round._postedPlayers(session, Result.round_id == round_id)
+        count = (
+            session.query(Round)
+            .filter(Round.round_id == round_id)
+            .delete(synchronize_session=False)
+        )
+        Round._updateHandicaps(session, player_ids)
+        session.expire_all()
+        return count
+
+    @staticmethod
+    def purge(session, start, end):
+        """Delete all rounds played from start to end, inclusive.
+
+    Players with handicap differentials posted from the rounds get a new
+    handicap index.
+
+    Args:
+      session: sqalchemy session.
+      start: first datetime.date to delete.
+      end: last datetime.date to delete.
+    Returns:
+      number of rounds deleted.
+    """
+        Season.unpostRounds(
+            session,
+            session.query(SeasonRound)
+            .join(Round, Round.round_id == SeasonRound.round_id)
+            .filter(Round.date_played >= start, Round.date_played <= end),
+        )
+        Game.uncache(
+            session,
+            session.query(Game.game_id)
+            .join(Round, Round.round_id == Game.round_id)
+            .filter(Round.date_played >= start, Round.date_played <= end),
+        )
+        player_ids = Round._postedPlayers(
+            session,
+            Result.round_id.in_(
+                session.query(Round.round_id).filter(
+                    Round.date_played >= start, Round.date_played <= end
+                )
+            ),
+        )
+        count = (
+            session.query(Round)
+            .filter(Round.date_played >= start, Round.date_played <= end)
+            .delete(synchronize_session=False)
+        )
+        Round._updateHandicaps(session, player_ids)
+        session.expire_all()
+        return count
+
+    @staticmethod
+    def _postedPlayers(session, criterion):
+        """Return player_ids with differentials of the results matching criterion."""
+        return [
+            row.player_id
+            for row in session.query(Differential.player_id)
+            .join(Result, Result.result_id == Differential.result_id)
+            .filter(criterion)
+            .distinct()
+        ]
+
+    @staticmethod
+    def _updateHandicaps(session, player_ids):
+        """Calculate the handicap index of players from their differentials left."""
+        updated = 0
+        for player_id in player_ids:
+            index = handicap_index(Differential.recent(session, player_id))
+            if index is not None:
+                session.query(Player).filter(Player.player_id == player_id).update(
+                    {"handicap": index}, synchronize_session=False
+                )
+                updated += 1
+        if updated:
+            log.info("_updateHandicaps() - {} players updated".format(updated))
+
+    @staticmethod
+    def archive(session, start, end, batch_size=ARCHIVE_BATCH_SIZE):
+        """Pack the scores of complete rounds played from start to end.
+
+    The gross and putts of each result are stored in Result.packed and its
+    score rows are deleted. Result.scores returns the same scores, so games,
+    handicaps and seasons are not changed. Incomplete rounds are skipped.
+
+    Args:
+      session: sqlalchemy session.
+      start: first datetime.date to archive.
+      end: last datetime.date to archive.
+      batch_size: rounds packed per statement.
+    Returns:
+      number of rounds archived.
+    """
+        round_ids = [
+            round_id
+            for (round_id,) in session.query(Round.round_id)
+            .filter(Round.date_played >= start, Round.date_played <= end)
+            .order_by(Round.round_id)
+        ]
+        count = 0
+        for n in range(0, len(round_ids), batch_size):
+            batch = round_ids[n : n + batch_size]
+            num_holes = dict(
+                session.query(Round.round_id, func.count(Hole.hole_id))
+                .join(Hole, Hole.course_id == Round.course_id)
+                .filter(Round.round_id.in_(batch))
+                .group_by(Round.round_id)
+            )
+            dct_scores = {}
+            query = (
+                session.query(Result.round_id, Result.result_id)
+                .filter(Result.round_id.in_(batch), Result.packed.is_(None))
+                .order_by(Result.result_id)
+            )
+            for round_id, result_id in query:
+                dct_scores.setdefault(round_id, {})[result_id] = []
+            query = (
+                session.query(Score.result_id, Score.num, Score.gross, Score.putts)
+                .join(Result, Result.result_id == Score.result_id)
+                .filter(Result.round_id.in_(batch), Result.packed.is_(None))
+                .order_by(Score.result_id, Score.num)
+            )
+            dct_result_scores = {}
+            for row in query:
+                dct_result_scores.setdefault(row.result_id, []).append(row)
+            rows = []
+            for round_id, dct_results in dct_scores.items():
+                scores = [dct_result_scores.get(rid, []) for rid in dct_results]
+                if any(len(lst) != num_holes[round_id] for lst in scores):
+                    continue
+                rows.extend(
+                    {"id": result_id, "packed": Score.pack(lst)}
+                    for result_id, lst in zip(dct_results, scores)
+                )
+                count += 1
+            if not rows:
+                continue
+            session.execute(
+                Result.__table__.update()
+                .where(Result.result_id == bindparam("id"))
+                .values(packed=bindparam("packed")),
+                rows,
+            )
+            session.query(Score).filter(
+                Score.result_id.in_([row["id"] for row in rows])
+            ).delete(synchronize_session=False)
+        session.expire_all()
+        log.info("archive() - {} rounds from {} to {}".format(count, start, end))
+        return count
+
+    @staticmethod
+    def unarchive(session, round_id):
+        """Restore the score rows of an archived round, to correct scores.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to unarchive.
+    Returns:
+      number of results restored, 0 if the round is not archived.
+    """
+        results = (
+            session.query(Result.result_id, Result.packed)
+            .filter(Result.round_id == round_id, Result.packed.isnot(None))
+            .all()
+        )
+        if not results:
+            return 0
+        rows = [
+            score._asdict()
+            for result_id, packed in results
+            for score in Score.unpack(result_id, packed)
+        ]
+        session.execute(Score.__table__.insert(), rows)
+        session.query(Result).filter(
+            Result.result_id.in_([result_id for result_id, _ in results])
+        ).update({Result.packed: None}, synchronize_session=False)
+        session.expire_all()
+        return len(results)
+
+    def bump_version(self):
+        """Scores, players or games changed, advance the round version."""
+        self.version = (self.version or 0) + 1
+
+    def refreshGameResults(self, session):
+        """Compute all games and store the results at the current version.
+
+    Args:
+      session: sqalchemy session.
+    Returns:
+      list of GolfGameException for games that need more information, these
+      games keep their previous results.
+    """
+        session.flush()
+        dct_rows = {
+            row.game_id: row
+            for row in session.query(GameResult)
+            .join(Game)
+            .filter(Game.round_id == self.round_id)
+        }
+        lst_info_needed = []
+        for game in self.games:
+            try:
+                game_instance = game.CreateGame()
+            except GolfGameException as ex:
+                lst_info_needed.append(ex)
+                continue
+            row = dct_rows.get(game.game_id)
+            if row is None:
+                row = GameResult(game_id=game.game_id)
+                session.add(row)
+            row.update(game_instance, self.version)
+        return lst_info_needed
+
     def addGame(self, session, game_type, options=None):
         # Create Game
         dict_data = {"options": options}
         game_class = SqlGolfGameFactory(game_type)
         # game_instance = game_class(round, )
-        game = Game(round=self, game_type=game_type, dict_data=str(dict_data))
+        game = Game(round=self, game_type=game_type, dict_data=dict_data)
         session.add(game)
+        self.bump_version()
 
     def get_completed_holes(self):
         return max([result.get_completed_holes() for result in self.results])
 
+    def is_complete(self):
+        """True if every player has a score on every hole."""
+        num_holes = len(self.course.holes)
+        if not self.results:
+            return False
+        return all(result.get_completed_holes() == num_holes for result in self.results)
+
+    def postHandicaps(self, session):
+        """Post differentials of a completed round and update player handicaps.
+
+    Each player index is calculated from the most recent differentials only,
+    so the cost does not grow with the number of rounds played. Posting the
+    same round again replaces its differentials.
+
+    The index is written to Player.handicap, so rounds added later use it and
+    a replay of historical rounds has other course handicaps than the ones
+    entered. A session of a Database with update_handicaps False posts the
+    differentials only and keeps the handicaps as entered.
+
+    Args:
+      session: sqalchemy session.
+    Returns:
+      list of players with an updated handicap, empty if round not complete.
+    """
+        if len(self.course.holes) != 18 or not self.is_complete():
+            return []
+        existing = {
+            row.result_id: row
+            for row in session.query(Differential).filter(
+                Differential.result_id.in_([res.result_id for res in self.results])
+            )
+        }
+        for result in self.results:
+            tee = session.query(Tee).get(result.tee_id)
+            adjusted_gross = sum(
+                self.course.calcESC(score.num - 1, score.gross, result.course_handicap)
+                for score in result.scores
+            )
+            row = existing.get(result.result_id)
+            if row is None:
+                row = Differential(result_id=result.result_id)
+                session.add(row)
+            row.player_id = result.player_id
+            row.date_played = self.date_played
+            row.adjusted_gross = adjusted_gross
+            row.differential = score_differential(adjusted_gross, tee.rating, tee.slope)
+        session.flush()
+        players = []
+        if not session.info.get("update_handicaps", True):
+            # handicaps as entered
+            return players
+        for result in self.results:
+            index = handicap_index(Differential.recent(session, result.player_id))
+            if index is not None:
+                result.player.handicap = index
+                players.append(result.player)
+        log.info(
+            "postHandicaps() - round {} {} players updated".format(
+                self.round_id, len(players)
+            )
+        )
+        return players
+
+    def postSeasons(self, session):
+        """Roll the game results of a completed round into season standings.
+
+    Args:
+      session: sqalchemy session.
+    Returns:
+      list of seasons with updated standings, empty if round not complete.
+    """
+        if not self.is_complete():
+            return []
+        seasons = [
+            season
+            for season in Season.covering(session, self.date_played)
+            if season.postRound(session, self)
+        ]
+        log.info(
+            "postSeasons() - round {} {} seasons updated".format(
+                self.round_id, len(seasons)
+            )
+        )
+        return seasons
+
     def getScorecard(self, ESC=True):
         dct = self.course.getScorecard(ESC=ESC)
         dct["title"] = "{0:*^98}".format(
@@ -364,18 +1280,638 @@ class Round(Base):
         )
 
 
+class Season(Base):
+    """League season, standings of the rounds played from start to end date.
+
+    Each completed round is posted once, its game results are added to the
+    Standing rows of its players. A round posted again after it changed has
+    its previous totals taken out first, so prior rounds are never read.
+    """
+
+    __tablename__ = "seasons"
+    # games where a lower total is better
+    STROKE_GAMES = ("gross", "net", "putts")
+    season_id = Column(Integer(), primary_key=True)
+    name = Column(String(64), nullable=False, unique=True)
+    start_date = Column(Date(), nullable=False)
+    end_date = Column(Date(), nullable=False)
+
+    @classmethod
+    def covering(cls, session, date_played):
+        """Return seasons that include date_played."""
+        return (
+            session.query(cls)
+            .filter(cls.start_date <= date_played, cls.end_date >= date_played)
+            .all()
+        )
+
+    def postRound(self, session, golf_round):
+        """Add the game results of a completed round to the standings.
+
+    Args:
+      session: sqalchemy session.
+      golf_round: completed round played in this season.
+    Returns:
+      False if the round is already posted at its current version, or a game
+      needs more information.
+    """
+        posted = session.query(SeasonRound).get((self.season_id, golf_round.round_id))
+        if posted is not None and posted.round_version == golf_round.version:
+            return False
+        rows = self._roundTotals(session, golf_round)
+        if rows is None:
+            return False
+        if posted is not None:
+            self._apply(session, posted.totals["rows"], -1)
+        self._apply(session, rows, 1)
+        if posted is None:
+            posted = SeasonRound(season_id=self.season_id, round_id=golf_round.round_id)
+            session.add(posted)
+        posted.round_version = golf_round.version
+        posted.totals = {"rows": rows}
+        return True
+
+    @staticmethod
+    def _roundTotals(session, golf_round):
+        """Return [player_id, game_type, total, money, win] of each game.
+
+    None if game results can not be computed for the current version.
+    """
+        query = (
+            session.query(Game.game_type, GameResult)
+            .join(GameResult, GameResult.game_id == Game.game_id)
+            .filter(Game.round_id == golf_round.round_id)
+        )
+
+        def current(results):
+            return len(results) == len(golf_round.games) and all(
+                row.round_version == golf_round.version and row.totals is not None
+                for _, row in results
+            )
+
+        results = query.all()
+        if not current(results):
+            golf_round.refreshGameResults(session)
+            session.flush()
+            results = query.all()
+            if not current(results):
+                # a game needs more information to finish the round
+                return None
+        rows = []
+        for game_type, row in results:
+            for player in row.totals["players"]:
+                rows.append(
+                    [
+                        player["player_id"],
+                        game_type,
+                        player["total"] or 0,
+                        player["money"] or 0,
+                        1 if player["pos"] == 1 else 0,
+                    ]
+                )
+        return rows
+
+    def _apply(self, session, rows, sign):
+        """Add (sign 1) or subtract (sign -1) round totals from the standings."""
+        if not rows:
+            return
+        standings = {
+            (row.player_id, row.game_type): row
+            for row in session.query(Standing).filter(
+                Standing.season_id == self.season_id,
+                Standing.player_id.in_(set(row[0] for row in rows)),
+            )
+        }
+        for player_id, game_type, total, money, win in rows:
+            standing = standings.get((player_id, game_type))
+            if standing is None:
+                standing = Standing(
+                    season_id=self.season_id,
+                    player_id=player_id,
+                    game_type=game_type,
+                    rounds=0,
+                    total=0,
+                    money=0,
+                    wins=0,
+                )
+                session.add(standing)
+                standings[(player_id, game_type)] = standing
+            standing.rounds += sign
+            standing.total += sign * total
+            standing.money += sign * money
+            standing.wins += sign * win
+
+    @classmethod
+    def unpostRounds(cls, session, query):
+        """Take posted rounds out of the standings before they are deleted.
+
+    Args:
+      session: sqalchemy session.
+      query: SeasonRound query of the rounds.
+    """
+        seasons = {}
+        for posted in query:
+            season = seasons.get(posted.season_id)
+            if season is None:
+                season = seasons[posted.season_id] = session.query(cls).get(
+                    posted.season_id
+                )
+            season._apply(session, posted.totals["rows"], -1)
+        session.flush()
+
+    def getStandings(self, session, game_type=None):
+        """Return standings, best first for each game type.
+
+    Args:
+      session: sqalchemy session.
+      game_type: only standings of this game, None for all games.
+    Returns:
+      list of (game_type, nick_name, rounds, total, money, wins) rows of
+      players with posted rounds.
+    """
+        query = (
+            session.query(
+                Standing.game_type,
+                Player.nick_name,
+                Standing.rounds,
+                Standing.total,
+                Standing.money,
+                Standing.wins,
+            )
+            .join(Player, Player.player_id == Standing.player_id)
+            .filter(Standing.season_id == self.season_id, Standing.rounds > 0)
+        )
+        if game_type is not None:
+            query = query.filter(Standing.game_type == game_type)
+        # stroke games rank the lowest average, the others the highest total
+        rank = case(
+            [
+                (
+                    Standing.game_type.in_(self.STROKE_GAMES),
+                    Standing.total * 1.0 / Standing.rounds,
+                )
+            ],
+            else_=-Standing.total,
+        )
+        return query.order_by(Standing.game_type, Standing.money.desc(), rank).all()
+
+
+class SeasonRound(Base):
+    """Round posted to a season with the totals it added to the standings."""
+
+    __tablename__ = "season_rounds"
+    __table_args__ = (Index("ix_season_rounds_round_id", "round_id"),)
+    season_id = Column(
+        Integer(),
+        ForeignKey("seasons.season_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    round_id = Column(
+        Integer(), ForeignKey("rounds.round_id", ondelete="CASCADE"), primary_key=True
+    )
+    round_version = Column(Integer(), nullable=False)
+    totals = Column(JSONEncodedDict)
+
+
+class Standing(Base):
+    """Season totals of one player in one game."""
+
+    __tablename__ = "standings"
+    season_id = Column(
+        Integer(),
+        ForeignKey("seasons.season_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    game_type = Column(String(32), primary_key=True)
+    player_id = Column(Integer(), ForeignKey("players.player_id"), primary_key=True)
+    rounds = Column(Integer(), nullable=False, default=0)
+    total = Column(Float(), nullable=False, default=0)
+    money = Column(Float(), nullable=False, default=0)
+    wins = Column(Integer(), nullable=False, default=0)
+
+
+# loader options are processed once, the baked query caches the result.
+_snapshot_results = selectinload(Round.results)
+_snapshot_options = (
+    joinedload(Round.course).selectinload(Course.holes),
+    joinedload(Round.course).selectinload(Course.tees),
+    _snapshot_results.joinedload(Result.player),
+    _snapshot_results.selectinload(Result.score_rows),
+    selectinload(Round.games),
+)
+_bakery = baked.bakery()
+
+
+def load_round_snapshot(session, round_id):
+    """Load a round with everything the games and views use.
+
+    The course, holes, tees, results, players, scores and games are fetched
+    with joined and select-in loading, so the number of SELECTs is fixed and
+    does not grow with the number of players.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to load.
+    Returns:
+      Round instance.
+    Raises:
+      NoResultFound - round does not exist.
+    """
+    query = _bakery(lambda session: session.query(Round).options(*_snapshot_options))
+    query += lambda q: q.filter(Round.round_id == bindparam("round_id"))
+    return query(session).params(round_id=round_id).one()
+
+
+def get_round(session, round_id):
+    """Return a round from the session, reloaded only when it changed.
+
+    A round already in the identity map is checked with one SELECT of its
+    version. When the version changed, everything in the session is expired
+    and the round snapshot is loaded again.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to get.
+    Returns:
+      Round instance.
+    Raises:
+      NoResultFound - round does not exist.
+    """
+    golf_round = session.identity_map.get(identity_key(Round, round_id))
+    if golf_round is not None:
+        version = inspect(golf_round).dict.get("version")
+        current = (
+            session.query(Round.version).filter(Round.round_id == round_id).scalar()
+        )
+        if version is not None and version == current:
+            return golf_round
+        session.expire_all()
+    return load_round_snapshot(session, round_id)
+
+
+def post_scores(session, round_id, update):
+    """Change a round, then recompute its game results, handicaps and seasons.
+
+    Run it with Database.retry_unit_of_work() so a scorer that lost a race
+    on the round version starts again from the other scorer's changes.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to change.
+      update: function called with the round to add scores or game data.
+    Returns:
+      list of GolfGameException for games that need more information.
+    """
+    update(get_round(session, round_id))
+    session.commit()
+    golf_round = get_round(session, round_id)
+    lst_info_needed = golf_round.refreshGameResults(session)
+    golf_round.postHandicaps(session)
+    if not lst_info_needed:
+        golf_round.postSeasons(session)
+    session.commit()
+    return lst_info_needed
+
+
+def set_game_hole_data(session, game_id, hole_num, dct_data):
+    """Store the information a game needs for a hole, see post_scores()."""
+    game = session.query(Game).filter(Game.game_id == game_id).one()
+    game.add_hole_dict_data(hole_num, dct_data)
+    session.commit()
+
+
+def _query_game_results(session, round_id):
+    """Return list of (game_id, round version, GameResult or None)."""
+    query = _bakery(
+        lambda session: session.query(Game.game_id, Round.version, GameResult)
+        .join(Round, Round.round_id == Game.round_id)
+        .outerjoin(GameResult, GameResult.game_id == Game.game_id)
+        .order_by(Game.game_id)
+        .populate_existing()
+    )
+    query += lambda q: q.filter(Game.round_id == bindparam("round_id"))
+    return query(session).params(round_id=round_id).all()
+
+
+def load_game_results(session, round_id):
+    """Load the game results of a round, in game order.
+
+    Results are read with one SELECT. Missing or stale results are computed
+    and committed first.
+
+    Args:
+      session: sqlalchemy session.
+      round_id: round to load.
+    Returns:
+      list of GameResult.
+    Raises:
+      GolfGameException - a game needs more information to be computed.
+    """
+    rows = _query_game_results(session, round_id)
+    if any(row is None or row.round_version != version for _, version, row in rows):
+        golf_round = load_round_snapshot(session, round_id)
+        lst_info_needed = golf_round.refreshGameResults(session)
+        session.commit()
+        if lst_info_needed:
+            raise lst_info_needed[0]
+        rows = _query_game_results(session, round_id)
+    return [row for _, _, row in rows]
+
+
+# SQLite pragmas set on every new connection, selected per deployment.
+#   durable - WAL journal, fsync on every commit.
+#   fast    - WAL journal, fsync only at checkpoints. A power loss can drop
+#             the last commits but never corrupts the database.
+ENGINE_PROFILES = {
+    "default": {},
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+
+
+# attempts and first wait in seconds of retry_unit_of_work
+RETRY_ATTEMPTS = 5
+RETRY_BACKOFF = 0.05
+# write conflicts kept for the report
+CONFLICT_REPORT_SIZE = 100
+
+Conflict = namedtuple("Conflict", "time attempt error message")
+
+
+def _is_busy(ex):
+    """True if an OperationalError is SQLite locked or busy."""
+    message = str(ex.orig)
+    return "database is locked" in message or "database is busy" in message
+
+
 class Database:
-    def __init__(self, url):
+    """Engine and sessions of a golf database.
+
+    Args:
+      url: SQLAlchemy database url.
+      profile: SQLite engine profile, see ENGINE_PROFILES.
+      update_handicaps: completed rounds update the player handicaps, see
+        Round.postHandicaps(). False keeps the handicaps as entered.
+    """
+
+    def __init__(self, url, profile="default", update_handicaps=True):
+        if profile not in ENGINE_PROFILES:
+            raise GolfDBException(
+                'profile "{}" not supported. Must be in {}'.format(
+                    profile, sorted(ENGINE_PROFILES)
+                )
+            )
         self.url = url
+        self.profile = profile
+        self.update_handicaps = update_handicaps
         self.engine = create_engine(self.url)
-        self.Session = sessionmaker(bind=self.engine)
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", self._set_pragmas)
+        info = {"update_handicaps": update_handicaps}
+        self.Session = sessionmaker(bind=self.engine, info=info)
+        # one long lived session per thread, objects stay loaded across commits
+        self.scoped_session = scoped_session(
+            sessionmaker(bind=self.engine, expire_on_commit=False, info=info)
+        )
+        # most recent write conflicts resolved by retry_unit_of_work
+        self.conflicts = deque(maxlen=CONFLICT_REPORT_SIZE)
+
+    def _set_pragmas(self, dbapi_connection, connection_record):
+        """Apply the engine profile to a new SQLite connection."""
+        cursor = dbapi_connection.cursor()
+        # ON DELETE CASCADE needs foreign keys enforced, off by default
+        cursor.execute("PRAGMA foreign_keys=ON")
+        for name, value in ENGINE_PROFILES[self.profile].items():
+            cursor.execute("PRAGMA {}={}".format(name, value))
+        cursor.close()
+
+    def get_pragmas(self):
+        """Return current value of the profile pragmas."""
+        dct = {}
+        with self.engine.connect() as conn:
+            for name in ENGINE_PROFILES[self.profile]:
+                dct[name] = conn.execute("PRAGMA {}".format(name)).scalar()
+        return dct
 
     def create_session(self):
         return self.Session()
 
+    @contextmanager
+    def unit_of_work(self):
+        """Run a unit of work in the session of the current thread.
+
+        The session and its identity map are reused by every unit of work in
+        the thread until close(). The work is committed when the block exits,
+        on any exception it is rolled back and the session is closed.
+
+        Yields:
+          sqlalchemy session.
+        """
+        session = self.scoped_session()
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            self.scoped_session.remove()
+            raise
+
+    def retry_unit_of_work(self, func, attempts=RETRY_ATTEMPTS, backoff=RETRY_BACKOFF):
+        """Run func(session) in a unit of work, run again on a write conflict.
+
+        A conflict is a stale version of a round or game written by another
+        scorer, or SQLite still locked after its busy timeout. The unit of
+        work is rolled back and the session closed, so the next attempt
+        reads the other writer's changes. Attempts wait an exponential
+        backoff with jitter. Every conflict is recorded in conflicts.
+
+        Args:
+          func: function called with the session, may commit.
+          attempts: maximum number of times func is run.
+          backoff: seconds to wait after the first conflict, doubled for
+            every later one.
+        Returns:
+          the value returned by func.
+        Raises:
+          GolfDBConflict - still conflicting after all attempts.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                with self.unit_of_work() as session:
+                    return func(session)
+            except (StaleDataError, OperationalError) as ex:
+                if isinstance(ex, OperationalError) and not _is_busy(ex):
+                    raise
+                conflict = Conflict(
+                    datetime.datetime.now(), attempt, type(ex).__name__, str(ex)
+                )
+                self.conflicts.append(conflict)
+                log.info("retry_unit_of_work() - conflict {}".format(conflict))
+                if attempt == attempts:
+                    raise GolfDBConflict(
+                        "write conflict not resolved after {} attempts - {}".format(
+                            attempts, ex
+                        )
+                    )
+                time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    def close(self):
+        """Close the session of the current thread, loaded objects are dropped."""
+        self.scoped_session.remove()
+
     def create_tables(self):
         """Create all tables."""
         Base.metadata.create_all(self.engine)
+        course_cache.invalidate()
+        game_cache.invalidate()
+        course_search.invalidate()
+
+    def upgrade_tables(self):
+        """Bring an existing database up to the current schema.
+
+        Creates missing tables, columns and indexes. Duplicate rows are removed
+        before a unique index is added, the row added last is kept. SQLite
+        tables with outdated foreign keys are rebuilt.
+
+        Returns:
+          list of column and index names created and tables rebuilt.
+        """
+        Base.metadata.create_all(self.engine)
+        inspector = inspect(self.engine)
+        created = []
+        fill_totals = False
+        for table in Base.metadata.sorted_tables:
+            columns = [col["name"] for col in inspector.get_columns(table.name)]
+            new_columns = [col for col in table.columns if col.name not in columns]
+            rebuild = self._foreign_keys_changed(table)
+            if rebuild:
+                # the new table has the new columns
+                self._rebuild_table(table)
+                created.append("{} foreign keys".format(table.name))
+            for col in new_columns:
+                if not rebuild:
+                    self._add_column(table, col)
+                created.append("{}.{}".format(table.name, col.name))
+                if col is Course.__table__.c.name_key:
+                    self._fill_name_keys()
+                if col is Result.__table__.c.holes_played:
+                    fill_totals = True
+            if rebuild:
+                continue
+            existing = [index["name"] for index in inspector.get_indexes(table.name)]
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    self._remove_duplicates(table, [col.name for col in index.columns])
+                log.info("upgrade_tables() create index {}".format(index.name))
+                index.create(self.engine)
+                created.append(index.name)
+        if fill_totals:
+            self._fill_result_totals()
+        return created
+
+    def _fill_name_keys(self):
+        """Set the name key of courses created before it was added."""
+        rows = self.engine.execute("SELECT course_id, name FROM courses").fetchall()
+        if rows:
+            self.engine.execute(
+                Course.__table__.update()
+                .where(Course.course_id == bindparam("id"))
+                .values(name_key=bindparam("key")),
+                [{"id": row[0], "key": course_search.name_key(row[1])} for row in rows],
+            )
+        course_search.invalidate()
+
+    def _fill_result_totals(self):
+        """Compute the running totals of results created before they were added."""
+        session = self.create_session()
+        try:
+            Result.checkTotals(session, repair=True)
+            session.commit()
+        finally:
+            session.close()
+
+    def _foreign_keys_changed(self, table):
+        """True if SQLite foreign key ON DELETE actions differ from the model."""
+        if self.engine.dialect.name != "sqlite":
+            return False
+        expected = set(
+            (fk.parent.name, fk.column.table.name, (fk.ondelete or "NO ACTION").upper())
+            for fk in table.foreign_keys
+        )
+        rows = self.engine.execute("PRAGMA foreign_key_list({})".format(table.name))
+        actual = set((row["from"], row["table"], row["on_delete"]) for row in rows)
+        return expected != actual
+
+    def _rebuild_table(self, table):
+        """Recreate a SQLite table to change its foreign keys, rows are kept.
+
+        SQLite cannot alter a constraint, the table is copied to a new table
+        with the current schema which then replaces the old one.
+        """
+        new_name = "_new_{}".format(table.name)
+        create = str(CreateTable(table).compile(self.engine)).replace(
+            "CREATE TABLE {} (".format(table.name),
+            "CREATE TABLE {} (".format(new_name),
+            1,
+        )
+        inspector = inspect(self.engine)
+        existing = [col["name"] for col in inspector.get_columns(table.name)]
+        columns = ", ".join([col.name for col in table.columns if col.name in existing])
+        log.info("upgrade_tables() rebuild {}".format(table.name))
+        with self.engine.connect() as conn:
+            # foreign keys can only be switched outside a transaction
+            conn.execute("PRAGMA foreign_keys=OFF")
+            try:
+                with conn.begin():
+                    conn.execute(create)
+                    conn.execute(
+                        "INSERT INTO {} ({}) SELECT {} FROM {}".format(
+                            new_name, columns, columns, table.name
+                        )
+                    )
+                    conn.execute("DROP TABLE {}".format(table.name))
+                    conn.execute(
+                        "ALTER TABLE {} RENAME TO {}".format(new_name, table.name)
+                    )
+                    for index in table.indexes:
+                        index.create(conn)
+            finally:
+                conn.execute("PRAGMA foreign_keys=ON")
+
+    def _add_column(self, table, col):
+        """ALTER TABLE to add a column, server_default fills existing rows."""
+        sql = "ALTER TABLE {} ADD COLUMN {} {}".format(
+            table.name, col.name, col.type.compile(dialect=self.engine.dialect)
+        )
+        if not col.nullable:
+            sql += " NOT NULL"
+        if col.server_default is not None:
+            sql += " DEFAULT '{}'".format(col.server_default.arg)
+        log.info("upgrade_tables() {}".format(sql))
+        with self.engine.begin() as conn:
+            conn.execute(sql)
+
+    def _remove_duplicates(self, table, columns):
+        """Delete rows duplicated on columns, keeping the highest primary key."""
+        pk = table.primary_key.columns.values()[0].name
+        sql = "DELETE FROM {0} WHERE {1} NOT IN (SELECT max({1}) FROM {0} GROUP BY {2})"
+        with self.engine.begin() as conn:
+            conn.execute(sql.format(table.name, pk, ", ".join(columns)))
 
     def list_tables(self):
         """Create all tables."""
@@ -389,3 +1925,5 @@ class DBAdmin(Database):
     def remove(self):
         """Delete a database."""
         Base.metadata.drop_all(self.engine)
+        course_cache.invalidate()
+        course_search.invalidate()
@@ -0,0 +1,182 @@
+"""db_stats.py - player statistics computed by the database.
+
+Every statistic is a single aggregate query over scores joined to results,
+rounds and holes, grouped by player. Scores of archived rounds are decoded
+from Result.packed by SQLite in the same query. Rows are returned as named
+tuples, no Round or game instances are loaded.
+"""
+
+from sqlalchemy import and_, case, distinct, func, select, union_all
+
+from .db_sqlalchemy import Player, Hole, Round, Result, Score
+
+# hole score decoded from Result.packed of an archived round
+PACKED_GROSS = func.unicode(func.substr(Result.packed, Hole.num, 1))
+PACKED_PUTTS = func.nullif(
+    func.coalesce(
+        func.unicode(
+            func.substr(Result.packed, func.length(Result.packed) / 2 + Hole.num, 1)
+        ),
+        0,
+    ),
+    Score.PACKED_NO_PUTTS,
+)
+
+
+def _count_if(condition):
+    return func.sum(case([(condition, 1)], else_=0))
+
+
+def _rate(count, total):
+    return func.round(count * 1.0 / total, 3)
+
+
+def _hole_scores(start=None, end=None, player_ids=None):
+    """Every hole score with its par and player, archived rounds included.
+
+    Args:
+      start: first date played to include, None for all.
+      end: last date played to include, None for all.
+      player_ids: list of player_ids to include, None for all.
+    Returns:
+      alias with columns player_id, result_id, par, gross and putts.
+    """
+    scores = (
+        Score.__table__.join(Result, Result.result_id == Score.result_id)
+        .join(Round, Round.round_id == Result.round_id)
+        .join(Hole, and_(Hole.course_id == Round.course_id, Hole.num == Score.num))
+    )
+    archived = Result.__table__.join(Round, Round.round_id == Result.round_id).join(
+        Hole, Hole.course_id == Round.course_id
+    )
+    selects = [
+        select(
+            [Result.player_id, Result.result_id, Hole.par, Score.gross, Score.putts]
+        ).select_from(scores),
+        select(
+            [
+                Result.player_id,
+                Result.result_id,
+                Hole.par,
+                PACKED_GROSS.label("gross"),
+                PACKED_PUTTS.label("putts"),
+            ]
+        )
+        .select_from(archived)
+        .where(Result.packed.isnot(None)),
+    ]
+    for n, query in enumerate(selects):
+        if start is not None:
+            query = query.where(Round.date_played >= start)
+        if end is not None:
+            query = query.where(Round.date_played <= end)
+        if player_ids is not None:
+            query = query.where(Result.player_id.in_(player_ids))
+        selects[n] = query
+    return union_all(*selects).alias("hole_scores")
+
+
+def _score_query(session, hole_scores, columns):
+    """Query columns over hole_scores joined to the players."""
+    return (
+        session.query(*columns)
+        .select_from(hole_scores)
+        .join(Player, Player.player_id == hole_scores.c.player_id)
+    )
+
+
+def player_summary(session, start=None, end=None, player_ids=None):
+    """Scoring summary of each player.
+
+    Args:
+      session: sqlalchemy session.
+      start, end, player_ids: see _hole_scores.
+    Returns:
+      list of rows with player_id, nick_name, rounds, holes, avg_gross (per
+      hole), avg_to_par (per hole), putts_per_round, eagles, birdies, pars,
+      bogeys, doubles (or worse) and birdie_rate (birdie or better per hole).
+    """
+    hole_scores = _hole_scores(start, end, player_ids)
+    scores = hole_scores.c
+    to_par = scores.gross - scores.par
+    putts_rounds = func.count(
+        distinct(case([(scores.putts.isnot(None), scores.result_id)]))
+    )
+    holes = func.count(scores.result_id)
+    birdies = _count_if(to_par == -1)
+    eagles = _count_if(to_par <= -2)
+    columns = [
+        Player.player_id,
+        Player.nick_name,
+        func.count(distinct(scores.result_id)).label("rounds"),
+        holes.label("holes"),
+        func.round(func.avg(scores.gross), 2).label("avg_gross"),
+        func.round(func.avg(to_par), 2).label("avg_to_par"),
+        func.round(func.sum(scores.putts) * 1.0 / putts_rounds, 1).label(
+            "putts_per_round"
+        ),
+        eagles.label("eagles"),
+        birdies.label("birdies"),
+        _count_if(to_par == 0).label("pars"),
+        _count_if(to_par == 1).label("bogeys"),
+        _count_if(to_par >= 2).label("doubles"),
+        _rate(eagles + birdies, holes).label("birdie_rate"),
+    ]
+    query = _score_query(session, hole_scores, columns)
+    return query.group_by(Player.player_id).order_by(Player.player_id).all()
+
+
+def par_averages(session, start=None, end=None, player_ids=None):
+    """Average score of each player on par 3, 4 and 5 holes.
+
+    Args:
+      session: sqlalchemy session.
+      start, end, player_ids: see _hole_scores.
+    Returns:
+      list of rows with player_id, nick_name, par, holes, avg_gross,
+      avg_to_par and avg_putts.
+    """
+    hole_scores = _hole_scores(start, end, player_ids)
+    scores = hole_scores.c
+    columns = [
+        Player.player_id,
+        Player.nick_name,
+        scores.par,
+        func.count(scores.result_id).label("holes"),
+        func.round(func.avg(scores.gross), 2).label("avg_gross"),
+        func.round(func.avg(scores.gross - scores.par), 2).label("avg_to_par"),
+        func.round(func.avg(scores.putts), 2).label("avg_putts"),
+    ]
+    query = _score_query(session, hole_scores, columns)
+    return (
+        query.group_by(Player.player_id, scores.par)
+        .order_by(Player.player_id, scores.par)
+        .all()
+    )
+
+
+def score_counts(session, start=None, end=None, player_ids=None):
+    """Number of holes of each player with each gross and putts, by par.
+
+    Args:
+      session: sqlalchemy session.
+      start, end, player_ids: see _hole_scores.
+    Returns:
+      list of rows with player_id, par, gross, putts (None if not recorded)
+      and holes.
+    """
+    hole_scores = _hole_scores(start, end, player_ids)
+    scores = hole_scores.c
+    columns = [
+        scores.player_id,
+        scores.par,
+        scores.gross,
+        scores.putts,
+        func.count(scores.result_id).label("holes"),
+    ]
+    return (
+        session.query(*columns)
+        .group_by(scores.player_id, scores.par, scores.gross, scores.putts)
+        .order_by(scores.player_id, scores.par, scores.gross, scores.putts)
+        .all()
+    )
@@ -17,6 +17,12 @@ class GolfDBException(GolfException):
     pass
 
 
+class GolfDBConflict(GolfDBException):
+    """Write conflict not resolved, the same work can be run again later."""
+
+    pass
+
+
 class GolfGameException(GolfException):
     """Raised when a golf game need more information to resolve score."""
 
@@ -0,0 +1,110 @@
+"""game_cache.py - process wide LRU cache of SQL game instances.
+
+Building a game parses its options, sets up players and applies every hole.
+Game.CreateGame() keeps the instance it built, keyed by database engine and
+game_id with the round version it was computed at. The same version returns
+the instance as is. A newer version updates the instance, only the holes
+changed since are applied again. A game of another round is not touched.
+
+Entries are dropped when the cache is full, least recently used first, or
+when they were not used for max_age seconds. An instance is taken out of the
+cache while it is used, so two threads never update the same instance.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+DEF_SIZE = 128
+DEF_MAX_AGE = 600.0
+
+
+class GameEntry:
+    """A game instance and what it was computed from.
+
+    Args:
+      game: SqlGolfGame instance.
+      round_version: version of the round the game is current with.
+      setup_key: game type, options and players the instance was set up with,
+        a different setup_key needs a new instance.
+    """
+
+    def __init__(self, game, round_version, setup_key):
+        self.game = game
+        self.round_version = round_version
+        self.setup_key = setup_key
+        self.used = None
+
+
+class GameCache:
+    """LRU cache of GameEntry.
+
+    Args:
+      size: maximum number of entries.
+      max_age: seconds an entry is kept without being used.
+      clock: function returning the time in seconds.
+    """
+
+    def __init__(self, size=DEF_SIZE, max_age=DEF_MAX_AGE, clock=time.monotonic):
+        self.size = size
+        self.max_age = max_age
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def take(self, key):
+        """Remove and return the entry of key, None if missing or too old."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and self.clock() - entry.used > self.max_age:
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        """Add or replace the entry of key, drop the entries over the limits."""
+        now = self.clock()
+        entry.used = now
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            # least recently used first, stop at the first one still fresh
+            for oldest in list(self._entries):
+                if now - self._entries[oldest].used <= self.max_age:
+                    break
+                del self._entries[oldest]
+
+    def invalidate(self, key=None):
+        """Drop the entry of key, all entries if key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+_cache = GameCache()
+
+
+def take(key):
+    """Remove and return the GameEntry of key from the process cache."""
+    return _cache.take(key)
+
+
+def put(key, entry):
+    """Add a GameEntry to the process cache."""
+    _cache.put(key, entry)
+
+
+def invalidate(key=None):
+    """Drop a game from the process cache, all games if key is None."""
+    _cache.invalidate(key)
@@ -0,0 +1,190 @@
+"""game_odds.py - chances of the players to win the games of a round in progress.
+
+The holes left are played many times over. The gross and putts of a player
+on a hole are drawn from the scores of the player on holes of the same par
+in all rounds, see db_stats.score_counts(). A default spread of scores
+around the course handicap is added to the history, it decides for players
+with few scores.
+
+The trials are drawn once for all games of the round, as int8 arrays of
+players by holes by trials, a hole of all trials is a players by trials
+array. Each game scores them with its own rules in
+SqlGolfGame.simulate(), from the state of the game after the holes every
+player finished.
+"""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from . import db_stats
+from .exceptions import GolfGameException
+from util.tl_logger import TLLog
+
+log = TLLog.getLogger("odds")
+
+DEF_TRIALS = 100000
+# gross to par and putts that are drawn
+TO_PAR = np.arange(-3, 8)
+PUTTS = np.arange(0, 5)
+# chances of a scratch player for each of TO_PAR and of any player for PUTTS
+SCRATCH_TO_PAR = np.array([0, 0.01, 0.17, 0.6, 0.19, 0.03, 0, 0, 0, 0, 0])
+DEF_PUTTS = np.array([0.02, 0.2, 0.63, 0.13, 0.02])
+# number of holes the default chances weigh as, added to the history
+PRIOR_HOLES = 9
+# a draw is a byte, an index in the lookup table of a player on a hole, the
+# chances are rounded to 1/TABLE_SIZE
+TABLE_SIZE = 256
+
+# holes from start of the trials, gross and putts are players by holes by
+# trials int8 arrays, the holes played hold their scores
+Sample = namedtuple("Sample", "start gross putts rng")
+
+
+def _shift(probs, strokes):
+    """Move chances by strokes, the chances past the ends stay at the ends."""
+    shifted = np.zeros(len(probs))
+    np.add.at(
+        shifted, np.clip(np.arange(len(probs)) + strokes, 0, len(probs) - 1), probs
+    )
+    return shifted
+
+
+def default_to_par(course_handicap):
+    """Return the default chances of each of TO_PAR for a course handicap."""
+    strokes = course_handicap / 18
+    whole = int(np.floor(strokes))
+    part = strokes - whole
+    return (1 - part) * _shift(SCRATCH_TO_PAR, whole) + part * _shift(
+        SCRATCH_TO_PAR, whole + 1
+    )
+
+
+def _tables(counts):
+    """Return the lookup tables of the index drawn for counts by value.
+
+    Args:
+      counts: players by holes by values array.
+    Returns:
+      players by holes by TABLE_SIZE array of value index.
+    """
+    cdf = counts.cumsum(axis=-1) / counts.sum(axis=-1, keepdims=True)
+    draws = (np.arange(TABLE_SIZE) + 0.5) / TABLE_SIZE
+    index = (cdf[..., np.newaxis, :] < draws[:, np.newaxis]).sum(axis=-1)
+    return np.minimum(index, counts.shape[-1] - 1)
+
+
+class ScoreDistribution:
+    """Chances of each gross and putts of the players of a round, by hole.
+
+    Args:
+      golf_round: Round, the players are in result order.
+      rows: (player_id, par, gross, putts, holes) of past scores, see
+        db_stats.score_counts().
+    """
+
+    def __init__(self, golf_round, rows):
+        par = np.array([hole.par for hole in golf_round.course.holes])
+        pars = sorted(set(par.tolist()))
+        player_rows = {
+            result.player_id: n for n, result in enumerate(golf_round.results)
+        }
+        shape = (len(golf_round.results), len(pars))
+        to_par = np.zeros(shape + (len(TO_PAR),))
+        putts = np.zeros(shape + (len(PUTTS),))
+        for row in rows:
+            n = player_rows.get(row.player_id)
+            if n is None or row.par not in pars:
+                continue
+            p = pars.index(row.par)
+            index = min(max(row.gross - row.par - TO_PAR[0], 0), len(TO_PAR) - 1)
+            to_par[n, p, index] += row.holes
+            if row.putts is not None:
+                putts[n, p, min(row.putts, len(PUTTS) - 1)] += row.holes
+        for n, result in enumerate(golf_round.results):
+            to_par[n] += PRIOR_HOLES * default_to_par(result.course_handicap)
+            putts[n] += PRIOR_HOLES * DEF_PUTTS
+        holes = [pars.index(hole_par) for hole_par in par.tolist()]
+        gross = par[:, np.newaxis] + TO_PAR[_tables(to_par[:, holes])]
+        self.gross_table = np.maximum(gross, 1).astype(np.int8)
+        self.putts_table = PUTTS[_tables(putts[:, holes])].astype(np.int8)
+
+    @classmethod
+    def load(cls, session, golf_round):
+        """Return the distribution of a round from the scores of its players."""
+        rows = db_stats.score_counts(
+            session, player_ids=[result.player_id for result in golf_round.results]
+        )
+        return cls(golf_round, rows)
+
+    def sample(self, matrix, trials=DEF_TRIALS, rng=None):
+        """Draw the scores of the holes left.
+
+        Args:
+          matrix: ScoreMatrix of the round, its scores are kept.
+          trials: number of times the holes are played.
+          rng: numpy Generator, a new one if None.
+        Returns:
+          Sample from matrix.holes_done().
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        start = matrix.holes_done()
+        players, holes = matrix.gross.shape
+        gross = np.empty((players, holes - start, trials), dtype=np.int8)
+        putts = np.empty_like(gross)
+        # each byte of the raw output of the generator is a draw
+        size = gross.size + putts.size
+        draws = rng.bit_generator.random_raw(-(-size // 8)).view(np.uint8)[:size]
+        draws = draws.reshape((2,) + gross.shape)
+        for values, table, table_draws in (
+            (gross, self.gross_table, draws[0]),
+            (putts, self.putts_table, draws[1]),
+        ):
+            for row in range(players):
+                for column in range(holes - start):
+                    np.take(
+                        table[row, start + column],
+                        table_draws[row, column],
+                        out=values[row, column],
+                    )
+        # holed from the green at the latest with the last stroke
+        np.minimum(putts, gross - 1, out=putts)
+        for row, column in zip(*matrix.played[:, start:].nonzero()):
+            gross[row, column] = matrix.gross[row, start + column]
+            putts[row, column] = matrix.putts[row, start + column]
+        return Sample(start, gross, putts, rng)
+
+
+def round_odds(session, golf_round, trials=DEF_TRIALS, seed=None):
+    """Return the odds of every game of a round, see SqlGolfGame.getOdds().
+
+    Args:
+      session: sqlalchemy session.
+      golf_round: Round with its games.
+      trials: number of times the holes left are played.
+      seed: seed of the draws, None for new draws each call.
+    Returns:
+      list of odds dictionaries in the order of golf_round.games, None for a
+      game without odds or that needs more information.
+    """
+    start = time.time()
+    distribution = ScoreDistribution.load(session, golf_round)
+    rng = np.random.default_rng(seed)
+    sample = None
+    lst_odds = []
+    for game in golf_round.games:
+        try:
+            game_instance = game.CreateGame()
+        except GolfGameException:
+            lst_odds.append(None)
+            continue
+        if sample is None:
+            # the games of a round share the score arrays
+            sample = distribution.sample(game_instance.matrix, trials, rng)
+        lst_odds.append(game_instance.getOdds(sample))
+    log.info(
+        "round_odds() - round {} {} games {} trials {:.3f} sec".format(
+            golf_round.round_id, len(lst_odds), trials, time.time() - start
+        )
+    )
+    return lst_odds
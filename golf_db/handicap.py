@@ -0,0 +1,56 @@
+"""handicap.py - USGA handicap index calculations."""
+import math
+
+# differentials kept for the index
+WINDOW_SIZE = 20
+# multiplier applied to the average of the best differentials
+BONUS_FOR_EXCELLENCE = 0.96
+# number of differentials available: number of best differentials used
+BEST_DIFFERENTIALS = {
+    5: 1,
+    6: 1,
+    7: 2,
+    8: 2,
+    9: 3,
+    10: 3,
+    11: 4,
+    12: 4,
+    13: 5,
+    14: 5,
+    15: 6,
+    16: 7,
+    17: 8,
+    18: 9,
+    19: 10,
+    20: 10,
+}
+
+
+def score_differential(adjusted_gross, rating, slope):
+    """Handicap differential = (ESC gross - course rating) * 113 / slope.
+
+    Args:
+      adjusted_gross: ESC adjusted gross score for 18 holes.
+      rating: course rating of the tee played.
+      slope: slope rating of the tee played.
+    Returns:
+      differential rounded to nearest tenth.
+    """
+    return round((adjusted_gross - rating) * 113 / slope, 1)
+
+
+def handicap_index(differentials):
+    """Calculate a handicap index from the most recent differentials.
+
+    Args:
+      differentials: list of differentials, at most WINDOW_SIZE are used.
+    Returns:
+      handicap index truncated to a tenth, None if less than 5 differentials.
+    """
+    differentials = list(differentials)[:WINDOW_SIZE]
+    count = BEST_DIFFERENTIALS.get(len(differentials))
+    if count is None:
+        return None
+    best = sorted(differentials)[:count]
+    index = sum(best) / count * BONUS_FOR_EXCELLENCE
+    return math.trunc(round(index * 10, 6)) / 10
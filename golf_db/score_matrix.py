@@ -0,0 +1,166 @@
+"""score_matrix.py - players by holes arrays of a round, used by the sql games.
+
+A ScoreMatrix holds the gross and putts of every player on every hole as int8
+arrays, with the par, stroke index and handicap bumps of the course. The
+games read a hole as one column and decide it with array operations, the
+cost of a hole hardly grows with the number of players.
+
+Holes not played have gross and putts 0, played tells them apart. Putts not
+recorded are 0.
+"""
+import numpy as np
+
+# net score relative to par looked up in stableford tables
+STABLEFORD_LOW = -3
+STABLEFORD_HIGH = 2
+
+
+class ScoreMatrix:
+    """Scores of a round.
+
+    Args:
+      course: Course of the round.
+      course_handicaps: course handicap of each player, in result order.
+    """
+
+    def __init__(self, course, course_handicaps):
+        self.course = course
+        self.course_handicaps = list(course_handicaps)
+        shape = (len(self.course_handicaps), len(course.holes))
+        self.gross = np.zeros(shape, dtype=np.int8)
+        self.putts = np.zeros(shape, dtype=np.int8)
+        self.played = np.zeros(shape, dtype=bool)
+        self.par = np.array([hole.par for hole in course.holes], dtype=np.int8)
+        self.stroke_index = np.array(
+            [hole.handicap for hole in course.holes], dtype=np.int8
+        )
+        self._bumps = {}
+
+    def load(self, golf_round):
+        """Replace the scores with the scores of the round, new arrays are set.
+
+        The arrays are kept on the round for its version, the other games of
+        the round use them without reading the scores again. Arrays are not
+        changed once loaded.
+        """
+        results = tuple(golf_round.results)
+        cached = golf_round._score_arrays
+        if (
+            cached is None
+            or golf_round.version is None
+            or cached[0] != golf_round.version
+            or cached[1] != results
+        ):
+            cached = (golf_round.version, results, self._read(results))
+            golf_round._score_arrays = cached
+        self.gross, self.putts, self.played = cached[2]
+
+    def _read(self, results):
+        num_holes = len(self.par)
+        gross = [[0] * num_holes for _ in results]
+        putts = [[0] * num_holes for _ in results]
+        played = [[False] * num_holes for _ in results]
+        for row, result in enumerate(results):
+            for score in result.scores:
+                index = score.num - 1
+                gross[row][index] = score.gross
+                putts[row][index] = score.putts or 0
+                played[row][index] = True
+        shape = self.gross.shape
+        return (
+            np.array(gross, dtype=np.int8).reshape(shape),
+            np.array(putts, dtype=np.int8).reshape(shape),
+            np.array(played, dtype=bool).reshape(shape),
+        )
+
+    def last_hole(self):
+        """Return the number of the last hole with a score, 0 if none."""
+        holes = self.played.any(axis=0).nonzero()[0]
+        return int(holes[-1]) + 1 if len(holes) else 0
+
+    def holes_done(self):
+        """Return the number of holes from the first that every player played."""
+        done = self.played.all(axis=0)
+        return len(done) if done.all() else int(done.argmin())
+
+    def bumps(self, min_handicap=0):
+        """Return the strokes of each player on each hole.
+
+        Args:
+          min_handicap: course handicap played as scratch, 0 for full net.
+        """
+        bumps = self._bumps.get(min_handicap)
+        if bumps is None:
+            bumps = np.array(
+                [
+                    self.course.calcBumps(handicap - min_handicap)
+                    for handicap in self.course_handicaps
+                ],
+                dtype=np.int8,
+            ).reshape(self.gross.shape)
+            self._bumps[min_handicap] = bumps
+        return bumps
+
+    def all_played(self, index):
+        """True if every player has a score on a hole."""
+        return bool(self.played[:, index].all())
+
+    def net(self, index, bumps):
+        """Return the net score of each player on a hole."""
+        return self.gross[:, index] - bumps[:, index]
+
+    def to_par(self, index, bumps):
+        """Return the net score relative to par of each player on a hole."""
+        return self.net(index, bumps) - self.par[index]
+
+    def stableford(self, index, bumps, table):
+        """Return the stableford points of each player on a hole.
+
+        Args:
+          table: dictionary of net score to par (-3 to 2) to points, scores
+            below or above use the points of -3 or 2.
+        """
+        points = np.array(
+            [table[n] for n in range(STABLEFORD_LOW, STABLEFORD_HIGH + 1)]
+        )
+        to_par = np.clip(self.to_par(index, bumps), STABLEFORD_LOW, STABLEFORD_HIGH)
+        return points[to_par - STABLEFORD_LOW]
+
+    def totals(self, values):
+        """Return out, in and total sums of players by holes values.
+
+        values can have more leading dimensions, the values of holes not
+        played are not added.
+        """
+        values = np.where(self.played, values, 0).astype(np.int32)
+        out_tot = values[..., :9].sum(axis=-1)
+        in_tot = values[..., 9:].sum(axis=-1)
+        return out_tot, in_tot, out_tot + in_tot
+
+
+def low(values):
+    """Return the lowest of values and how many players have it."""
+    lowest = values.min()
+    return int(lowest), int((values == lowest).sum())
+
+
+def ranks(values):
+    """Return the rank of each value, the number of values lower, and ties.
+
+    Ties is the number of players with the same value, the player included.
+    """
+    lower = (values[np.newaxis, :] < values[:, np.newaxis]).sum(axis=1)
+    ties = (values[np.newaxis, :] == values[:, np.newaxis]).sum(axis=1)
+    return lower, ties
+
+
+def settle(points):
+    """Return the winnings of players by trials points.
+
+    Each point a player wins is paid evenly by the other players, the
+    winnings of a trial add up to 0.
+    """
+    if len(points) < 2:
+        return np.zeros(points.shape)
+    others = points.sum(axis=0) - points
+    return points - others / (len(points) - 1)
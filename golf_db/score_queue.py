@@ -0,0 +1,216 @@
+"""score_queue.py - write-behind queue of hole scores.
+
+put() appends a ScoreRecord to a journal file and to memory and returns at
+once. A background thread writes the queued records with ingest_scores() in
+batches, when batch_size records are queued or interval seconds passed.
+
+Journal - one JSON object per line.
+  {"seq": <n>, "round_id": ..., "hole": ..., "gross": [...], "putts": [...],
+   "options": {...}}  - a queued record.
+  {"flushed": <n>}  - records up to seq n are in the database.
+The journal is emptied when the queue is empty. Records not flushed when the
+process stopped are queued again by the next ScoreQueue on the same journal.
+Scores are upserted, so writing a record twice after a crash is harmless.
+
+A write conflict or an unavailable database keeps the records queued, they
+are written again after interval seconds. Any other failure is a bad record,
+it is moved to errors so it does not hold up the records after it.
+"""
+import json
+import os
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from .db_ingest import ScoreRecord, ingest_scores
+from .exceptions import GolfDBConflict, GolfDBException
+from util.tl_logger import TLLog
+
+log = TLLog.getLogger("queue")
+
+DEF_BATCH_SIZE = 100
+DEF_INTERVAL = 0.5
+
+
+class ScoreQueue:
+    """Write-behind queue of hole scores for a database.
+
+    Args:
+      db: Database the scores are written to.
+      journal: path of the journal file.
+      batch_size: records written per transaction, a full batch is written
+        without waiting for the interval.
+      interval: seconds a record waits before it is written.
+      sync: fsync the journal on every put(), survives power loss but put()
+        waits for the storage.
+    """
+
+    def __init__(
+        self, db, journal, batch_size=DEF_BATCH_SIZE, interval=DEF_INTERVAL, sync=False,
+    ):
+        self.db = db
+        self.journal = journal
+        self.batch_size = batch_size
+        self.interval = interval
+        self.sync = sync
+        # round_id: list of GolfGameException from the last write of the round
+        self.info_needed = {}
+        # (ScoreRecord, error message) of records that could not be written
+        self.errors = []
+        self._pending = []
+        self._seq = 0
+        self._closed = False
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._recover()
+        self._fp = open(self.journal, "a")
+        self._thread = threading.Thread(
+            target=self._run, name="score-queue", daemon=True
+        )
+        self._thread.start()
+
+    def _recover(self):
+        """Queue the journal records not flushed by an earlier process."""
+        if not os.path.exists(self.journal):
+            return
+        records = {}
+        with open(self.journal) as fp:
+            for line in fp:
+                try:
+                    dct = json.loads(line)
+                except ValueError:
+                    # last line cut short by a crash, never acknowledged
+                    continue
+                if "flushed" in dct:
+                    for seq in [seq for seq in records if seq <= dct["flushed"]]:
+                        del records[seq]
+                    continue
+                seq = dct.pop("seq")
+                records[seq] = ScoreRecord(**dct)
+                self._seq = max(self._seq, seq)
+        self._pending = sorted(records.items())
+        if self._pending:
+            log.info(
+                "_recover() - {} records from {}".format(
+                    len(self._pending), self.journal
+                )
+            )
+
+    def __len__(self):
+        """Number of records not written to the database."""
+        with self._cond:
+            return len(self._pending)
+
+    def put(self, record):
+        """Queue a ScoreRecord.
+
+        Returns:
+          sequence number of the record, written to the journal.
+        Raises:
+          GolfDBException - the queue is closed.
+        """
+        with self._cond:
+            if self._closed:
+                raise GolfDBException("score queue is closed")
+            self._seq += 1
+            dct = dict(record._asdict(), seq=self._seq)
+            self._fp.write(json.dumps(dct) + "\n")
+            self._fp.flush()
+            if self.sync:
+                os.fsync(self._fp.fileno())
+            self._pending.append((self._seq, record))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+            return self._seq
+
+    def flush(self):
+        """Write all queued records now and wait until they are written.
+
+        Returns early when the database cannot be written, len() is the
+        number of records still queued.
+        """
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending and self._flush_requested and self._thread.is_alive():
+                self._cond.wait()
+
+    def close(self):
+        """Write all queued records and stop the background thread.
+
+        Records that cannot be written stay in the journal, the next
+        ScoreQueue on the journal writes them.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._fp.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if (
+                    len(self._pending) < self.batch_size
+                    and not self._closed
+                    and not self._flush_requested
+                ):
+                    self._cond.wait(self.interval)
+                batch = self._pending[: self.batch_size]
+                if not batch:
+                    self._flush_requested = False
+                    if self._closed:
+                        break
+                    continue
+            try:
+                dct_info_needed = self._write([record for _, record in batch])
+            except (GolfDBConflict, OperationalError) as ex:
+                # conflict or database not available, the records stay queued
+                log.info("_run() - {} records not written - {}".format(len(batch), ex))
+                with self._cond:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        break
+                time.sleep(self.interval)
+                continue
+            with self._cond:
+                del self._pending[: len(batch)]
+                for round_id in set([record.round_id for _, record in batch]):
+                    self.info_needed[round_id] = dct_info_needed.get(round_id, [])
+                if self._pending:
+                    self._fp.write(json.dumps({"flushed": batch[-1][0]}) + "\n")
+                else:
+                    self._fp.seek(0)
+                    self._fp.truncate()
+                self._fp.flush()
+                self._cond.notify_all()
+        # session of this thread
+        self.db.close()
+
+    def _write(self, records):
+        """Ingest a batch, a bad record only drops itself.
+
+        Returns:
+          dictionary of round_id: list of GolfGameException.
+        Raises:
+          GolfDBConflict, OperationalError - nothing written, try again later.
+        """
+        try:
+            return self.db.retry_unit_of_work(
+                lambda session: ingest_scores(session, records)
+            )
+        except (GolfDBConflict, OperationalError):
+            raise
+        except Exception as ex:
+            if len(records) == 1:
+                log.info("_write() - dropped {} - {}".format(records[0], ex))
+                self.errors.append((records[0], str(ex)))
+                return {}
+        dct_info_needed = {}
+        for record in records:
+            dct_info_needed.update(self._write([record]))
+        return dct_info_needed
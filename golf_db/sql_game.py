@@ -3,6 +3,7 @@ import ast
 from abc import ABC, abstractmethod
 from .exceptions import GolfException
 from .score import GolfScore
+from .score_matrix import ScoreMatrix
 from util.proto import Proto
 from util.tl_logger import TLLog
 
@@ -24,18 +25,32 @@ class SqlGolfGame(ABC):
     #    },
     game_options = {}
 
+    # attributes of the game and of each player changed by apply_hole()
+    game_state = ()
+    player_state = ()
+
     def __init__(self, game, golf_round, **kwargs):
         self.game = game
         self.golf_round = golf_round
         self.dctScorecard = {"course": self.golf_round.course.getScorecard()}
         self.dctLeaderboard = {}
         self.dctStatus = {}
+        # scores read by the last update(), a column for each hole
+        self.matrix = ScoreMatrix(
+            golf_round.course, [result.course_handicap for result in golf_round.results]
+        )
         # set game options
         self.load_game_options(**kwargs)
         # setup and validate
         # self.print_options()
         self.setup(**kwargs)
         self.validate()
+        self._state = [
+            (obj, attr) for obj, attrs in self._state_objects() for attr in attrs
+        ]
+        # game data of applied holes and the state after each, [0] before hole 1
+        self._applied = []
+        self._checkpoints = [self._save_state()]
 
     def validate(self):
         """Overload to validate a game setup."""
@@ -97,11 +112,115 @@ class SqlGolfGame(ABC):
         """Overload to add custom initialization from __init__()."""
         pass
 
-    @abstractmethod
     def update(self):
-        """Overload to update the game."""
+        """Update the game with all scores so far.
+
+        Holes are applied one at a time from the first hole with new or
+        changed scores or game data, the holes before it are restored from a
+        checkpoint. Calling update() again without changes gives the same
+        results.
+        """
+        matrix = self.matrix
+        applied = (matrix.gross, matrix.putts, matrix.played)
+        matrix.load(self.golf_round)
+        last_hole = matrix.last_hole()
+        game_data = [self.game._game_data.get(n) for n in range(1, last_hole + 1)]
+        changed = (
+            (matrix.gross != applied[0])
+            | (matrix.putts != applied[1])
+            | (matrix.played != applied[2])
+        ).any(axis=0)
+        start = 0
+        for index, data in enumerate(self._applied[:last_hole]):
+            if changed[index] or data != game_data[index]:
+                break
+            start += 1
+        del self._applied[start:]
+        del self._checkpoints[start + 1 :]
+        self._restore_state(self._checkpoints[start])
+        for hole_num in range(start + 1, last_hole + 1):
+            self.apply_hole(hole_num)
+            self._applied.append(game_data[hole_num - 1])
+            self._checkpoints.append(self._save_state())
+        self.update_status()
+
+    def rebind(self, game, golf_round):
+        """Use a game and round loaded again, the players must be the same."""
+        self.game = game
+        self.golf_round = golf_round
+        self.matrix.course = golf_round.course
+        # par totals of the course loaded again
+        golf_round.course.setStats()
+        for pl, result in zip(self._players, golf_round.results):
+            pl.result = result
+            pl.player = result.player
+
+    def replay(self, hole_num):
+        """Apply hole_num and the holes after it again."""
+        del self._applied[hole_num - 1 :]
+        del self._checkpoints[hole_num:]
+        self.update()
+
+    def recompute(self):
+        """Apply all holes from the first, the reference for update()."""
+        self.replay(1)
+
+    @abstractmethod
+    def apply_hole(self, hole_num):
+        """Overload to advance the game by one hole.
+
+        The scores of the hole are in column hole_num - 1 of self.matrix.
+
+        Args:
+          hole_num: 1 for the first hole, holes are applied in order.
+        """
+        pass
+
+    def update_status(self):
+        """Overload to update the game after the holes are applied."""
         pass
 
+    def scored(self, index, *columns):
+        """Return (player, values...) of each player with a score on a hole.
+
+        Args:
+          index: hole index.
+          columns: matrix columns of the hole, a value for each player.
+        """
+        played = self.matrix.played[:, index].tolist()
+        rows = zip(self._players, *[column.tolist() for column in columns])
+        return [row for row, has_score in zip(rows, played) if has_score]
+
+    def simulate(self, sample):
+        """Overload to score the trials of a sample with the rules of the game.
+
+        The game goes on from its state after sample.start holes, see
+        state_after().
+
+        Args:
+          sample: game_odds.Sample, holes from sample.start.
+        Returns:
+          players by trials array of winnings, None if the game has no odds.
+        """
+        return None
+
+    def state_after(self, holes, obj, attr):
+        """Return a state attribute of obj as it was after the first holes."""
+        return self._checkpoints[holes][self._state.index((obj, attr))]
+
+    def _state_objects(self):
+        """Return list of (object, attribute names) saved in a checkpoint."""
+        return [(self, self.game_state)] + [
+            (pl, self.player_state) for pl in self._players
+        ]
+
+    def _save_state(self):
+        return [_copy_state(getattr(obj, attr)) for obj, attr in self._state]
+
+    def _restore_state(self, state):
+        for (obj, attr), value in zip(self._state, state):
+            setattr(obj, attr, _copy_state(value))
+
     @abstractmethod
     def getScorecard(self, **kwargs):
         """Return scorecard dictionary for this game."""
@@ -121,6 +240,53 @@ class SqlGolfGame(ABC):
         """Return simple status for state of game."""
         pass
 
+    def getOdds(self, sample, **kwargs):
+        """Return the chances of each player to win the game.
+
+        Args:
+          sample: game_odds.Sample of the round.
+        Returns:
+          dictionary with game, trials, line and players, a list of
+          {player, win, expected}. win is the chance to end with winnings
+          above 0, expected the mean winnings in points of the game. None if
+          the game has no odds.
+        """
+        winnings = self.simulate(sample)
+        if winnings is None:
+            return None
+        players = [
+            {"player": pl.player, "win": float(win), "expected": float(expected)}
+            for pl, win, expected in zip(
+                self._players, (winnings > 0).mean(axis=1), winnings.mean(axis=1)
+            )
+        ]
+        line = " ".join(
+            "{} {:.0%} {:+.2f}".format(
+                dct["player"].nick_name, dct["win"], dct["expected"]
+            )
+            for dct in players
+        )
+        return {
+            "game": self,
+            "trials": winnings.shape[1],
+            "players": players,
+            "line": line,
+        }
+
+
+def _copy_state(value):
+    """Copy a state value, a list, a dictionary of lists or a plain value.
+
+    The items of lists are not copied, players and numbers are shared.
+    """
+    if type(value) is dict:
+        return {
+            key: item[:] if type(item) is list else item for key, item in value.items()
+        }
+    if type(value) is list:
+        return value[:]
+    return value
+
 
 class GamePlayer(object):
     def __init__(self, game, result):
@@ -153,6 +319,13 @@ class GamePlayer(object):
         dct["in"] = sum([sc for sc in dct["holes"][9:] if sc is not None])
         dct["total"] = dct["in"] + dct["out"] + dct.get("overall", 0)
 
+    def set_hole(self, dct, index, value):
+        """Set a hole in a scoring dictionary and add the change to the totals."""
+        change = (value or 0) - (dct["holes"][index] or 0)
+        dct["holes"][index] = value
+        dct["out" if index < 9 else "in"] += change
+        dct["total"] += change
+
     def calc_bumps(self, min_handicap):
         return self.game.golf_round.course.calcBumps(
             self.result.course_handicap - min_handicap
@@ -1,4 +1,5 @@
 """game_best_ball.py - Best Ball Golf Game class."""
+import numpy as np
 from .sql_game_net import SqlGameNet, NetPlayer
 from .sql_game import SqlGolfTeam
 
@@ -7,6 +8,8 @@ class SqlBestBallTeam(SqlGolfTeam):
     def setup(self, min_handicap=None):
         """Setup holes and scores for match play."""
         self.course = self.game.golf_round.course
+        # rows of the players in the score matrix
+        self._rows = [self.game._players.index(pl) for pl in self.players]
         self._net = [None for _ in range(len(self.course.holes))]
         self._hole = [None for _ in range(len(self.course.holes))]
         self._score = [None for _ in range(len(self.course.holes))]
@@ -26,8 +29,8 @@ class SqlBestBallTeam(SqlGolfTeam):
             print("  {:<10}: {}".format(pl.player.nick_name, pl.dct_net["holes"]))
 
     def calculate_score(self, index):
-        # net scores have already set.
-        self._net[index] = min([pl.dct_net["holes"][index] for pl in self.players])
+        nets = self.game.matrix.net(index, self.game.bumps)
+        self._net[index] = int(nets[self._rows].min())
 
     def update_points(self, index, other_team):
         if self._net[index] < other_team._net[index]:
@@ -132,6 +135,7 @@ Four-Person Best Two Balls	 	 90%	 95%
             "desc": "Set teams for best ball match.",
         }
     }
+    team_state = ("_net", "_hole", "_score", "_in", "_out", "_total", "_win", "_status")
 
     def validate(self):
         if len(self._players) != 4:
@@ -154,6 +158,11 @@ Four-Person Best Two Balls	 	 90%	 95%
     def final(self):
         return self.winner or self.to_play == 0
 
+    def _state_objects(self):
+        return super(SqlGameBestBall, self)._state_objects() + [
+            (team, self.team_state) for team in self.team_list
+        ]
+
     def setup(self, **kwargs):
         """Start the match game."""
         self.use_full_net = True
@@ -166,6 +175,7 @@ Four-Person Best Two Balls	 	 90%	 95%
         self._players = [
             NetPlayer(self, result, 0) for result in self.golf_round.results
         ]
+        self.bumps = self.matrix.bumps(0)
         # create teams
         self.team_list = [
             SqlBestBallTeam(self, [self._players[i1], self._players[i2]])
@@ -178,24 +188,41 @@ Four-Person Best Two Balls	 	 90%	 95%
         self.dctScorecard["header"] = "{0:*^98}".format(" BestBall - Match Play")
         self.dctLeaderboard["hdr"] = "Pos Name   Points Thru"
 
-    def update(self):
+    def apply_hole(self, hole_num):
         # call base class to update net scores
-        super(SqlGameBestBall, self).update()
+        super(SqlGameBestBall, self).apply_hole(hole_num)
         # now do team updates
+        index = hole_num - 1
+        if not self.matrix.all_played(index):
+            # the hole is decided when all players have a score
+            return
+        for team in self.team_list:
+            # print net scores
+            # team.print_net_scores()
+            team.calculate_score(index)
+        self.team_list[0].update_points(index, self.team_list[1])
+        self.team_list[1].update_points(index, self.team_list[0])
+
+    def update_status(self):
         self.thru = self.golf_round.get_completed_holes()
         self.to_play = len(self.golf_round.course.holes) - self.thru
-        for index in range(self.thru):
-            for team in self.team_list:
-                # print net scores
-                # team.print_net_scores()
-                team.calculate_score(index)
-            self.team_list[0].update_points(index, self.team_list[1])
-            self.team_list[1].update_points(index, self.team_list[0])
+        self.winner = None
         # update match status
         for team in self.team_list:
             if team.update_status(self.to_play):
                 self.winner = team
 
+    def simulate(self, sample):
+        """Match of each trial, the players win or lose with their team."""
+        total = self.state_after(sample.start, self.team_list[0], "_total")
+        nets = sample.gross - self.bumps[:, sample.start :, np.newaxis]
+        first, second = [nets[team._rows].min(axis=0) for team in self.team_list]
+        result = np.sign(total + np.sign(second - first).sum(axis=0))
+        winnings = np.zeros((len(self._players), len(result)))
+        for team, sign in zip(self.team_list, (1, -1)):
+            winnings[team._rows] = sign * result
+        return winnings
+
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
         self.dctScorecard["players"] = [
@@ -44,6 +44,8 @@ Options:
         },
         "wager": {"default": 0, "type": "float", "desc": "Wager per hole."},
     }
+    game_state = ("_carry",)
+    player_state = ("dct_points", "dct_money")
 
     def setup(self, **kwargs):
         """setup the game."""
@@ -70,75 +72,64 @@ Options:
             " " + self.short_description + " "
         )
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        # print('holes:{}'.format(self._holes))
-        dct_greens = {hole_num: None for hole_num in self._holes}
-        for pl, result in zip(self._players, self.golf_round.results):
-            for n, score in enumerate(result.scores):
-                n = score.num
-                if n in self._holes:
-                    if dct_greens[n] is None:
-                        dct_greens[n] = []
-                    par = self.golf_round.course.holes[n - 1].par
-                    if score.gross - score.putts == par - 2:
-                        dct_greens[n].append((pl, score))
+    def apply_hole(self, hole_num):
+        """Update the greenie of a hole."""
+        if hole_num not in self._holes:
+            return
+        index = hole_num - 1
+        par = self.golf_round.course.holes[index].par
+        # par 4 and 5 only valid if there is a carry
+        if par > 3 and self._carry == 0:
+            return
+        # on the green in regulation
+        lst_winners = [
+            (pl, gross, putts)
+            for pl, gross, putts in self.scored(
+                index, self.matrix.gross[:, index], self.matrix.putts[:, index]
+            )
+            if gross - putts == par - 2
+        ]
+        if len(lst_winners) > 1:
+            if hole_num in self.game._game_data and self.game._game_data[hole_num].get(
+                "qualified"
+            ):
+                qualified = self.game._game_data[hole_num]["qualified"]
+                lst_winners = [
+                    w for w in lst_winners if str(w[0].player.nick_name) == qualified
+                ]
+            else:
+                dct = {
+                    "hole_num": hole_num,
+                    "players": [w[0].player for w in lst_winners],
+                    "key": "qualified",
+                    "msg": "Which player was closest to the pin on hole {}?".format(
+                        hole_num
+                    ),
+                    "game": self,
+                }
+                raise GolfGameException(dct)
+        if len(lst_winners) == 1:
+            winner, gross, putts = lst_winners[0]
+            # validate winner had 2 putts or less
+            if putts < 3:
+                # only get points on par 3
+                value = 1 if par == 3 else 0
+                points = value + self._carry
+                self._carry = 0
+                if self.double_birdie and gross < par:
+                    # birdie or better
+                    points *= 2
+                winner.set_hole(winner.dct_points, index, points)
+                if self.wager:
+                    winner.dct_money["holes"][index] = points * len(self._players)
+            else:
+                lst_winners = []
+        if not lst_winners:
+            if self.carry_over and par == 3:
+                self._carry += 1
 
+    def update_status(self):
         self.thru = self.golf_round.get_completed_holes()
-        hole_nums = sorted(dct_greens.keys())
-        for index in range(self.thru):
-            hole_num = index + 1
-            if hole_num in dct_greens:
-                lst_winners = dct_greens[hole_num]
-                par = self.golf_round.course.holes[index].par
-                # print('hole_num:{} par:{} lst_winners:{}'.format(hole_num, par, lst_winners))
-                # par 4 and 5 only valid if there is a carry
-                if par > 3 and self._carry == 0:
-                    break
-                if len(lst_winners) > 1:
-                    if hole_num in self.game._game_data and self.game._game_data[
-                        hole_num
-                    ].get("qualified"):
-                        qualified = self.game._game_data[hole_num]["qualified"]
-                        lst_winners = [
-                            w
-                            for w in lst_winners
-                            if str(w[0].player.nick_name) == qualified
-                        ]
-                    else:
-                        dct = {
-                            "hole_num": hole_num,
-                            "players": [w[0].player for w in lst_winners],
-                            "key": "qualified",
-                            "msg": "Which player was closest to the pin on hole {}?".format(
-                                hole_num
-                            ),
-                            "game": self,
-                        }
-                        raise GolfGameException(dct)
-                if len(lst_winners) == 1:
-                    winner, score = lst_winners[0]
-                    # validate winner had 2 putts or less
-                    if score.putts < 3:
-                        # only get points on par 3
-                        value = 1 if par == 3 else 0
-                        winner.dct_points["holes"][index] = value + self._carry
-                        self._carry = 0
-                        if self.double_birdie and self.gross < par:
-                            # birdie or better
-                            winner.dct_points["holes"][index] *= 2
-                        if self.wager:
-                            winner.dct_money["holes"][index] = winner.dct_points[
-                                "holes"
-                            ][index] * len(self._players)
-                    else:
-                        lst_winners = []
-                if not lst_winners:
-                    if self.carry_over and par == 3:
-                        self._carry += 1
-        for pl in self._players:
-            pl.update_totals(pl.dct_points)
-            # pl.update_totals(pl.dct_money)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
@@ -16,6 +16,7 @@ class SqlGameGross(SqlGolfGame):
     description = """
 Basic golf game, the players simply add up their scores and compare. You score 97. I score 96. I win.
 """
+    player_state = ("dct_gross", "esc")
 
     def setup(self, **kwargs):
         """Start the game."""
@@ -28,18 +29,14 @@ Basic golf game, the players simply add up their scores and compare. You score 9
         self.dctScorecard["header"] = "{0:*^98}".format(" Gross ")
         self.dctLeaderboard["hdr"] = "Pos Name   Gross Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        for pl, result in zip(self._players, self.golf_round.results):
-            pl.esc = 0
-            for score in result.scores:
-                # update gross
-                n = score.num - 1
-                pl.dct_gross["holes"][n] = score.gross
-                pl.esc += self.golf_round.course.calcESC(
-                    n, score.gross, result.course_handicap
-                )
-            pl.update_totals(pl.dct_gross)
+    def apply_hole(self, hole_num):
+        """Update gross results of a hole."""
+        n = hole_num - 1
+        for pl, gross in self.scored(n, self.matrix.gross[:, n]):
+            pl.set_hole(pl.dct_gross, n, gross)
+            pl.esc += self.golf_round.course.calcESC(
+                n, gross, pl.result.course_handicap
+            )
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
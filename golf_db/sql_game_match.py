@@ -1,6 +1,8 @@
 """ game_match.py - GolfGame class."""
+import numpy as np
 from .sql_game_net import SqlGameNet, NetPlayer
 from .exceptions import GolfException
+from .score_matrix import low
 
 
 class MatchPlayer(NetPlayer):
@@ -60,6 +62,7 @@ Once we are finished the golfer with the most points wins.
 
 Handicaps are used in match play.
 """
+    player_state = SqlGameNet.player_state + ("dct_score", "status", "win")
 
     def validate(self):
         if len(self._players) != 2:
@@ -80,25 +83,37 @@ Handicaps are used in match play.
         self.thru = 0
         self.dctScorecard["header"] = "{0:*^98}".format(" Match ")
 
-    def update(self):
-        """Start the match game."""
-        super(SqlGameMatch, self).update()
+    def apply_hole(self, hole_num):
+        """Update net scores and the match of a hole."""
+        super(SqlGameMatch, self).apply_hole(hole_num)
+        index = hole_num - 1
+        if not self.matrix.all_played(index):
+            return
+        nets = self.matrix.net(index, self.bumps)
+        lowest, count = low(nets)
+        winner = int(nets.argmin()) if count == 1 else None
+        for n, pl in enumerate(self._players):
+            if winner is None:
+                # a tie
+                pl.update_score(index, 0)
+            else:
+                pl.update_score(index, 1 if n == winner else -1)
+
+    def update_status(self):
         self.thru = self.golf_round.get_completed_holes()
         self.to_play = len(self.golf_round.course.holes) - self.thru
-        for index in range(self.thru):
-            players = sorted(self._players, key=lambda pl: pl.dct_net["holes"][index])
-            if players[0].dct_net["holes"][index] < players[1].dct_net["holes"][index]:
-                # we have a winner
-                players[0].update_score(index, 1)
-                players[1].update_score(index, -1)
-            else:
-                # a tie
-                players[0].update_score(index, 0)
-                players[1].update_score(index, 0)
+        self.winner = None
         for pl in self._players:
             if pl.update_status(self.to_play):
                 self.winner = pl
 
+    def simulate(self, sample):
+        """Match of each trial, 1 to the winner and -1 to the loser."""
+        total = self.state_after(sample.start, self._players[0], "dct_score")["total"]
+        nets = sample.gross - self.bumps[:, sample.start :, np.newaxis]
+        total = total + np.sign(nets[1] - nets[0]).sum(axis=0)
+        return np.stack([np.sign(total), -np.sign(total)])
+
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
         lstPlayers = []
@@ -28,6 +28,7 @@ The bumps will be added to the lowest handicap holes on the course being played.
             "desc": "Use full net instead of relative to lowest handicap.",
         }
     }
+    player_state = ("dct_net",)
 
     def setup(self, **kwargs):
         """Start the game."""
@@ -44,18 +45,16 @@ The bumps will be added to the lowest handicap holes on the course being played.
             player_class(self, result, min_handicap)
             for result in self.golf_round.results
         ]
+        self.bumps = self.matrix.bumps(min_handicap)
         # add header to scorecard
         self.dctScorecard["header"] = "{0:*^98}".format(" Net ")
         self.dctLeaderboard["hdr"] = "Pos Name     Net Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        for pl, result in zip(self._players, self.golf_round.results):
-            for score in result.scores:
-                n = score.num - 1
-                # update net
-                pl.dct_net["holes"][n] = score.gross - pl._bumps[n]
-            pl.update_totals(pl.dct_net)
+    def apply_hole(self, hole_num):
+        """Update net scores of a hole."""
+        n = hole_num - 1
+        for pl, net in self.scored(n, self.matrix.net(n, self.bumps)):
+            pl.set_hole(pl.dct_net, n, net)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
@@ -15,6 +15,7 @@ class SqlGamePutts(SqlGolfGame):
     description = """
 Who has the fewest putts in the round. Must be on the green to be a putt.
 """
+    player_state = ("dct_putts",)
 
     def setup(self, **kwargs):
         """Start the game."""
@@ -26,14 +27,11 @@ Who has the fewest putts in the round. Must be on the green to be a putt.
         self.dctScorecard["header"] = "{0:*^98}".format(" Putts ")
         self.dctLeaderboard["hdr"] = "Pos Name   Putts Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        for pl, result in zip(self._players, self.golf_round.results):
-            for score in result.scores:
-                # update gross
-                n = score.num - 1
-                pl.dct_putts["holes"][n] = score.putts
-            pl.update_totals(pl.dct_putts)
+    def apply_hole(self, hole_num):
+        """Update putts of a hole."""
+        n = hole_num - 1
+        for pl, putts in self.scored(n, self.matrix.putts[:, n]):
+            pl.set_hole(pl.dct_putts, n, putts)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
@@ -27,31 +27,32 @@ class SqlGameRewards(SqlGameGross):
     description = """
 Which ever player gets the most natural birdies and pars wins. If there are no birdies then pars win entire wager.
 """
+    player_state = SqlGameGross.player_state + ("dct_rewards",)
 
     def setup(self, **kwargs):
         """Start the game."""
         kwargs["player_class"] = RewardsPlayer
         super(SqlGameRewards, self).setup(**kwargs)
-        self.pars = [hole.par for hole in self.golf_round.course.holes]
         self.thru = 0
         # add header to scorecard
         self.dctScorecard["course"] = self.golf_round.course.getScorecard()
         self.dctScorecard["header"] = "{0:*^98}".format(" Rewards ")
         self.dctLeaderboard["hdr"] = "Pos Name  Rewards Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        super(SqlGameRewards, self).update()
+    def apply_hole(self, hole_num):
+        """Update birdies and pars of a hole."""
+        super(SqlGameRewards, self).apply_hole(hole_num)
+        n = hole_num - 1
+        to_par = self.matrix.gross[:, n] - self.matrix.par[n]
+        for pl, diff in self.scored(n, to_par):
+            if diff <= -1:
+                pl.dct_rewards["holes"][n] = "B"
+            elif diff == 0:
+                pl.dct_rewards["holes"][n] = "P"
+
+    def update_status(self):
         self.thru = self.golf_round.get_completed_holes()
-        for pl, result in zip(self._players, self.golf_round.results):
-            for score in result.scores:
-                n = score.num - 1
-                # update birdies and pars
-                gross = pl.dct_gross["holes"][n]
-                if gross <= self.pars[n] - 1:
-                    pl.dct_rewards["holes"][n] = "B"
-                elif gross == self.pars[n]:
-                    pl.dct_rewards["holes"][n] = "P"
+        for pl in self._players:
             pl.update_rewards()
 
     def getScorecard(self, **kwargs):
@@ -1,6 +1,7 @@
 """ game.py - GolfGame class."""
 from .sql_game_net import SqlGameNet, NetPlayer
 from .exceptions import GolfException
+from .score_matrix import ranks
 
 
 class SixPointPlayer(NetPlayer):
@@ -36,6 +37,7 @@ At the end of the match, all the points are totaled, with the low-point-total pl
     POINTS_3RD = 0
     TITLE = "Six Point"
     NAME = "six_point"
+    player_state = SqlGameNet.player_state + ("dct_points",)
 
     def validate(self):
         if len(self._players) != 3:
@@ -54,34 +56,33 @@ At the end of the match, all the points are totaled, with the low-point-total pl
             SixPointPlayer(self, result, min_handicap)
             for result in self.golf_round.results
         ]
+        self.bumps = self.matrix.bumps(min_handicap)
+        # (players with a lower net, players with the same net): points
+        self._points = {
+            (0, 3): self.POINTS_ALL_TIE,
+            (0, 2): self.POINTS_TIE_1ST,
+            (0, 1): self.POINTS_WIN_1ST,
+            (1, 2): self.POINTS_TIE_2ND,
+            (1, 1): self.POINTS_WIN_2ND,
+            (2, 1): self.POINTS_3RD,
+        }
         self.dctScorecard["header"] = "{0:*^98}".format(" {} ".format(self.TITLE))
         self.dctLeaderboard["hdr"] = "Pos Name  Points Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
+    def apply_hole(self, hole_num):
+        """Update net scores and points of a hole."""
         # call base class to update net scores
-        super(SqlGameSixPoint, self).update()
+        super(SqlGameSixPoint, self).apply_hole(hole_num)
         # now do score updates
+        index = hole_num - 1
+        if not self.matrix.all_played(index):
+            return
+        lower, ties = ranks(self.matrix.net(index, self.bumps))
+        for pl, rank in zip(self._players, zip(lower.tolist(), ties.tolist())):
+            pl.set_hole(pl.dct_points, index, self._points[rank])
+
+    def update_status(self):
         self.thru = self.golf_round.get_completed_holes()
-        for index in range(self.thru):
-            players = sorted(self._players, key=lambda pl: pl.dct_net["holes"][index])
-            scores = [pl.dct_net["holes"][index] for pl in players]
-            if scores.count(scores[0]) == 3:
-                # 1,1,1
-                points = 3 * [self.POINTS_ALL_TIE]
-            elif scores.count(scores[0]) == 2:
-                # 1,1,2
-                points = [self.POINTS_TIE_1ST, self.POINTS_TIE_1ST, self.POINTS_3RD]
-            elif scores.count(scores[1]) == 2:
-                # 1,2,2
-                points = [self.POINTS_WIN_1ST, self.POINTS_TIE_2ND, self.POINTS_TIE_2ND]
-            else:
-                # 1,2,3
-                points = [self.POINTS_WIN_1ST, self.POINTS_WIN_2ND, self.POINTS_3RD]
-            for pl, point in zip(players, points):
-                pl.dct_points["holes"][index] = point
-        for pl in self._players:
-            pl.update_totals(pl.dct_points)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
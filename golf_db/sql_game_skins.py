@@ -1,6 +1,8 @@
 """ game.py - GolfGame class."""
 from operator import itemgetter
+import numpy as np
 from .sql_game import SqlGolfGame, GamePlayer
+from .score_matrix import low, settle
 
 
 class SkinsPlayer(GamePlayer):
@@ -39,6 +41,8 @@ In both cases the other players each lose a skin.
             "desc": "If use_carryover is set then skins not won will carry to the next hole",
         }
     }
+    game_state = ("carryover",)
+    player_state = ("dct_nets", "dct_skins")
 
     def setup(self, **kwargs):
         """Start the skins game."""
@@ -50,32 +54,52 @@ In both cases the other players each lose a skin.
             SkinsPlayer(self, result, min_handicap)
             for result in self.golf_round.results
         ]
+        self.bumps = self.matrix.bumps(min_handicap)
         # skins carryover set to 1
         self.carryover = 1
         self.dctScorecard["header"] = "{0:*^98}".format(" Skins ")
         self.dctLeaderboard["hdr"] = "Pos Name   Skins Thru"
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        for pl, result in zip(self._players, self.golf_round.results):
-            # calculate net
-            for score in result.scores:
-                n = score.num - 1
-                pl.dct_nets["holes"][n] = score.gross - pl._bumps[n]
-        for n in range(len(self.golf_round.course.holes)):
-            if pl.dct_nets["holes"][n] == None:
-                continue
-            net_scores = [pl.dct_nets["holes"][n] for pl in self._players]
-            net_scores.sort()
-            winner = net_scores[0] < net_scores[1]
-            for pl in self._players:
-                if winner and pl.dct_nets["holes"][n] == net_scores[0]:
-                    win = self.carryover * (len(self._players) - 1)
-                    pl.dct_skins["holes"][n] = win
-                    self.carryover = 1
-                pl.update_totals(pl.dct_skins)
-            if not winner and self.use_carryover:
-                self.carryover += 1
+    def apply_hole(self, hole_num):
+        """Update net scores and the skin of a hole."""
+        n = hole_num - 1
+        nets = self.matrix.net(n, self.bumps)
+        for pl, net in self.scored(n, nets):
+            pl.dct_nets["holes"][n] = net
+        if not self.matrix.all_played(n):
+            # skin is decided when all players have a score
+            return
+        lowest, count = low(nets)
+        if count == 1:
+            pl = self._players[int(nets.argmin())]
+            pl.set_hole(pl.dct_skins, n, self.carryover * (len(self._players) - 1))
+            self.carryover = 1
+        elif self.use_carryover:
+            self.carryover += 1
+
+    def simulate(self, sample):
+        """Skins of each trial, the winnings of the skins settled."""
+        start = sample.start
+        skins = [
+            self.state_after(start, pl, "dct_skins")["total"] for pl in self._players
+        ]
+        nets = sample.gross - self.bumps[:, start:, np.newaxis]
+        is_low = nets == nets.min(axis=0)
+        won = is_low.sum(axis=0, dtype=np.int16) == 1
+        # skins a hole is worth, hole by hole
+        carryover = np.full(
+            won.shape[1], self.state_after(start, self, "carryover"), dtype=np.int16
+        )
+        pots = np.empty(won.shape, dtype=np.int16)
+        for index, hole_won in enumerate(won):
+            pots[index] = carryover
+            if self.use_carryover:
+                # back to 1 after a skin is won
+                carryover = carryover * ~hole_won + 1
+        won_skins = ((is_low & won) * pots).sum(axis=1, dtype=np.int32) * (
+            len(self._players) - 1
+        )
+        return settle(np.array(skins)[:, np.newaxis] + won_skins)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
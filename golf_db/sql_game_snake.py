@@ -1,6 +1,8 @@
 """ game_snake.py - Implement."""
+import numpy as np
 from .sql_game import SqlGolfGame, GamePlayer
 from .exceptions import GolfGameException
+from .score_matrix import settle
 
 
 class SnakePlayer(GamePlayer):
@@ -25,6 +27,8 @@ class SqlGameSnake(SqlGolfGame):
             "desc": "Points will lose every 3 putt. Hold will only lose when you already have the snake, always pays on 9 and 18.",
         }
     }
+    game_state = ("_has_snake", "_thru")
+    player_state = ("dct_points", "dct_snake")
 
     def setup(self, **kwargs):
         """Start the game."""
@@ -39,8 +43,7 @@ class SqlGameSnake(SqlGolfGame):
 
     def _pay_snake(self, index, snake_winner):
         # immediate payout and release snake
-        snake_winner.dct_points["holes"][index] = -1
-        snake_winner.update_totals(snake_winner.dct_points)
+        snake_winner.set_hole(snake_winner.dct_points, index, -1)
         self._has_snake = None
 
     def _set_snake(self, index, snake_winner):
@@ -48,67 +51,111 @@ class SqlGameSnake(SqlGolfGame):
         snake_winner.dct_snake[index] = "S"
         self._has_snake = snake_winner
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        dct_three_putts = {hole.num: None for hole in self.golf_round.course.holes}
-        for pl, result in zip(self._players, self.golf_round.results):
-            for score in result.scores:
-                n = score.num
-                if dct_three_putts[n] is None:
-                    dct_three_putts[n] = []
-                if score.putts >= 3:
-                    dct_three_putts[n].append((pl, score.putts))
-        hole_nums = sorted(dct_three_putts.keys())
-        for hole_num in hole_nums:
-            lst_losers = dct_three_putts[hole_num]
-            if lst_losers == None:
-                break
-            self._thru = hole_num
-            index = hole_num - 1
-            if self.snake_type == "Points":
-                # all 3 putters lose a point
-                for pl, putts in lst_losers:
-                    self._pay_snake(index, pl)
-            elif self.snake_type == "Hold":
-                # only one loser allowed
+    def apply_hole(self, hole_num):
+        """Update the snake of a hole."""
+        index = hole_num - 1
+        if not self.matrix.played[:, index].any():
+            return
+        if hole_num > 1 and self._thru != hole_num - 1:
+            # snake stops at the first hole nobody played
+            return
+        lst_losers = [
+            (pl, putts)
+            for pl, putts in self.scored(index, self.matrix.putts[:, index])
+            if putts >= 3
+        ]
+        self._thru = hole_num
+        if self.snake_type == "Points":
+            # all 3 putters lose a point
+            for pl, putts in lst_losers:
+                self._pay_snake(index, pl)
+        elif self.snake_type == "Hold":
+            # only one loser allowed
+            if len(lst_losers) > 1:
+                # Determine which 3 putt gets snake
+                # 1st, is there a largest putt
+                max_putts = max([tup[1] for tup in lst_losers])
+                lst_losers = [tup for tup in lst_losers if tup[1] == max_putts]
                 if len(lst_losers) > 1:
-                    # Determine which 3 putt gets snake
-                    # 1st, is there a largest putt
-                    max_putts = max([tup[1] for tup in lst_losers])
-                    lst_losers = [tup for tup in lst_losers if tup[1] == max_putts]
+                    if hole_num in self.game._game_data:
+                        loser = self.game._game_data[hole_num]["closest_3_putt"]
+                        lst_losers = [
+                            tup
+                            for tup in lst_losers
+                            if tup[0].player.nick_name == loser
+                        ]
                     if len(lst_losers) > 1:
-                        if hole_num in self.game._game_data:
-                            loser = self.game._game_data[hole_num]["closest_3_putt"]
-                            lst_losers = [
-                                tup
-                                for tup in lst_losers
-                                if tup[0].player.nick_name == loser
-                            ]
-                        if len(lst_losers) > 1:
-                            dct = {
-                                "hole_num": hole_num,
-                                "players": [w[0].player for w in lst_losers],
-                                "key": "closest_3_putt",
-                                "msg": "Which 3 putt player had the closest 1st putt on hole {}?".format(
-                                    hole_num
-                                ),
-                                "game": self,
-                            }
-                            raise GolfGameException(dct)
-                #
-                if len(lst_losers) == 1:
-                    # we have a 3 putt winner (loser)
-                    snake_winner = lst_losers[0][0]
-                    if self._has_snake and self._has_snake == snake_winner:
-                        # immediate payout and release snake
-                        self._pay_snake(index, snake_winner)
-                    else:
-                        self._has_snake = snake_winner
-                if self._has_snake:
-                    self._set_snake(index, self._has_snake)
-                # snake automatic payout on 9 and 18
-                if hole_num in (9, 18) and self._has_snake:
-                    self._pay_snake(index, self._has_snake)
+                        dct = {
+                            "hole_num": hole_num,
+                            "players": [w[0].player for w in lst_losers],
+                            "key": "closest_3_putt",
+                            "msg": "Which 3 putt player had the closest 1st putt on hole {}?".format(
+                                hole_num
+                            ),
+                            "game": self,
+                        }
+                        raise GolfGameException(dct)
+            #
+            if len(lst_losers) == 1:
+                # we have a 3 putt winner (loser)
+                snake_winner = lst_losers[0][0]
+                if self._has_snake and self._has_snake == snake_winner:
+                    # immediate payout and release snake
+                    self._pay_snake(index, snake_winner)
+                else:
+                    self._has_snake = snake_winner
+            if self._has_snake:
+                self._set_snake(index, self._has_snake)
+            # snake automatic payout on 9 and 18
+            if hole_num in (9, 18) and self._has_snake:
+                self._pay_snake(index, self._has_snake)
+
+    def simulate(self, sample):
+        """Points of each trial settled, the closest 3 putt is drawn at random."""
+        start = sample.start
+        points = [
+            self.state_after(start, pl, "dct_points")["total"] for pl in self._players
+        ]
+        three_putts = sample.putts >= 3
+        points = np.array(points)[:, np.newaxis]
+        if self.snake_type == "Points":
+            return settle(points - three_putts.sum(axis=1))
+        # rows of the players fit in int8 but in the largest fields
+        dtype = np.int8 if len(self._players) < 128 else np.int16
+        # loser of each hole, with the most putts, or a tie drawn at random
+        count = three_putts.sum(axis=0, dtype=dtype)
+        rows = np.arange(len(self._players), dtype=dtype)
+        losers = (three_putts * rows[:, np.newaxis, np.newaxis]).sum(
+            axis=0, dtype=dtype
+        )
+        ties = (count > 1).nonzero()
+        putts = sample.putts[:, ties[0], ties[1]].astype(np.int32) * 256
+        draws = sample.rng.integers(0, 256, size=putts.shape, dtype=np.uint8)
+        # the row of the player is kept in the lowest digit of the key
+        keys = (putts + draws) * len(rows) + rows[:, np.newaxis]
+        keys[~three_putts[:, ties[0], ties[1]]] = -1
+        losers[ties] = keys.max(axis=0) % len(rows)
+        has_snake = self.state_after(start, self, "_has_snake")
+        snake = np.full(
+            count.shape[1],
+            -1 if has_snake is None else self._players.index(has_snake),
+            dtype=dtype,
+        )
+        # player who pays on each hole, -1 for none
+        payers = []
+        for index, (lost, loser) in enumerate(zip(count > 0, losers)):
+            paid = lost & (snake == loser)
+            # the loser if paid, else -1
+            payers.append((loser + 1) * paid - 1)
+            # a new loser holds the snake, released when paid
+            snake = (snake + lost * (loser - snake) + 1) * ~paid - 1
+            if start + index + 1 in (9, 18):
+                payers.append(snake)
+                snake = np.full_like(snake, -1)
+        paid = (np.array(payers)[:, np.newaxis] == rows[:, np.newaxis]).sum(
+            axis=0, dtype=np.int16
+        )
+        return settle(points - paid)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
@@ -62,6 +62,7 @@ Since most people have a hard time shooting double eagles and eagles, golfers of
         },
         "wager": {"default": 0.0, "type": "float", "desc": "Wager per point."},
     }
+    player_state = ("dct_points",)
 
     def validate(self):
         super(SqlGameStableford, self).validate()
@@ -96,30 +97,19 @@ Since most people have a hard time shooting double eagles and eagles, golfers of
         self._players = [
             StablefordPlayer(self, result) for result in self.golf_round.results
         ]
+        self.bumps = self.matrix.bumps(0)
         self.dctScorecard["header"] = "{0:*^98}".format(" Stableford ")
         self._thru = 0
 
-    def update(self):
-        """Update gross results for all scores so far."""
-        for pl, result in zip(self._players, self.golf_round.results):
-            # calculate net
-            for n, score in enumerate(result.scores):
-                net_score = score.gross - pl._bumps[n]
-                pl.dct_points["holes"][n] = self._calc_score(
-                    net_score - self.golf_round.course.holes[n].par
-                )
-                if pl._jokers:
-                    if (n + 1) in pl._jokers:
-                        pl.dct_points["holes"][n] *= 2
-                pl.update_totals(pl.dct_points)
-
-    def _calc_score(self, net_score):
-        if net_score in self.dct_stableford:
-            return self.dct_stableford[net_score]
-        if net_score < 0:
-            return self.dct_stableford["min"]
-        else:
-            return self.dct_stableford["max"]
+    def apply_hole(self, hole_num):
+        """Update points of a hole."""
+        n = hole_num - 1
+        points = self.matrix.stableford(n, self.bumps, self.dct_stableford)
+        for pl, point in self.scored(n, points):
+            if pl._jokers:
+                if hole_num in pl._jokers:
+                    point *= 2
+            pl.set_hole(pl.dct_points, n, point)
 
     def getScorecard(self, **kwargs):
         """Scorecard with all players."""
@@ -1,10 +1,12 @@
 #!/usr/bin/env python
 """ dbmain.py - simple query test program for database """
 import datetime
+import functools
 import logging
 
 # import platform
 import threading
+import time
 import traceback
 
 # from golf_db.player import GolfPlayer
@@ -13,6 +15,18 @@ from golf_db.data.test_courses import DBGolfCourses
 from golf_db.data.test_players import DBGolfPlayers
 from golf_db.sql_game_factory import SqlGolfGameOptions
 from golf_db.exceptions import GolfGameException
+from golf_db.db_ingest import ScoreRecord, ingest_scores
+from golf_db.score_queue import ScoreQueue
+from golf_db import db_stats
+from golf_db.db_listing import list_rounds, round_leaderboard
+from golf_db.db_replay import replay_rounds
+from golf_db.game_odds import DEF_TRIALS, round_odds
+from golf_db.db_import import (
+    DEF_BATCH_SIZE,
+    import_players,
+    import_courses,
+    is_import_file,
+)
 
 from util.menu import MenuItem, Menu, InputException
 from util.tl_logger import TLLog, logOptions
@@ -24,14 +38,37 @@ from golf_db.db_sqlalchemy import (
     Hole,
     Tee,
     Result,
-    Game,
+    Differential,
+    Season,
     DBAdmin,
+    ENGINE_PROFILES,
+    get_round,
+    load_game_results,
+    load_round_snapshot,
+    post_scores,
+    set_game_hole_data,
 )
 
 TLLog.config("logs/sqlmain.log", defLogLevel=logging.INFO)
 
 log = TLLog.getLogger("sqlmain")
 
+# most courses listed by a course search
+COURSE_SEARCH_LIMIT = 20
+# journal of the write-behind score queue
+DEF_JOURNAL = "golf_scores.journal"
+
+
+def unit_of_work(func):
+    """Run a menu command in a database unit of work, the session is passed in."""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.db.unit_of_work() as session:
+            return func(self, session, *args, **kwargs)
+
+    return wrapper
+
 
 class SQLMenu(Menu):
     def __init__(self, **kwargs):
@@ -39,8 +76,15 @@ class SQLMenu(Menu):
         super().__init__(cmdFile)
 
         self.url = kwargs.get("url")
-        self.db = DBAdmin(self.url)
+        self.db = DBAdmin(
+            self.url,
+            profile=kwargs.get("profile", "default"),
+            update_handicaps=kwargs.get("update_handicaps", True),
+        )
         self._round_id = None
+        self._round_page = None
+        self._bulk_records = None
+        self._score_queue = None
         # add menu items
         self.addMenuItem(
             MenuItem("dc", "", "create golf database.", self._createDatabase)
@@ -50,16 +94,59 @@ class SQLMenu(Menu):
                 "RM", "", "remove all data from golf database.", self._clearDatabase
             )
         )
-        self.addMenuItem(MenuItem("pli", "", "player insert.", self._playerInsert))
+        self.addMenuItem(
+            MenuItem("du", "", "upgrade golf database schema.", self._upgradeDatabase)
+        )
+        self.addMenuItem(
+            MenuItem(
+                "pli",
+                "testdata|<file> [batch]|<key=value>",
+                "player insert.",
+                self._playerInsert,
+            )
+        )
         self.addMenuItem(MenuItem("pll", "", "player list.", self._playerList))
         self.addMenuItem(
             MenuItem("plu", "<email> <key,value>", "player update.", self._playerUpdate)
         )
         self.addMenuItem(MenuItem("plr", "", "player remove.", self._playerRemove))
         self.addMenuItem(
-            MenuItem("coi", "testdata", "course insert.", self._courseInsert)
+            MenuItem(
+                "plh",
+                "[post]",
+                "player handicaps, post re-posts all rounds.",
+                self._playerHandicaps,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "pls",
+                "[<YYYY-MM-DD> <YYYY-MM-DD>]",
+                "player statistics, all rounds or played in date range.",
+                self._playerStats,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "sec",
+                "<name> <YYYY-MM-DD> <YYYY-MM-DD>",
+                "season create, posts rounds already played.",
+                self._seasonCreate,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "ses", "<name> [<game>]", "season standings.", self._seasonStandings
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "coi", "testdata|<file> [batch]", "course insert.", self._courseInsert
+            )
+        )
+        self.addMenuItem(
+            MenuItem("col", "[<words>]", "course list or search.", self._courseList)
         )
-        self.addMenuItem(MenuItem("col", "", "course list.", self._courseList))
         self.addMenuItem(
             MenuItem("cou", "<name> <key,value>", "course update.", self._courseUpdate)
         )
@@ -67,7 +154,41 @@ class SQLMenu(Menu):
         self.addMenuItem(
             MenuItem("cos", "", "Get a scorecard", self._courseGetScorecard)
         )
-        self.addMenuItem(MenuItem("rol", "", "round list.", self._roundList))
+        self.addMenuItem(
+            MenuItem(
+                "rol",
+                "[next] [player|course|start|end|limit=<value>]",
+                "round list, newest first.",
+                self._roundList,
+            )
+        )
+        self.addMenuItem(
+            MenuItem("rod", "<round_id>", "round delete.", self._roundDelete)
+        )
+        self.addMenuItem(
+            MenuItem(
+                "rop",
+                "<YYYY-MM-DD> <YYYY-MM-DD>",
+                "purge rounds played in date range.",
+                self._roundPurge,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "roa",
+                "<YYYY-MM-DD> <YYYY-MM-DD>",
+                "archive complete rounds played in date range.",
+                self._roundArchive,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "rou",
+                "<round_id>",
+                "unarchive a round to correct it.",
+                self._roundUnarchive,
+            )
+        )
         self.addMenuItem(
             MenuItem(
                 "gcr",
@@ -101,10 +222,63 @@ class SQLMenu(Menu):
                 self._roundScore,
             )
         )
+        self.addMenuItem(
+            MenuItem(
+                "gbk",
+                "on|off",
+                "Bulk scores, gas is queued until off",
+                self._roundBulkScores,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "gwb",
+                "on [<journal>]|off",
+                "Write-behind scores, gas returns before the write",
+                self._roundWriteBehind,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "glb",
+                "[<round_id>]",
+                "Leaderboard from the result totals",
+                self._roundTotals,
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "god",
+                "[<trials>]",
+                "Odds to win and expected winnings of the games",
+                self._roundOdds,
+            )
+        )
         self.addMenuItem(MenuItem("sql", "", "Test a SQLAlchemy query", self._roundSQL))
         self.addMenuItem(MenuItem("tbl", "", "SQLAlchemy tables", self._dbTables))
+        self.addMenuItem(
+            MenuItem("dbc", "", "write conflict report.", self._dbConflicts)
+        )
+        self.addMenuItem(
+            MenuItem(
+                "dbk", "[repair]", "check result running totals.", self._dbCheckTotals
+            )
+        )
+        self.addMenuItem(
+            MenuItem(
+                "dbr",
+                "[<processes>] [handicaps]",
+                "replay the games of all rounds.",
+                self._dbReplay,
+            )
+        )
         self.updateHeader()
 
+    def shutdown(self):
+        if self._score_queue is not None:
+            self._score_queue.close()
+        self.db.close()
+
     def updateHeader(self):
         self.header = "database url:{} - database:{}".format(self.url, "???")
 
@@ -122,16 +296,70 @@ class SQLMenu(Menu):
                 except Exception as ex:
                     print("  EXCEPTION - {}".format(ex))
 
+    def _dbConflicts(self):
+        print("{} write conflicts".format(len(self.db.conflicts)))
+        for conflict in self.db.conflicts:
+            print(
+                "  {:%H:%M:%S} attempt {} {} - {}".format(
+                    conflict.time, conflict.attempt, conflict.error, conflict.message
+                )
+            )
+
+    def _dbReplay(self):
+        """ dbr [<processes>] [handicaps]"""
+        course_handicaps = "handicaps" in self.lstCmd[1:]
+        lst = [arg for arg in self.lstCmd[1:] if arg != "handicaps"]
+        processes = int(lst[0]) if lst else None
+        result = replay_rounds(
+            self.db, processes=processes, course_handicaps=course_handicaps
+        )
+        rate = result.rounds / result.seconds if result.seconds else 0.0
+        fmt = "{} rounds, {} games, {} need info in {:.2f} sec - {:.1f} rounds/sec"
+        print(
+            fmt.format(
+                result.rounds, result.games, result.info_needed, result.seconds, rate
+            )
+        )
+        for round_id, error in result.errors:
+            print("  round {} - {}".format(round_id, error))
+
+    @unit_of_work
+    def _dbCheckTotals(self, session):
+        """ dbk [repair]"""
+        repair = len(self.lstCmd) > 1 and self.lstCmd[1] == "repair"
+        mismatches = Result.checkTotals(session, repair=repair)
+        session.commit()
+        print("{} totals mismatched".format(len(mismatches)))
+        for mismatch in mismatches:
+            print(
+                "  result {} {} stored:{} expected:{}".format(
+                    mismatch.result_id,
+                    mismatch.column,
+                    mismatch.stored,
+                    mismatch.expected,
+                )
+            )
+
     def _clearDatabase(self):
         self.db.remove()
 
     def _createDatabase(self):
         self.db.create_tables()
 
-    def _playerInsert(self):
-        """Inserts ALL players from DBGolfPlayers."""
-        session = self.db.Session()
-        if self.lstCmd[1] == "testdata":
+    def _upgradeDatabase(self):
+        created = self.db.upgrade_tables()
+        print("{} schema changes".format(len(created)))
+        for name in created:
+            print("  {}".format(name))
+
+    @unit_of_work
+    def _playerInsert(self, session):
+        """Inserts ALL players from DBGolfPlayers, a roster file or key=values.
+    pli testdata|<file.jsonl|file.csv> [batch]|<key=value> ...
+    """
+        if is_import_file(self.lstCmd[1]):
+            self._importFile(session, import_players)
+        elif self.lstCmd[1] == "testdata":
             for dct in DBGolfPlayers:
                 player = Player(**dct)
                 session.add(player)
@@ -144,19 +372,31 @@ class SQLMenu(Menu):
             session.add(player)
         session.commit()
 
-    def _playerList(self):
+    def _importFile(self, session, func):
+        """Stream a file into the database with import_players/import_courses."""
+        batch_size = int(self.lstCmd[2]) if len(self.lstCmd) > 2 else DEF_BATCH_SIZE
+        result = func(session, self.lstCmd[1], batch_size=batch_size)
+        rate = result.rows / result.seconds if result.seconds else 0.0
+        fmt = "{} rows, {} inserted, {} duplicates in {:.2f} sec - {:.1f} rows/sec"
+        print(
+            fmt.format(
+                result.rows, result.inserted, result.duplicates, result.seconds, rate
+            )
+        )
+
+    @unit_of_work
+    def _playerList(self, session):
         """List all players in database."""
-        session = self.db.Session()
         players = session.query(Player).all()
         print("{} players".format(len(players)))
         for n, player in enumerate(players):
             print("  {:<2}:{}".format(n + 1, player))
 
-    def _playerRemove(self):
+    @unit_of_work
+    def _playerRemove(self, session):
         """Remove ALL players from database.
     plr <email>|all
     """
-        session = self.db.Session()
         query = session.query(Player)
         if self.lstCmd[1] == "all":
             players = query.all()
@@ -167,11 +407,11 @@ class SQLMenu(Menu):
             session.delete(player)
         session.commit()
 
-    def _playerUpdate(self):
+    @unit_of_work
+    def _playerUpdate(self, session):
         """Update a player record.
     plu <email> <key=value> ...
     """
-        session = self.db.Session()
         email = self.lstCmd[1]
         query = session.query(Player)
         player = query.filter(Player.email == email).first()
@@ -183,10 +423,115 @@ class SQLMenu(Menu):
                 raise InputException('player has no attribute "{}"'.format(lst[0]))
         session.commit()
 
-    def _courseInsert(self):
-        """Inserts courses to database."""
-        session = self.db.Session()
-        if self.lstCmd[1] == "testdata":
+    @unit_of_work
+    def _playerHandicaps(self, session):
+        """List handicap index and recent differentials of all players.
+    plh [post]
+    """
+        if len(self.lstCmd) > 1 and self.lstCmd[1] == "post":
+            query = session.query(Round).order_by(Round.date_played, Round.round_id)
+            for golf_round in query:
+                golf_round.postHandicaps(session)
+            session.commit()
+        for player in session.query(Player).order_by(Player.player_id):
+            print(
+                "{:<8} {:>5} - {}".format(
+                    player.nick_name,
+                    player.handicap,
+                    ",".join(
+                        [str(d) for d in Differential.recent(session, player.player_id)]
+                    ),
+                )
+            )
+
+    @unit_of_work
+    def _seasonCreate(self, session):
+        """ sec <name> <YYYY-MM-DD> <YYYY-MM-DD>"""
+        if len(self.lstCmd) < 4:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        season = Season(
+            name=self.lstCmd[1],
+            start_date=datetime.datetime.strptime(self.lstCmd[2], "%Y-%m-%d").date(),
+            end_date=datetime.datetime.strptime(self.lstCmd[3], "%Y-%m-%d").date(),
+        )
+        session.add(season)
+        session.flush()
+        query = session.query(Round.round_id).filter(
+            Round.date_played >= season.start_date,
+            Round.date_played <= season.end_date,
+        )
+        count = 0
+        for (round_id,) in query.order_by(Round.date_played, Round.round_id).all():
+            golf_round = get_round(session, round_id)
+            if golf_round.is_complete() and season.postRound(session, golf_round):
+                count += 1
+        session.commit()
+        print("season {} - {} rounds posted".format(season.name, count))
+
+    @unit_of_work
+    def _seasonStandings(self, session):
+        """ ses <name> [<game>]"""
+        if len(self.lstCmd) < 2:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        season = session.query(Season).filter(Season.name == self.lstCmd[1]).first()
+        if season is None:
+            raise InputException('season "{}" not found'.format(self.lstCmd[1]))
+        game_type = self.lstCmd[2] if len(self.lstCmd) > 2 else None
+        print("{} {} - {}".format(season.name, season.start_date, season.end_date))
+        prev_game_type = None
+        for row in season.getStandings(session, game_type):
+            if row.game_type != prev_game_type:
+                print(
+                    "{:<10} {:<8} {:>6} {:>7} {:>7} {:>4}".format(
+                        row.game_type, "player", "rounds", "total", "money", "wins"
+                    )
+                )
+                prev_game_type = row.game_type
+            print(
+                "{:<10} {:<8} {:>6} {:>7g} {:>7g} {:>4}".format(
+                    "", row.nick_name, row.rounds, row.total, row.money, row.wins
+                )
+            )
+
+    @unit_of_work
+    def _playerStats(self, session):
+        """Scoring statistics of all players from the database aggregates.
+    pls [<YYYY-MM-DD> <YYYY-MM-DD>]
+    """
+        start = end = None
+        if len(self.lstCmd) > 2:
+            start = datetime.datetime.strptime(self.lstCmd[1], "%Y-%m-%d").date()
+            end = datetime.datetime.strptime(self.lstCmd[2], "%Y-%m-%d").date()
+        print(
+            "{:<8} {:>6} {:>5} {:>5} {:>6} {:>5} {:>5}".format(
+                "player", "rounds", "gross", "+par", "putts", "brdy%", "par3"
+            )
+        )
+        pars = {}
+        for row in db_stats.par_averages(session, start, end):
+            pars[(row.player_id, row.par)] = row
+        for row in db_stats.player_summary(session, start, end):
+            par3 = pars.get((row.player_id, 3))
+            print(
+                "{:<8} {:>6} {:>5.2f} {:>5.2f} {:>6} {:>5.1f} {:>5}".format(
+                    row.nick_name,
+                    row.rounds,
+                    row.avg_gross,
+                    row.avg_to_par,
+                    "-" if row.putts_per_round is None else row.putts_per_round,
+                    row.birdie_rate * 100,
+                    "-" if par3 is None else "{:.2f}".format(par3.avg_gross),
+                )
+            )
+
+    @unit_of_work
+    def _courseInsert(self, session):
+        """Inserts courses to database from DBGolfCourses or a catalog file.
+    coi testdata|<file.jsonl|file.csv> [batch]
+    """
+        if is_import_file(self.lstCmd[1]):
+            self._importFile(session, import_courses)
+        elif self.lstCmd[1] == "testdata":
             for dct in DBGolfCourses:
                 # co = GolfCourse(dct=dct)
                 course = Course(name=dct["name"])
@@ -209,82 +554,151 @@ class SQLMenu(Menu):
                     session.add(tee)
                 session.add(course)
         else:
-            raise InputException("only testdata allowed for courses insert.")
+            raise InputException("only testdata or file allowed for courses insert.")
         session.commit()
 
-    def _courseList(self):
-        """List all courses in database."""
-        session = self.db.Session()
-        query = session.query(Course)
-        match = "all"
+    @unit_of_work
+    def _courseList(self, session):
+        """List all courses in database, or courses matching words ranked.
+    col [<words>]
+    """
         if len(self.lstCmd) > 1:
-            query = query.filter(Course.name.like("%{}%".format(self.lstCmd[1])))
-            match = 'name contains "{}"'.format(self.lstCmd[1])
-        courses = query.all()
-        print(f"{len(courses)} courses - {match}")
+            text = " ".join(self.lstCmd[1:])
+            matches = Course.search(session, text, limit=COURSE_SEARCH_LIMIT)
+            print(f'{len(matches)} courses - matching "{text}"')
+            for n, match in enumerate(matches):
+                course = session.query(Course).get(match.course_id)
+                print(f"  {n+1:<2}:{course}")
+            return
+        courses = session.query(Course).all()
+        print(f"{len(courses)} courses - all")
         for n, course in enumerate(courses):
             print(f"  {n+1:<2}:{course}")
 
-    def _courseRemove(self):
+    @unit_of_work
+    def _courseRemove(self, session):
         """Remove course from database.
     cor <name>|all
     """
-        session = self.db.Session()
         query = session.query(Course)
         if self.lstCmd[1] == "all":
             courses = query.all()
         else:
-            course = query.filter(
-                Course.name.like("%{}%".format(self.lstCmd[1]))
-            ).first()
-            courses = [course]
+            courses = [self._findCourse(session, self.lstCmd[1])]
         for course in courses:
             session.delete(course)
         session.commit()
 
+    def _findCourse(self, session, text):
+        """Return the course best matching text."""
+        course = Course.find(session, text)
+        if course is None:
+            raise InputException('course "{}" not found'.format(text))
+        return course
+
     def _courseUpdate(self):
         """Update a course record.
     cou <name> <key=value> ...
     """
         raise InputException("course update not implemented (yet)")
 
-    def _courseGetScorecard(self):
+    @unit_of_work
+    def _courseGetScorecard(self, session):
         if len(self.lstCmd) < 2:
             raise InputException(
                 "Not enough arguments for {} command".format(self.lstCmd[0])
             )
-        session = self.db.Session()
-        query = session.query(Course).filter(
-            Course.name.like("%{}%".format(self.lstCmd[1]))
-        )
-        course = query.first()
+        course = self._findCourse(session, self.lstCmd[1])
         print(course)
         dct = course.getScorecard()
         print(dct["hdr"])
         print(dct["par"])
         print(dct["hdcp"])
 
-    def _roundList(self):
-        """List all rounds in database."""
-        # dct = {}
-        # for arg in self.lstCmd[2:]:
-        # lst = arg.split('=')
-        # if lst[0] == '':
-        # players = eval(lst[1])
-        # else:
-        # dct[lst[0]] = eval(lst[1])
-
-        session = self.db.Session()
-        query = session.query(Round)
-        # if len(self.lstCmd) > 1:
-        # query = query.filter(Course.name.like('%{}%'.format(self.lstCmd[1])))
-        # match = 'name contains "{}"'.format(self.lstCmd[1])
-        rounds = query.all()
-        print("{} rounds".format(len(rounds)))
-        for n, golf_round in enumerate(rounds):
-            print("{:>2} : {}".format(n + 1, golf_round))
-
-    def _roundCreate(self):
+    @unit_of_work
+    def _roundList(self, session):
+        """List rounds in database, newest first, a page at a time.
+    rol [next] [player=<email>] [course=<name>] [start=<YYYY-MM-DD>]
+        [end=<YYYY-MM-DD>] [limit=<n>]
+    """
+        if len(self.lstCmd) > 1 and self.lstCmd[1] == "next":
+            if self._round_page is None:
+                raise InputException("No more rounds to list")
+            kwargs = self._round_page
+        else:
+            kwargs = {}
+            for arg in self.lstCmd[1:]:
+                key, _, value = arg.partition("=")
+                if key == "player":
+                    player = session.query(Player).filter(Player.email == value).first()
+                    if player is None:
+                        raise InputException('player "{}" not found'.format(value))
+                    kwargs["player_id"] = player.player_id
+                elif key == "course":
+                    kwargs["course_id"] = self._findCourse(session, value).course_id
+                elif key in ("start", "end"):
+                    kwargs[key] = datetime.datetime.strptime(value, "%Y-%m-%d").date()
+                elif key == "limit":
+                    kwargs["limit"] = int(value)
+                else:
+                    raise InputException('round list filter "{}" unknown'.format(key))
+        page = list_rounds(session, **kwargs)
+        print("{} rounds".format(len(page.rows)))
+        for row in page.rows:
+            print("{:>2} : {}".format(row.round_id, row))
+        self._round_page = None
+        if page.cursor is not None:
+            self._round_page = dict(kwargs, cursor=page.cursor)
+            print("more rounds: rol next")
+
+    @unit_of_work
+    def _roundDelete(self, session):
+        """ rod <round_id>"""
+        if len(self.lstCmd) < 2:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        round_id = int(self.lstCmd[1])
+        count = Round.delete(session, round_id)
+        session.commit()
+        if round_id == self._round_id:
+            self._round_id = None
+        print("{} rounds deleted".format(count))
+
+    @unit_of_work
+    def _roundPurge(self, session):
+        """ rop <YYYY-MM-DD> <YYYY-MM-DD>"""
+        if len(self.lstCmd) < 3:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        start = datetime.datetime.strptime(self.lstCmd[1], "%Y-%m-%d").date()
+        end = datetime.datetime.strptime(self.lstCmd[2], "%Y-%m-%d").date()
+        t0 = time.time()
+        count = Round.purge(session, start, end)
+        session.commit()
+        self._round_id = None
+        print("{} rounds purged in {:.3f} sec".format(count, time.time() - t0))
+
+    @unit_of_work
+    def _roundArchive(self, session):
+        """ roa <YYYY-MM-DD> <YYYY-MM-DD>"""
+        if len(self.lstCmd) < 3:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        start = datetime.datetime.strptime(self.lstCmd[1], "%Y-%m-%d").date()
+        end = datetime.datetime.strptime(self.lstCmd[2], "%Y-%m-%d").date()
+        t0 = time.time()
+        count = Round.archive(session, start, end)
+        session.commit()
+        print("{} rounds archived in {:.3f} sec".format(count, time.time() - t0))
+
+    @unit_of_work
+    def _roundUnarchive(self, session):
+        """ rou <round_id>"""
+        if len(self.lstCmd) < 2:
+            raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
+        count = Round.unarchive(session, int(self.lstCmd[1]))
+        session.commit()
+        print("{} results unarchived".format(count))
+
+    @unit_of_work
+    def _roundCreate(self, session):
         if len(self.lstCmd) < 3:
             raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
         dtPlay = datetime.datetime.strptime(self.lstCmd[2], "%Y-%m-%d")
@@ -294,11 +708,7 @@ class SQLMenu(Menu):
             lst = option.split("=")
             options[lst[0]] = lst[1]
         # session
-        session = self.db.Session()
-        query = session.query(Course).filter(
-            Course.name.like("%{}%".format(self.lstCmd[1]))
-        )
-        course = query.first()
+        course = self._findCourse(session, self.lstCmd[1])
         golf_round = Round(course_id=course.course_id, date_played=dtPlay)
         session.add(golf_round)
         session.commit()
@@ -312,16 +722,16 @@ class SQLMenu(Menu):
         self._round_id = golf_round.round_id
         print("new round id = {}".format(golf_round.round_id))
 
-    def _roundAddPlayer(self):
+    @unit_of_work
+    def _roundAddPlayer(self, session):
         # gap <email like> <tee>
         if self._round_id is None:
             raise InputException("Golf round not created")
         if len(self.lstCmd) < 3:
             raise InputException("Not enough arguments for %s command" % self.lstCmd[0])
 
-        session = self.db.Session()
         # get round
-        golf_round = session.query(Round).filter(Round.round_id == self._round_id).one()
+        golf_round = get_round(session, self._round_id)
         # find player
         player = (
             session.query(Player)
@@ -347,6 +757,7 @@ class SQLMenu(Menu):
         )
         result.calcCourseHandicap(tee)
         session.add(result)
+        golf_round.bump_version()
         session.commit()
 
     def _roundStart(self):
@@ -354,7 +765,8 @@ class SQLMenu(Menu):
             raise InputException("Golf round not created")
         self._roundDump()
 
-    def _roundAddGame(self):
+    @unit_of_work
+    def _roundAddGame(self, session):
         if self._round_id is None:
             raise InputException("Golf round not created")
         if len(self.lstCmd) < 2:
@@ -366,9 +778,8 @@ class SQLMenu(Menu):
             lst = arg.split("=")
             dct[lst[0]] = lst[1]
 
-        session = self.db.Session()
         # get round
-        golf_round = session.query(Round).filter(Round.round_id == self._round_id).one()
+        golf_round = get_round(session, self._round_id)
         gameOptions = SqlGolfGameOptions(game_type)
         # print('dct:{}'.format(dct))
         # print('gameOptions:{}'.format(gameOptions))
@@ -381,7 +792,11 @@ class SQLMenu(Menu):
         session.commit()
 
     def _roundScore(self):
-        """ gas <hole> gross=<list> [pause=enable]"""
+        """ gas <hole> gross=<list> [pause=enable]
+
+    Each write is its own unit of work, run again when another scorer changed
+    the round at the same time.
+    """
         if self._round_id is None:
             raise InputException("Golf round not created")
         if len(self.lstCmd) < 3:
@@ -404,33 +819,39 @@ class SQLMenu(Menu):
                 raise InputException("Unknown argument {}".format(arg))
         if lstGross is None:
             raise InputException("gross must be set with gas command.")
-        #
-        session = self.db.Session()
-        # get round
-        golf_round = session.query(Round).filter(Round.round_id == self._round_id).one()
-
+        if self._bulk_records is not None:
+            self._bulk_records.append(
+                ScoreRecord(self._round_id, hole, lstGross, lstPutts, options)
+            )
+            return
+        if self._score_queue is not None:
+            seq = self._score_queue.put(
+                ScoreRecord(self._round_id, hole, lstGross, lstPutts, options)
+            )
+            print("hole {} queued - {}".format(hole, seq))
+            return
         dct_score_data = {
             "lstGross": lstGross,
             "lstPutts": lstPutts,
             "options": options,
         }
-        golf_round.addScores(session, hole, dct_score_data)
-        session.commit()
 
-        lst_game_more_info_needed = []
-        golf_round = session.query(Round).filter(Round.round_id == self._round_id).one()
-        for game in golf_round.games:
-            try:
-                game.CreateGame()
-            except GolfGameException as ex:
-                print(
-                    "{} Game - {} - {}".format(
-                        ex.dct["game"].short_description,
-                        ex.dct["msg"],
-                        ",".join([pl.nick_name for pl in ex.dct["players"]]),
-                    )
+        def add_scores(session):
+            return post_scores(
+                session,
+                self._round_id,
+                lambda golf_round: golf_round.addScores(session, hole, dct_score_data),
+            )
+
+        lst_game_more_info_needed = self.db.retry_unit_of_work(add_scores)
+        for ex in lst_game_more_info_needed:
+            print(
+                "{} Game - {} - {}".format(
+                    ex.dct["game"].short_description,
+                    ex.dct["msg"],
+                    ",".join([pl.nick_name for pl in ex.dct["players"]]),
                 )
-                lst_game_more_info_needed.append(ex)
+            )
 
         if lst_game_more_info_needed:
             for ex in lst_game_more_info_needed:
@@ -449,43 +870,135 @@ class SQLMenu(Menu):
                 if i == "x":
                     raise Exception("Abort by user")
                 i = int(i)
-                game = (
-                    session.query(Game)
-                    .filter(Game.game_id == ex.dct["game"].game.game_id)
-                    .one()
-                )
-                game.add_hole_dict_data(
-                    ex.dct["hole_num"], {ex.dct["key"]: ex.dct["players"][i].nick_name}
+                game_id = ex.dct["game"].game.game_id
+                dct_data = {ex.dct["key"]: ex.dct["players"][i].nick_name}
+                self.db.retry_unit_of_work(
+                    lambda session: set_game_hole_data(
+                        session, game_id, ex.dct["hole_num"], dct_data
+                    )
                 )
-                session.commit()
 
         self._roundDump()
         self.pushCommands([pause_command])
 
-    def _roundDump(self):
+    @unit_of_work
+    def _roundBulkScores(self, session):
+        """ gbk on|off"""
+        if len(self.lstCmd) < 2 or self.lstCmd[1] not in ("on", "off"):
+            raise InputException("gbk on|off")
+        if self.lstCmd[1] == "on":
+            self._bulk_records = []
+            return
+        records, self._bulk_records = self._bulk_records or [], None
+        start = time.time()
+        dct_info_needed = ingest_scores(session, records)
+        elapsed = time.time() - start
+        print(
+            "{} holes ingested in {:.3f} sec - {:.0f} holes/sec".format(
+                len(records), elapsed, len(records) / elapsed if elapsed else 0
+            )
+        )
+        self._printInfoNeeded(dct_info_needed)
+
+    def _roundWriteBehind(self):
+        """ gwb on [<journal>]|off"""
+        if len(self.lstCmd) < 2 or self.lstCmd[1] not in ("on", "off"):
+            raise InputException("gwb on [<journal>]|off")
+        if self.lstCmd[1] == "on":
+            if self._score_queue is None:
+                journal = self.lstCmd[2] if len(self.lstCmd) > 2 else DEF_JOURNAL
+                self._score_queue = ScoreQueue(self.db, journal)
+            print("{} scores queued".format(len(self._score_queue)))
+            return
+        if self._score_queue is None:
+            return
+        score_queue, self._score_queue = self._score_queue, None
+        start = time.time()
+        score_queue.close()
+        print("queue written in {:.3f} sec".format(time.time() - start))
+        for record, error in score_queue.errors:
+            print(
+                "round {} hole {} not written - {}".format(
+                    record.round_id, record.hole, error
+                )
+            )
+        self._printInfoNeeded(score_queue.info_needed)
+
+    def _printInfoNeeded(self, dct_info_needed):
+        for round_id, lst in dct_info_needed.items():
+            for ex in lst:
+                print(
+                    "round {} - {} Game - {} - {}".format(
+                        round_id,
+                        ex.dct["game"].short_description,
+                        ex.dct["msg"],
+                        ",".join([pl.nick_name for pl in ex.dct["players"]]),
+                    )
+                )
+
+    @unit_of_work
+    def _roundTotals(self, session):
+        """ glb [<round_id>]"""
+        round_id = int(self.lstCmd[1]) if len(self.lstCmd) > 1 else self._round_id
+        if round_id is None:
+            raise InputException("Golf round not created")
+        print(
+            "{:<8} {:>4} {:>4} {:>4} {:>5} {:>5} {:>4}".format(
+                "player", "thru", "out", "in", "gross", "putts", "net"
+            )
+        )
+        for row in round_leaderboard(session, round_id):
+            print(
+                "{:<8} {:>4} {:>4} {:>4} {:>5} {:>5} {:>4}".format(
+                    row.nick_name,
+                    row.holes_played,
+                    row.gross_out,
+                    row.gross_in,
+                    row.gross_total,
+                    row.putts_total,
+                    row.net_total,
+                )
+            )
+
+    @unit_of_work
+    def _roundOdds(self, session):
+        """ god [<trials>]"""
+        if self._round_id is None:
+            raise InputException("Golf round not created")
+        trials = int(self.lstCmd[1]) if len(self.lstCmd) > 1 else DEF_TRIALS
+        golf_round = load_round_snapshot(session, self._round_id)
+        start = time.time()
+        lst_odds = round_odds(session, golf_round, trials)
+        elapsed = time.time() - start
+        for odds in lst_odds:
+            if odds is not None:
+                print(
+                    "{:<15} - {}".format(odds["game"].short_description, odds["line"])
+                )
+        print("{} trials in {:.3f} sec".format(trials, elapsed))
+
+    @unit_of_work
+    def _roundDump(self, session):
         """ dump scorecard, leaderboard, status."""
-        session = self.db.Session()
-        # get round
-        golf_round = session.query(Round).filter(Round.round_id == self._round_id).one()
-        games = [game.CreateGame() for game in golf_round.games]
+        game_results = load_game_results(session, self._round_id)
+        golf_round = session.query(Round).get(self._round_id)
 
-        self._roundScorecard(golf_round, games)
-        self._roundLeaderboard(golf_round, games)
-        self._roundStatus(golf_round, games)
+        self._roundScorecard(golf_round, game_results)
+        self._roundLeaderboard(golf_round, game_results)
+        self._roundStatus(golf_round, game_results)
 
-    def _roundScorecard(self, golf_round, games):
+    def _roundScorecard(self, golf_round, game_results):
         dct = golf_round.getScorecard(ESC=True)
         print(dct["title"])
         print(dct["hdr"])
         print(dct["par"])
         print(dct["hdcp"])
-        for game in games:
-            dct = game.getScorecard()
-            print(dct["header"])
-            for player in dct["players"]:
-                print(player["line"])
+        for game_result in game_results:
+            print(game_result.scorecard["header"])
+            for line in game_result.scorecard["lines"]:
+                print(line)
 
-    def _roundLeaderboard(self, golf_round, games, **kwargs):
+    def _roundLeaderboard(self, golf_round, game_results):
         lstLines = [None for _ in range(10)]
 
         def update_line(index, msg):
@@ -494,29 +1007,29 @@ class SQLMenu(Menu):
             else:
                 lstLines[index] += " {:<22}".format(msg)
 
-        header = "{0:-^22}" if kwargs.get("sort_type") == "money" else "{0:*^22}"
-        for game in games:
-            dctLeaderboard = game.getLeaderboard(**kwargs)
-            update_line(0, header.format(" " + game.short_description + " "))
-            update_line(1, dctLeaderboard["hdr"])
-            for i, dct in enumerate(dctLeaderboard["leaderboard"]):
-                update_line(i + 2, dct["line"])
+        header = "{0:*^22}"
+        for game_result in game_results:
+            update_line(0, header.format(" " + game_result.short_description + " "))
+            update_line(1, game_result.leaderboard["hdr"])
+            for i, line in enumerate(game_result.leaderboard["lines"]):
+                update_line(i + 2, line)
         for line in [line for line in lstLines if line is not None]:
             print(line)
 
-    def _roundStatus(self, golf_round, games):
-        for game in games:
-            dctStatus = game.getStatus()
-            print("{:<15} - {}".format(game.short_description, dctStatus["line"]))
+    def _roundStatus(self, golf_round, game_results):
+        for game_result in game_results:
+            print(
+                "{:<15} - {}".format(game_result.short_description, game_result.status)
+            )
 
-    def _roundSQL(self):
+    @unit_of_work
+    def _roundSQL(self, session):
         """ sql <args>"""
         if self._round_id is None:
             raise InputException("Golf round not created")
         #
-        session = self.db.Session()
         # get round
-        gr = session.query(Round).filter(Round.round_id == self._round_id).one()
+        gr = get_round(session, self._round_id)
         #
         print("round_id:{}".format(gr.round_id))
         print("course_id:{}".format(gr.course_id))
@@ -539,6 +1052,7 @@ class SQLMenu(Menu):
 def main():
     DEF_LOG_ENABLE = "sqlmain"
     DEF_DB_URL = "sqlite:///golf.sqlite"
+    DEF_PROFILE = "default"
     # build the command line arguments
     from optparse import OptionParser
 
@@ -551,6 +1065,15 @@ def main():
         help='SQLAlchemy Comma separated list of log modules to enable, * for all. Default is "%s"'
         % DEF_LOG_ENABLE,
     )
+    parser.add_option(
+        "-p",
+        "--profile",
+        dest="profile",
+        default=DEF_PROFILE,
+        help='SQLite engine profile, one of {}. Default is "{}"'.format(
+            sorted(ENGINE_PROFILES), DEF_PROFILE
+        ),
+    )
     parser.add_option(
         "-m",
         "--logEnable",
@@ -567,6 +1090,15 @@ def main():
         default=False,
         help="list all log options.",
     )
+    parser.add_option(
+        "-e",
+        "--handicapsAsEntered",
+        action="store_true",
+        dest="handicapsAsEntered",
+        default=False,
+        help="completed rounds do not update player handicaps, replay historical"
+        " rounds with the handicaps as entered.",
+    )
     parser.add_option(
         "-y",
         "--runCmdFile",
@@ -588,7 +1120,12 @@ def main():
         logOptions(options.lstLogEnable, options.showLogs, log=log)
 
         # create menu application
-        menu = SQLMenu(url=options.url, cmdFile=options.cmdFile)
+        menu = SQLMenu(
+            url=options.url,
+            profile=options.profile,
+            cmdFile=options.cmdFile,
+            update_handicaps=not options.handicapsAsEntered,
+        )
         menu.runMenu()
 
     except Exception as err:
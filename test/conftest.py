@@ -0,0 +1,67 @@
+"""conftest.py - fixtures shared by the sqlalchemy tests."""
+import pytest
+from golf_db.db_sqlalchemy import Player, Hole, Tee, Course, Round, Result, Score
+from golf_db.db_sqlalchemy import Database
+
+
+@pytest.fixture
+def sess():
+    db = Database("sqlite://")
+    db.create_tables()
+    return db.create_session()
+
+
+def _add_round(
+    sess,
+    num_players,
+    num_holes=18,
+    name="Test",
+    scores=True,
+    pars=None,
+    hole_handicaps=None,
+    handicap_step=1,
+):
+    """Add a course and a round with scores for all players, return round_id.
+
+    The holes are par 4 with handicaps in order unless pars and hole_handicaps
+    of num_holes holes are given. Player n has a handicap of n * handicap_step.
+    """
+    course = Course(name="{} Course".format(name))
+    pars = pars or [4] * num_holes
+    hole_handicaps = hole_handicaps or [n + 1 for n in range(num_holes)]
+    for n, (par, handicap) in enumerate(zip(pars, hole_handicaps)):
+        course.holes.append(Hole(num=n + 1, par=par, handicap=handicap))
+    tee = Tee(gender="mens", name="Blue", rating=70.1, slope=120)
+    course.tees.append(tee)
+    sess.add(course)
+    sess.flush()
+    golf_round = Round(course=course)
+    for n in range(num_players):
+        player = Player(
+            email="{}{}@tl.com".format(name, n),
+            first_name="First{}".format(n),
+            last_name="Last{}".format(n),
+            nick_name="Nick{}".format(n),
+            gender="man",
+            handicap=float(n * handicap_step),
+        )
+        result = Result(
+            round=golf_round,
+            player=player,
+            tee_id=tee.tee_id,
+            handicap=float(n * handicap_step),
+        )
+        result.course_handicap = n * handicap_step
+        for hole in range(num_holes if scores else 0):
+            result.scores.append(Score(num=hole + 1, gross=4 + n % 2, putts=2))
+    golf_round.addGame(sess, "gross", {})
+    golf_round.addGame(sess, "net", {})
+    sess.add(golf_round)
+    sess.commit()
+    return golf_round.round_id
+
+
+@pytest.fixture
+def add_round():
+    """Return function to add a round with scores for all players."""
+    return _add_round
@@ -0,0 +1,63 @@
+"""test_course_cache.py"""
+import pytest
+from golf_db import course_cache
+from golf_db.db_sqlalchemy import Course, Hole, Round, Database
+
+
+@pytest.fixture
+def course(sess, add_round):
+    round_id = add_round(sess, 1)
+    return sess.query(Round).get(round_id).course
+
+
+class TestCourseCache:
+    def test_not_saved(self):
+        course = Course(name="New", course_id=None)
+        course.holes.append(Hole(num=1, par=4, handicap=1))
+        assert course_cache.get(course) is None
+        assert course.calcBumps(1) == [1]
+
+    def test_get(self, course):
+        entry = course_cache.get(course)
+        assert entry is course_cache.get(course)
+        assert entry.total == 72
+        assert len(entry.bumps) == course_cache.MAX_HANDICAP + 1
+
+    @pytest.mark.parametrize("handicap", [-2, 0, 1, 17, 18, 19, 36, 54, 60])
+    def test_bumps(self, course, handicap):
+        assert course.calcBumps(handicap) == course._calcBumps(handicap)
+
+    @pytest.mark.parametrize("ESC", [False, True])
+    def test_scorecard(self, course, ESC):
+        dct = course.getScorecard(ESC=ESC)
+        course_cache.invalidate()
+        lines = course._renderScorecard(36, 36, 72, ESC)
+        assert dct == dict(title=dct["title"], **lines)
+        assert course.total == 72
+
+    def test_invalidate_on_update(self, sess, course):
+        entry = course_cache.get(course)
+        course.holes[0].handicap = 18
+        course.holes[17].handicap = 1
+        sess.commit()
+        assert course_cache.get(course) is not entry
+        assert course.calcBumps(1)[17] == 1
+
+    def test_invalidate(self, course):
+        entry = course_cache.get(course)
+        course_cache.invalidate(course.course_id)
+        assert course_cache.get(course) is not entry
+
+    def test_two_databases(self, course, add_round):
+        """The same course_id in another database is another course."""
+        db = Database("sqlite://")
+        db.create_tables()
+        other_sess = db.create_session()
+        other = other_sess.query(Round).get(add_round(other_sess, 1, num_holes=9))
+        assert other.course.course_id == course.course_id
+        assert course_cache.get(course).total == 72
+        assert course_cache.get(other.course).total == 36
+        entry = course_cache.get(course)
+        course_cache.invalidate(course.course_id, other_sess.bind)
+        assert course_cache.get(course) is entry
+        assert other.course.calcBumps(9) == [1] * 9
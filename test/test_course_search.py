@@ -0,0 +1,99 @@
+"""test_course_search.py"""
+import pytest
+from golf_db import course_search
+from golf_db.course_search import CourseIndex, name_key
+from golf_db.db_sqlalchemy import Course
+
+NAMES = [
+    "Canyon Lakes",
+    "Boundary Oak Lake/Canyon",
+    "Lake Chabot",
+    "Los Lagos Golf Course",
+    "Las Positas Golf Course",
+    "San Ramon Royal Vista",
+]
+
+
+@pytest.fixture
+def index():
+    return CourseIndex(enumerate(NAMES, 1))
+
+
+class TestNameKey:
+    @pytest.mark.parametrize(
+        "name, key",
+        [
+            ("Canyon Lakes", "canyon lakes"),
+            ("  Boundary Oak  Lake/Canyon ", "boundary oak lake canyon"),
+            ("St. Andrew's_Old", "st andrew s old"),
+            ("", ""),
+        ],
+    )
+    def test_name_key(self, name, key):
+        assert name_key(name) == key
+
+
+class TestCourseIndex:
+    def test_exact(self, index):
+        assert index.search("canyon lakes")[0] == (1, "Canyon Lakes", 0)
+
+    def test_prefix(self, index):
+        (match,) = index.search("Los")
+        assert (match.name, match.rank) == ("Los Lagos Golf Course", 1)
+
+    def test_ranked(self, index):
+        matches = index.search("Canyon")
+        assert [match.name for match in matches] == [
+            "Canyon Lakes",
+            "Boundary Oak Lake/Canyon",
+        ]
+        assert [match.rank for match in matches] == [1, 2]
+
+    def test_word_prefixes(self, index):
+        matches = index.search("golf las")
+        assert [match.name for match in matches] == ["Las Positas Golf Course"]
+        assert matches[0].rank == course_search.RANK_WORDS
+
+    def test_phrase(self, index):
+        matches = index.search("Lake/Canyon")
+        assert [match.course_id for match in matches] == [2, 1]
+        assert matches[0].rank == course_search.RANK_PHRASE
+
+    def test_limit(self, index):
+        assert len(index.search("la", limit=2)) == 2
+
+    @pytest.mark.parametrize("text", ["", "  ", "xyz", "canyon xyz", "anyon"])
+    def test_no_match(self, index, text):
+        assert index.search(text) == []
+
+
+class TestCourseSearch:
+    def test_search(self, sess):
+        sess.add_all([Course(name=name) for name in NAMES])
+        sess.commit()
+        matches = Course.search(sess, "lake")
+        assert [match.name for match in matches][:2] == ["Lake Chabot", "Canyon Lakes"]
+
+    def test_index_invalidated(self, sess):
+        sess.add(Course(name="Canyon Lakes"))
+        sess.commit()
+        assert len(Course.search(sess, "canyon")) == 1
+        sess.add(Course(name="Lake/Canyon"))
+        sess.commit()
+        assert len(Course.search(sess, "canyon")) == 2
+        course = Course.find(sess, "Lake/Canyon")
+        course.name = "Mountain"
+        sess.commit()
+        assert len(Course.search(sess, "canyon")) == 1
+        assert Course.find(sess, "mount") is course
+
+    def test_find(self, sess):
+        sess.add_all([Course(name=name) for name in NAMES])
+        sess.commit()
+        assert Course.find(sess, "CANYON  lakes").name == "Canyon Lakes"
+        assert Course.find(sess, "Positas").name == "Las Positas Golf Course"
+        assert Course.find(sess, "Pebble") is None
+
+    def test_name_key_column(self, sess):
+        course = Course(name="Boundary Oak Lake/Canyon")
+        assert course.name_key == "boundary oak lake canyon"
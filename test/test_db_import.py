@@ -0,0 +1,158 @@
+"""test_db_import.py"""
+import json
+import pytest
+from sqlalchemy import event
+from golf_db.db_sqlalchemy import Player, Course, Hole, Tee
+from golf_db.db_import import import_players, import_courses
+from golf_db.data.test_courses import DBGolfCourses
+from golf_db.data.test_players import DBGolfPlayers
+from golf_db.exceptions import GolfDBException
+
+
+def _write_jsonl(path, records):
+    with open(str(path), "w") as fp:
+        for dct in records:
+            fp.write(json.dumps(dct) + "\n")
+    return str(path)
+
+
+class TestImportPlayers:
+    def test_jsonl(self, sess, tmp_path):
+        path = _write_jsonl(tmp_path / "players.jsonl", DBGolfPlayers)
+        result = import_players(sess, path, batch_size=2)
+        assert result.rows == len(DBGolfPlayers)
+        assert result.inserted == len(DBGolfPlayers)
+        assert sess.query(Player).count() == len(DBGolfPlayers)
+
+    def test_duplicates(self, sess, tmp_path):
+        path = _write_jsonl(tmp_path / "players.jsonl", DBGolfPlayers * 2)
+        import_players(sess, path, batch_size=3)
+        result = import_players(sess, path)
+        assert result.inserted == 0
+        assert result.duplicates == 2 * len(DBGolfPlayers)
+        assert sess.query(Player).count() == len(DBGolfPlayers)
+
+    def test_csv(self, sess, tmp_path):
+        path = tmp_path / "players.csv"
+        path.write_text(
+            "email,first_name,last_name,nick_name,handicap,gender\n"
+            "a@tl.com,Al,Able,Al,12.4,man\n"
+            "b@tl.com,Bea,Baker,Bea,,woman\n"
+        )
+        assert import_players(sess, str(path)).inserted == 2
+        players = sess.query(Player).order_by(Player.email).all()
+        assert [p.handicap for p in players] == [12.4, None]
+        assert players[1].gender == "woman"
+
+    def test_scratch(self, sess, tmp_path):
+        records = [
+            dict(DBGolfPlayers[0], handicap=0),
+            dict(DBGolfPlayers[1], handicap=0.0),
+        ]
+        path = _write_jsonl(tmp_path / "players.jsonl", records)
+        import_players(sess, path)
+        path = tmp_path / "players.csv"
+        path.write_text(
+            "email,first_name,last_name,nick_name,handicap,gender\n"
+            "a@tl.com,Al,Able,Al,0,man\n"
+        )
+        import_players(sess, str(path))
+        players = sess.query(Player).all()
+        assert [p.handicap for p in players] == [0.0, 0.0, 0.0]
+        assert str(players[0])
+
+    def test_batches(self, sess, tmp_path):
+        records = [
+            dict(email="p{}@tl.com".format(n), nick_name="P{}".format(n), gender="man")
+            for n in range(10)
+        ]
+        path = _write_jsonl(tmp_path / "players.jsonl", records)
+        inserts = []
+
+        @event.listens_for(sess.bind, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT"):
+                inserts.append(len(parameters))
+
+        import_players(sess, path, batch_size=4)
+        assert inserts == [4, 4, 2]
+
+    def test_bad_record(self, sess, tmp_path):
+        records = [dict(DBGolfPlayers[0]), dict(DBGolfPlayers[1], gender="other")]
+        path = _write_jsonl(tmp_path / "players.jsonl", records)
+        with pytest.raises(GolfDBException, match="line 2"):
+            import_players(sess, path, batch_size=1)
+        assert sess.query(Player).count() == 1
+
+    def test_file_type(self, sess, tmp_path):
+        with pytest.raises(GolfDBException):
+            import_players(sess, str(tmp_path / "players.txt"))
+
+
+class TestImportCourses:
+    def test_jsonl(self, sess, tmp_path):
+        path = _write_jsonl(tmp_path / "courses.jsonl", DBGolfCourses * 2)
+        result = import_courses(sess, path, batch_size=2)
+        assert result.inserted == len(DBGolfCourses)
+        assert result.duplicates == len(DBGolfCourses)
+        for dct in DBGolfCourses:
+            course = sess.query(Course).filter(Course.name == dct["name"]).one()
+            assert [hole.par for hole in course.holes] == [
+                hole["par"] for hole in dct["holes"]
+            ]
+            assert [hole.num for hole in course.holes] == list(range(1, 19))
+            assert len(course.tees) == len(dct["tees"])
+        assert sess.query(Hole).count() == 18 * len(DBGolfCourses)
+
+    def test_csv(self, sess, tmp_path):
+        path = tmp_path / "courses.csv"
+        path.write_text(
+            "name,pars,handicaps,tees\n"
+            "Short,4 3 5,2 3 1,mens/Blue/35.2/121;womens/Red/36.0/118\n"
+        )
+        assert import_courses(sess, str(path)).inserted == 1
+        course = sess.query(Course).one()
+        assert [hole.handicap for hole in course.holes] == [2, 3, 1]
+        tee = sess.query(Tee).filter(Tee.gender == "womens").one()
+        assert (tee.name, tee.rating, tee.slope) == ("Red", 36.0, 118)
+
+    def test_csv_empty_tees(self, sess, tmp_path):
+        path = tmp_path / "courses.csv"
+        path.write_text(
+            "name,pars,handicaps,tees\n"
+            "Short,4 3 5,2 3 1,mens/Blue/35.2/121;\n"
+            "Other,4 3 5,2 3 1,\n"
+        )
+        assert import_courses(sess, str(path)).inserted == 2
+        assert sess.query(Tee).count() == 1
+
+    @pytest.mark.parametrize(
+        "header,row",
+        [
+            ("name,pars,handicaps,tees", "Short,4 3 5,2 3 1,mens/Blue/35.2"),
+            ("name,pars,handicaps,tees", "Short,4 3 5,2 3 1,mens/Blue/low/121"),
+            ("name,pars,handicaps,tees", "Short,4 x 5,2 3 1,mens/Blue/35.2/121"),
+            ("name,pars,handicaps,tees", "Short,4 3 5,2 3,mens/Blue/35.2/121"),
+            ("name,pars,tees", "Short,4 3 5,mens/Blue/35.2/121"),
+        ],
+    )
+    def test_csv_bad_record(self, sess, tmp_path, header, row):
+        path = tmp_path / "courses.csv"
+        path.write_text("{}\n{}\n".format(header, row))
+        with pytest.raises(GolfDBException, match="line 2 - "):
+            import_courses(sess, str(path))
+
+    def test_bad_tee_gender(self, sess, tmp_path):
+        tee = dict(DBGolfCourses[0]["tees"][0], gender="man")
+        course = dict(DBGolfCourses[0], tees=[tee])
+        path = _write_jsonl(tmp_path / "courses.jsonl", [course])
+        with pytest.raises(GolfDBException, match='line 1 - tee gender "man"'):
+            import_courses(sess, path)
+        assert sess.query(Course).count() == 0
+
+    def test_bad_par(self, sess, tmp_path):
+        course = dict(DBGolfCourses[0], holes=[{"par": 7, "handicap": 1}])
+        path = _write_jsonl(tmp_path / "courses.jsonl", [course])
+        with pytest.raises(GolfDBException, match="par"):
+            import_courses(sess, path)
+        assert sess.query(Course).count() == 0
@@ -0,0 +1,67 @@
+"""test_db_ingest.py"""
+import pytest
+from sqlalchemy import event
+from golf_db.db_sqlalchemy import Score, load_round_snapshot
+from golf_db.db_ingest import ScoreRecord, ingest_scores
+from golf_db.exceptions import GolfDBException
+
+
+class TestIngestScores:
+    def test_ingest(self, sess, add_round):
+        round_ids = [
+            add_round(sess, 2, num_holes=3, name="One", scores=False),
+            add_round(sess, 3, num_holes=3, name="Two", scores=False),
+        ]
+        records = [ScoreRecord(round_ids[0], n + 1, [4, 5], [2, 2]) for n in range(3)]
+        records += [ScoreRecord(round_ids[1], n + 1, [3, 4, 5]) for n in range(3)]
+        versions = [load_round_snapshot(sess, rid).version for rid in round_ids]
+        assert ingest_scores(sess, records) == {}
+        assert sess.query(Score).count() == 15
+        for round_id, version in zip(round_ids, versions):
+            golf_round = load_round_snapshot(sess, round_id)
+            assert golf_round.version == version + 1
+            assert golf_round.get_completed_holes() == 3
+        golf_round = load_round_snapshot(sess, round_ids[0])
+        assert [sc.putts for sc in golf_round.results[0].scores] == [2, 2, 2]
+
+    def test_ingest_one_insert(self, sess, add_round):
+        round_id = add_round(sess, 4, name="One", scores=False)
+        records = [ScoreRecord(round_id, n + 1, [4, 5, 6, 7]) for n in range(18)]
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            if statement.startswith("INSERT INTO scores"):
+                statements.append(many)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            ingest_scores(sess, records)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        assert statements == [True]
+        assert sess.query(Score).count() == 72
+
+    def test_ingest_options(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3, scores=False)
+        options = {"gross": {"closest": "Nick0"}}
+        ingest_scores(sess, [ScoreRecord(round_id, 2, [4, 5], None, options)])
+        golf_round = load_round_snapshot(sess, round_id)
+        game = [game for game in golf_round.games if game.game_type == "gross"][0]
+        assert game.game_data[2] == {"closest": "Nick0"}
+
+    @pytest.mark.parametrize(
+        "record",
+        [
+            ScoreRecord(1, 0, [4, 5]),
+            ScoreRecord(1, 4, [4, 5]),
+            ScoreRecord(1, 1, [4]),
+            ScoreRecord(1, 1, [4, 5], [2]),
+            ScoreRecord(2, 1, [4, 5]),
+        ],
+    )
+    def test_ingest_fail(self, sess, add_round, record):
+        add_round(sess, 2, num_holes=3, scores=False)
+        with pytest.raises(GolfDBException):
+            ingest_scores(sess, [ScoreRecord(1, 1, [4, 5]), record])
+        assert sess.query(Score).count() == 0
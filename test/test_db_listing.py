@@ -0,0 +1,98 @@
+"""test_db_listing.py"""
+import datetime
+from sqlalchemy import event
+from golf_db.db_sqlalchemy import Round
+from golf_db.db_listing import list_rounds, round_leaderboard
+
+
+def _add_rounds(sess, add_round, count):
+    """Add rounds on consecutive days, two per day, return round_ids."""
+    round_ids = []
+    for n in range(count):
+        round_id = add_round(sess, 2, num_holes=1, name="R{}".format(n), scores=False)
+        golf_round = sess.query(Round).get(round_id)
+        golf_round.date_played = datetime.date(2020, 1, 1 + n // 2)
+        round_ids.append(round_id)
+    sess.commit()
+    return round_ids
+
+
+class TestListRounds:
+    def test_pages(self, sess, add_round):
+        round_ids = _add_rounds(sess, add_round, 7)
+        listed, cursor, pages = [], None, 0
+        while True:
+            page = list_rounds(sess, limit=3, cursor=cursor)
+            listed += [row.round_id for row in page.rows]
+            pages += 1
+            cursor = page.cursor
+            if cursor is None:
+                break
+        assert pages == 3
+        assert listed == list(reversed(round_ids))
+
+    def test_row(self, sess, add_round):
+        _add_rounds(sess, add_round, 1)
+        (row,) = list_rounds(sess).rows
+        assert row.course_name == "R0 Course"
+        assert row.players == ["Nick0", "Nick1"]
+        assert str(row) == "2020-01-01 R0 Course                      - Nick0,Nick1"
+
+    def test_exact_page(self, sess, add_round):
+        _add_rounds(sess, add_round, 2)
+        page = list_rounds(sess, limit=2)
+        assert len(page.rows) == 2
+        assert page.cursor is None
+
+    def test_filters(self, sess, add_round):
+        round_ids = _add_rounds(sess, add_round, 6)
+        golf_round = sess.query(Round).get(round_ids[2])
+        rows = list_rounds(sess, course_id=golf_round.course_id).rows
+        assert [row.round_id for row in rows] == [round_ids[2]]
+        player_id = golf_round.results[0].player_id
+        rows = list_rounds(sess, player_id=player_id).rows
+        assert [row.round_id for row in rows] == [round_ids[2]]
+        day = datetime.date(2020, 1, 2)
+        rows = list_rounds(sess, start=day, end=day).rows
+        assert [row.round_id for row in rows] == [round_ids[3], round_ids[2]]
+
+    def test_two_queries(self, sess, add_round):
+        _add_rounds(sess, add_round, 5)
+        sess.expire_all()
+        statements = []
+
+        @event.listens_for(sess.bind, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        page = list_rounds(sess, limit=4)
+        assert len(statements) == 2
+        assert len(page.rows) == 4
+
+    def test_empty(self, sess):
+        page = list_rounds(sess)
+        assert page.rows == []
+        assert page.cursor is None
+
+
+class TestRoundLeaderboard:
+    def test_leaderboard(self, sess, add_round):
+        round_id = add_round(sess, 3, num_holes=9)
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            rows = round_leaderboard(sess, round_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        assert [row.nick_name for row in rows] == ["Nick2", "Nick0", "Nick1"]
+        assert [(row.gross_total, row.net_total) for row in rows] == [
+            (36, 34),
+            (36, 36),
+            (45, 44),
+        ]
+        assert not any("scores" in statement for statement in statements)
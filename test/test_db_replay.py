@@ -0,0 +1,91 @@
+"""test_db_replay.py"""
+import datetime
+import pytest
+from golf_db.db_replay import replay_rounds
+from golf_db.db_sqlalchemy import Database, Game, GameResult, Round
+from golf_db.db_sqlalchemy import Result, Season, SeasonRound
+from golf_db.exceptions import GolfDBException
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    # the pool processes open the same database file
+    db = Database("sqlite:///{}".format(tmp_path / "golf.sqlite"))
+    db.create_tables()
+    yield db
+    db.close()
+
+
+def _add_rounds(db, add_round, count):
+    session = db.create_session()
+    round_ids = [add_round(session, 2, name="Replay{}".format(n)) for n in range(count)]
+    session.close()
+    return round_ids
+
+
+class TestReplay:
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_replay(self, file_db, add_round, processes):
+        _add_rounds(file_db, add_round, 3)
+        result = replay_rounds(file_db, processes=processes)
+        assert (result.rounds, result.games, result.errors) == (3, 6, [])
+        with file_db.unit_of_work() as session:
+            versions = dict(session.query(Game.game_id, Round.version).join(Round))
+            rows = session.query(GameResult).all()
+            assert sorted(row.game_id for row in rows) == sorted(versions)
+            assert all(row.round_version == versions[row.game_id] for row in rows)
+
+    def test_round_ids(self, file_db, add_round):
+        round_ids = _add_rounds(file_db, add_round, 3)
+        result = replay_rounds(file_db, round_ids=round_ids[1:], processes=1)
+        assert (result.rounds, result.games) == (2, 4)
+
+    def test_course_handicaps(self, file_db, add_round):
+        round_id = _add_rounds(file_db, add_round, 1)[0]
+        with file_db.unit_of_work() as session:
+            session.add(
+                Season(
+                    name="all",
+                    start_date=datetime.date(2000, 1, 1),
+                    end_date=datetime.date(2100, 1, 1),
+                )
+            )
+            golf_round = session.query(Round).get(round_id)
+            # the handicap index changed after the course handicap was set
+            golf_round.results[1].handicap = 20.0
+            golf_round.refreshGameResults(session)
+            golf_round.postSeasons(session)
+        for course_handicaps, expected in ((False, [0, 1]), (True, [0, 21])):
+            replay_rounds(file_db, processes=1, course_handicaps=course_handicaps)
+            with file_db.unit_of_work() as session:
+                results = session.query(Result).order_by(Result.result_id).all()
+                assert [r.course_handicap for r in results] == expected
+                assert results[1].net_total == 90 - expected[1]
+                # the standings are posted at the replayed version
+                posted = session.query(SeasonRound).one()
+                assert posted.round_version == session.query(Round).one().version
+                season = session.query(Season).one()
+                standings = season.getStandings(session, "net")
+                assert {row.nick_name: row.total for row in standings} == {
+                    "Nick0": 72,
+                    "Nick1": 90 - expected[1],
+                }
+
+    def test_error(self, file_db, add_round):
+        round_ids = _add_rounds(file_db, add_round, 2)
+        with file_db.unit_of_work() as session:
+            # six point needs 3 players, the round has 2
+            golf_round = session.query(Round).get(round_ids[0])
+            golf_round.addGame(session, "six_point", {})
+        result = replay_rounds(file_db, processes=1)
+        assert result.rounds == 2
+        assert [round_id for round_id, _ in result.errors] == [round_ids[0]]
+        assert result.games == 2
+
+    def test_memory(self, add_round):
+        db = Database("sqlite://")
+        db.create_tables()
+        _add_rounds(db, add_round, 2)
+        with pytest.raises(GolfDBException):
+            replay_rounds(db, processes=2)
+        assert replay_rounds(db, processes=1).games == 4
@@ -1,14 +1,36 @@
 """test_db_sqlalchemy.py"""
+import datetime
 import pytest
-from golf_db.db_sqlalchemy import Player, Hole, Tee, Course
-from golf_db.db_sqlalchemy import Database, DBAdmin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm.exc import StaleDataError
+from golf_db.db_sqlalchemy import Player, Hole, Tee, Course, Round, Result, Game, Score
+from golf_db.db_sqlalchemy import Differential, Season, SeasonRound, Standing
+from golf_db.db_sqlalchemy import GameResult, Database, DBAdmin
+from golf_db.db_sqlalchemy import load_round_snapshot, load_game_results, get_round
+from golf_db.db_sqlalchemy import post_scores
+from golf_db.exceptions import GolfDBConflict, GolfDBException
+from golf_db.handicap import handicap_index
 
 
 # in-memory database
 test_golf_url = "sqlite://"
 test_golf_admin_url = "sqlite://"
 tables = sorted(
-    ["games", "holes", "players", "results", "scores", "rounds", "tees", "courses"]
+    [
+        "games",
+        "game_results",
+        "holes",
+        "players",
+        "results",
+        "scores",
+        "rounds",
+        "tees",
+        "courses",
+        "differentials",
+        "seasons",
+        "season_rounds",
+        "standings",
+    ]
 )
 
 
@@ -17,13 +39,6 @@ def db():
     return Database(test_golf_url)
 
 
-@pytest.fixture
-def sess():
-    db = Database(test_golf_url)
-    db.create_tables()
-    return db.create_session()
-
-
 @pytest.fixture
 def db_admin():
     return DBAdmin(test_golf_admin_url)
@@ -47,6 +62,153 @@ class TestDatabase:
         database_tables = db.list_tables()
         assert database_tables == tables
 
+    def test_indexes(self, db):
+        db.create_tables()
+        indexes = [
+            ("holes", "ix_holes_course_num_par", False),
+            ("tees", "ix_tees_course_gender_name", False),
+            ("scores", "ux_scores_result_num", True),
+            ("results", "ix_results_round_id", False),
+            ("games", "ix_games_round_type", False),
+            ("rounds", "ix_rounds_date", False),
+        ]
+        inspector = inspect(db.engine)
+        for table, name, unique in indexes:
+            dct = {ix["name"]: ix for ix in inspector.get_indexes(table)}
+            assert name in dct
+            assert bool(dct[name]["unique"]) == unique
+
+    def test_upgrade_tables(self, db, add_round):
+        db.create_tables()
+        add_round(db.create_session(), 1, num_holes=1, scores=False)
+        db.engine.execute("DROP INDEX ux_scores_result_num")
+        db.engine.execute("DROP INDEX ix_games_round_type")
+        for gross in (5, 6):
+            db.engine.execute(
+                "INSERT INTO scores (result_id, num, gross) VALUES (1, 1, {})".format(
+                    gross
+                )
+            )
+        created = db.upgrade_tables()
+        assert sorted(created) == ["ix_games_round_type", "ux_scores_result_num"]
+        assert db.engine.execute("SELECT gross FROM scores").fetchall() == [(6,)]
+        assert db.upgrade_tables() == []
+
+    def test_upgrade_tables_add_column(self, db):
+        db.create_tables()
+        db.engine.execute("DROP TABLE rounds")
+        db.engine.execute(
+            "CREATE TABLE rounds (round_id INTEGER PRIMARY KEY,"
+            " course_id INTEGER REFERENCES courses (course_id),"
+            " date_played DATE, dict_options TEXT)"
+        )
+        db.engine.execute("INSERT INTO courses (course_id, name) VALUES (1, 'Test')")
+        db.engine.execute("INSERT INTO rounds VALUES (1, 1, '2018-03-04', '{}')")
+        assert sorted(db.upgrade_tables()) == [
+            "ix_rounds_course_date",
+            "ix_rounds_date",
+            "rounds.version",
+        ]
+        assert db.engine.execute("SELECT version FROM rounds").scalar() == 0
+
+    def test_upgrade_tables_name_key(self, db):
+        db.create_tables()
+        db.engine.execute("DROP TABLE courses")
+        db.engine.execute(
+            "CREATE TABLE courses (course_id INTEGER PRIMARY KEY,"
+            " name VARCHAR(132) NOT NULL UNIQUE)"
+        )
+        db.engine.execute("INSERT INTO courses VALUES (1, 'Lake/Canyon')")
+        assert db.upgrade_tables() == ["courses.name_key", "ix_courses_name_key"]
+        name_key = db.engine.execute("SELECT name_key FROM courses").scalar()
+        assert name_key == "lake canyon"
+
+    def test_upgrade_tables_totals(self, db, add_round):
+        db.create_tables()
+        add_round(db.create_session(), 2, num_holes=3)
+        for name in Result.TOTALS:
+            db.engine.execute("ALTER TABLE results DROP COLUMN {}".format(name))
+        created = db.upgrade_tables()
+        assert created == ["results.{}".format(name) for name in Result.TOTALS]
+        rows = db.engine.execute(
+            "SELECT holes_played, gross_total, putts_total, net_total FROM results"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [(3, 12, 6, 12), (3, 15, 6, 14)]
+
+    def test_upgrade_tables_baseline_results(self, db, add_round):
+        """Results without totals and cascade are rebuilt and their totals filled."""
+        db.create_tables()
+        add_round(db.create_session(), 2, num_holes=3)
+        db.engine.execute("PRAGMA foreign_keys=OFF")
+        db.engine.execute("ALTER TABLE results RENAME TO old_results")
+        db.engine.execute(
+            "CREATE TABLE results (result_id INTEGER PRIMARY KEY,"
+            " round_id INTEGER NOT NULL REFERENCES rounds (round_id),"
+            " player_id INTEGER NOT NULL REFERENCES players (player_id),"
+            " tee_id INTEGER NOT NULL REFERENCES tees (tee_id),"
+            " handicap FLOAT, course_handicap INTEGER)"
+        )
+        db.engine.execute(
+            "INSERT INTO results SELECT result_id, round_id, player_id, tee_id,"
+            " handicap, course_handicap FROM old_results"
+        )
+        db.engine.execute("DROP TABLE old_results")
+        db.engine.execute("PRAGMA foreign_keys=ON")
+        created = db.upgrade_tables()
+        assert created[0] == "results foreign keys"
+        assert "results.holes_played" in created
+        rows = db.engine.execute(
+            "SELECT holes_played, gross_total, putts_total, net_total FROM results"
+        ).fetchall()
+        assert [tuple(row) for row in rows] == [(3, 12, 6, 12), (3, 15, 6, 14)]
+        session = db.create_session()
+        assert Result.checkTotals(session) == []
+        assert session.query(Round).one().is_complete()
+
+    def test_upgrade_tables_foreign_keys(self, db, add_round):
+        db.create_tables()
+        round_id = add_round(db.create_session(), 2, num_holes=3)
+        db.engine.execute("PRAGMA foreign_keys=OFF")
+        db.engine.execute("ALTER TABLE scores RENAME TO old_scores")
+        db.engine.execute(
+            "CREATE TABLE scores (score_id INTEGER PRIMARY KEY,"
+            " result_id INTEGER NOT NULL REFERENCES results (result_id),"
+            " num INTEGER NOT NULL, gross INTEGER NOT NULL, putts INTEGER)"
+        )
+        db.engine.execute("INSERT INTO scores SELECT * FROM old_scores")
+        db.engine.execute("DROP TABLE old_scores")
+        db.engine.execute("PRAGMA foreign_keys=ON")
+        assert db.upgrade_tables() == ["scores foreign keys"]
+        assert db.upgrade_tables() == []
+        assert db.engine.execute("SELECT count(*) FROM scores").scalar() == 6
+        indexes = [ix["name"] for ix in inspect(db.engine).get_indexes("scores")]
+        assert indexes == ["ux_scores_result_num"]
+        session = db.create_session()
+        Round.delete(session, round_id)
+        session.commit()
+        assert db.engine.execute("SELECT count(*) FROM scores").scalar() == 0
+
+    def test_profile_default(self, db):
+        assert db.profile == "default"
+        assert db.get_pragmas() == {}
+
+    @pytest.mark.parametrize(
+        "profile, synchronous", [("durable", 2), ("fast", 1)],
+    )
+    def test_profile(self, tmp_path, profile, synchronous):
+        url = "sqlite:///{}".format(tmp_path / "golf.sqlite")
+        db = Database(url, profile=profile)
+        db.create_tables()
+        pragmas = db.get_pragmas()
+        assert pragmas["journal_mode"] == "wal"
+        assert pragmas["synchronous"] == synchronous
+        assert pragmas["busy_timeout"] == 5000
+        assert pragmas["temp_store"] == 2
+
+    def test_profile_not_supported(self):
+        with pytest.raises(GolfDBException):
+            Database(test_golf_url, profile="turbo")
+
 
 class TestDBAdmin:
     def test_init(self, db_admin):
@@ -175,6 +337,7 @@ class TestHole:
 
     @pytest.mark.parametrize("dct", lst_valid_holes)
     def test_insert(self, sess, dct):
+        sess.add(Course(name="Test"))
         h = Hole(**dct)
         sess.add(h)
         sess.commit()
@@ -214,6 +377,7 @@ class TestTees:
 
     @pytest.mark.parametrize("dct", lst_valid_tees)
     def test_insert(self, sess, dct):
+        sess.add(Course(name="Test"))
         t = Tee(**dct)
         sess.add(t)
         sess.commit()
@@ -227,8 +391,697 @@ class TestTees:
 
 
 class TestCourse:
-    lst_columns = ["course_id", "name"]
+    lst_columns = ["course_id", "name", "name_key"]
     lst_all_columns = lst_columns + ["holes", "tees", "round"]
 
     def test_columns(self):
         assert Course.__table__.columns.keys() == self.lst_columns
+
+
+class TestGame:
+    def _add_game(self, sess, dict_data):
+        course = Course(name="Test Course")
+        golf_round = Round(course=course)
+        game = Game(round=golf_round, game_type="snake", dict_data=dict_data)
+        sess.add(game)
+        sess.commit()
+        return game.game_id
+
+    def test_game_data_json(self, sess):
+        game_id = self._add_game(sess, {"options": {"snake_type": "Hold"}})
+        raw = sess.execute("select dict_data from games").scalar()
+        assert raw == '{"options": {"snake_type": "Hold"}}'
+        game = sess.query(Game).filter(Game.game_id == game_id).one()
+        assert game.game_data == {"options": {"snake_type": "Hold"}}
+
+    def test_add_hole_dict_data(self, sess):
+        game_id = self._add_game(sess, {"options": {}})
+        game = sess.query(Game).filter(Game.game_id == game_id).one()
+        game.add_hole_dict_data(3, {"closest_3_putt": "Spanky"})
+        assert game in sess.dirty
+        sess.commit()
+        sess.expire_all()
+        game = sess.query(Game).filter(Game.game_id == game_id).one()
+        assert game.game_data[3] == {"closest_3_putt": "Spanky"}
+
+    def test_game_data_decoded_once(self, sess):
+        game_id = self._add_game(sess, {"options": {}})
+        game = sess.query(Game).filter(Game.game_id == game_id).one()
+        assert game.game_data is game.game_data
+
+    def test_game_data_legacy_repr(self, sess):
+        game_id = self._add_game(sess, {})
+        sess.execute(
+            "update games set dict_data = :data",
+            {"data": str({"options": {"wager": "0.5"}, 8: {"qualified": "Hammy"}})},
+        )
+        sess.expire_all()
+        game = sess.query(Game).filter(Game.game_id == game_id).one()
+        assert game.game_data == {
+            "options": {"wager": "0.5"},
+            8: {"qualified": "Hammy"},
+        }
+
+
+class TestRound:
+    def test_options(self, sess):
+        golf_round = Round(course=Course(name="Test Course"))
+        assert golf_round.get_option("calc_course_handicap") is None
+        golf_round.set_option("calc_course_handicap", "simple")
+        sess.add(golf_round)
+        sess.commit()
+        sess.expire_all()
+        assert golf_round.get_option("calc_course_handicap") == "simple"
+
+
+class TestRoundSnapshot:
+    def _count_statements(self, sess, round_id):
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            sess.expunge_all()
+            golf_round = load_round_snapshot(sess, round_id)
+            for result in golf_round.results:
+                result.player.nick_name
+                [score.gross for score in result.scores]
+            [hole.par for hole in golf_round.course.holes]
+            [tee.slope for tee in golf_round.course.tees]
+            [game.CreateGame() for game in golf_round.games]
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        return len(statements)
+
+    def test_snapshot(self, sess, add_round):
+        round_id = add_round(sess, 4)
+        golf_round = load_round_snapshot(sess, round_id)
+        assert golf_round.round_id == round_id
+        assert len(golf_round.results) == 4
+        assert len(golf_round.course.holes) == 18
+        assert [len(result.scores) for result in golf_round.results] == 4 * [18]
+
+    def test_statements_fixed(self, sess, add_round):
+        round_id = add_round(sess, 2, name="Two")
+        two_players = self._count_statements(sess, round_id)
+        round_id = add_round(sess, 8, name="Eight")
+        eight_players = self._count_statements(sess, round_id)
+        assert two_players == eight_players
+        assert eight_players <= 6
+
+
+class TestRoundScores:
+    def _scores(self, sess, round_id, hole):
+        sess.expire_all()
+        golf_round = load_round_snapshot(sess, round_id)
+        lst = []
+        for result in golf_round.results:
+            lst.extend([(sc.gross, sc.putts) for sc in result.scores if sc.num == hole])
+        return lst
+
+    def test_add_scores(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        golf_round = load_round_snapshot(sess, round_id)
+        for result in golf_round.results:
+            for score in result.scores[1:]:
+                sess.delete(score)
+        sess.commit()
+        golf_round.addScores(sess, 2, {"lstGross": [5, 6], "lstPutts": [2, 3]})
+        sess.commit()
+        assert self._scores(sess, round_id, 2) == [(5, 2), (6, 3)]
+
+    @pytest.mark.parametrize("on_conflict", [True, False])
+    def test_correct_scores(self, sess, add_round, monkeypatch, on_conflict):
+        monkeypatch.setattr(Score, "use_on_conflict", lambda session: on_conflict)
+        round_id = add_round(sess, 2, num_holes=3)
+        golf_round = load_round_snapshot(sess, round_id)
+        version = golf_round.version
+        golf_round.addScores(sess, 2, {"lstGross": [7, 3], "lstPutts": [3, 1]})
+        sess.commit()
+        assert golf_round.version == version + 1
+        assert self._scores(sess, round_id, 2) == [(7, 3), (3, 1)]
+        assert sess.query(Score).count() == 6
+        golf_round = load_round_snapshot(sess, round_id)
+        golf_round.addScores(sess, 2, {"lstGross": [6, 4]})
+        sess.commit()
+        assert golf_round.version == version + 2
+        assert self._scores(sess, round_id, 2) == [(6, None), (4, None)]
+
+    def test_add_scores_bad_hole(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        golf_round = load_round_snapshot(sess, round_id)
+        with pytest.raises(GolfDBException):
+            golf_round.addScores(sess, 4, {"lstGross": [5, 6]})
+        with pytest.raises(GolfDBException):
+            golf_round.addScores(sess, 1, {"lstGross": [5]})
+
+
+class TestGameResults:
+    def _count_selects(self, sess, round_id):
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            game_results = load_game_results(sess, round_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        return game_results, len(statements)
+
+    def test_load(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        assert sess.query(GameResult).count() == 0
+        game_results, _ = self._count_selects(sess, round_id)
+        assert [gr.short_description for gr in game_results] == ["Gross", "Net"]
+        assert [len(gr.scorecard["lines"]) for gr in game_results] == [2, 2]
+        assert game_results[0].status == "Round complete"
+        game_results, selects = self._count_selects(sess, round_id)
+        assert selects == 1
+
+    def test_refresh_on_scores(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        game_results = load_game_results(sess, round_id)
+        golf_round = load_round_snapshot(sess, round_id)
+        golf_round.addScores(sess, 1, {"lstGross": [3, 8]})
+        sess.commit()
+        version = golf_round.version
+        game_results = load_game_results(sess, round_id)
+        assert [gr.round_version for gr in game_results] == [version, version]
+        assert game_results[0].leaderboard["lines"][0].split()[1] == "Nick0"
+
+    def test_refresh_on_game_data(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        load_game_results(sess, round_id)
+        game = sess.query(Game).filter(Game.round_id == round_id).first()
+        version = game.round.version
+        game.add_hole_dict_data(1, {"closest": "Nick0"})
+        sess.commit()
+        assert game.round.version == version + 1
+        game_results, selects = self._count_selects(sess, round_id)
+        assert selects > 1
+
+
+class TestRoundHandicaps:
+    def _add_rounds(self, sess, add_round, count):
+        """Rounds with the same players, return list of rounds."""
+        round_id = add_round(sess, 2)
+        first = load_round_snapshot(sess, round_id)
+        first.date_played = datetime.date(2018, 1, 1)
+        rounds = [first]
+        for n in range(1, count):
+            golf_round = Round(
+                course=first.course, date_played=datetime.date(2018, 1, n + 1)
+            )
+            for result in first.results:
+                new_result = Result(
+                    round=golf_round,
+                    player=result.player,
+                    tee_id=result.tee_id,
+                    course_handicap=result.course_handicap,
+                )
+                for score in result.scores:
+                    new_result.scores.append(
+                        Score(num=score.num, gross=score.gross + n, putts=2)
+                    )
+            sess.add(golf_round)
+            rounds.append(golf_round)
+        sess.commit()
+        return rounds
+
+    def test_not_complete(self, sess, add_round):
+        golf_round = load_round_snapshot(sess, add_round(sess, 2, num_holes=3))
+        assert golf_round.postHandicaps(sess) == []
+        assert sess.query(Differential).count() == 0
+
+    def test_post(self, sess, add_round):
+        golf_round = self._add_rounds(sess, add_round, 1)[0]
+        assert golf_round.postHandicaps(sess) == []
+        assert [d.differential for d in sess.query(Differential)] == [1.8, 18.7]
+        # posting again replaces the differentials
+        golf_round.postHandicaps(sess)
+        assert sess.query(Differential).count() == 2
+
+    def test_handicap_index(self, sess, add_round):
+        rounds = self._add_rounds(sess, add_round, 5)
+        for golf_round in rounds[:4]:
+            assert golf_round.postHandicaps(sess) == []
+        players = rounds[4].postHandicaps(sess)
+        assert [player.handicap for player in players] == [1.7, 17.9]
+        assert Differential.recent(sess, players[0].player_id)[0] == 35.7
+
+    def test_handicaps_as_entered(self, add_round):
+        db = Database("sqlite://", update_handicaps=False)
+        db.create_tables()
+        sess = db.create_session()
+        rounds = self._add_rounds(sess, add_round, 5)
+        for golf_round in rounds:
+            assert golf_round.postHandicaps(sess) == []
+        assert sess.query(Differential).count() == 10
+        handicaps = [result.player.handicap for result in rounds[4].results]
+        assert handicaps == [0.0, 1.0]
+
+
+class TestSeason:
+    def _add_rounds(self, sess, add_round, count):
+        """Complete rounds with gross and net games, return list of rounds."""
+        rounds = TestRoundHandicaps()._add_rounds(sess, add_round, count)
+        for golf_round in rounds[1:]:
+            golf_round.addGame(sess, "gross", {})
+        sess.add(
+            Season(
+                name="2018",
+                start_date=datetime.date(2018, 1, 1),
+                end_date=datetime.date(2018, 12, 31),
+            )
+        )
+        sess.commit()
+        return rounds
+
+    def _standings(self, sess, game_type="gross"):
+        season = sess.query(Season).one()
+        return [
+            (row.nick_name, row.rounds, row.total, row.wins)
+            for row in season.getStandings(sess, game_type)
+        ]
+
+    def test_post(self, sess, add_round):
+        rounds = self._add_rounds(sess, add_round, 2)
+        for golf_round in rounds:
+            assert [s.name for s in golf_round.postSeasons(sess)] == ["2018"]
+        sess.commit()
+        assert self._standings(sess) == [("Nick0", 2, 162, 2), ("Nick1", 2, 198, 0)]
+        assert self._standings(sess, "net") == [
+            ("Nick0", 1, 72, 1),
+            ("Nick1", 1, 89, 0),
+        ]
+        # posting the same version again changes nothing
+        assert rounds[0].postSeasons(sess) == []
+        assert sess.query(SeasonRound).count() == 2
+
+    def test_repost(self, sess, add_round):
+        golf_round = self._add_rounds(sess, add_round, 1)[0]
+        golf_round.postSeasons(sess)
+        golf_round.addScores(sess, 1, {"lstGross": [6, 5], "lstPutts": [2, 2]})
+        sess.commit()
+        golf_round = get_round(sess, golf_round.round_id)
+        assert len(golf_round.postSeasons(sess)) == 1
+        assert self._standings(sess) == [("Nick0", 1, 74, 1), ("Nick1", 1, 90, 0)]
+
+    def test_incremental(self, sess, add_round):
+        rounds = self._add_rounds(sess, add_round, 5)
+        counts = []
+        for golf_round in rounds[1:]:
+            golf_round.refreshGameResults(sess)
+            sess.commit()
+            statements = []
+
+            @event.listens_for(sess.bind, "before_cursor_execute")
+            def _count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            golf_round.postSeasons(sess)
+            sess.commit()
+            event.remove(sess.bind, "before_cursor_execute", _count)
+            counts.append(len(statements))
+        # the first post inserts the standings, later ones cost the same
+        assert len(set(counts[1:])) == 1
+
+    def test_not_complete(self, sess, add_round):
+        golf_round = load_round_snapshot(sess, add_round(sess, 2, scores=False))
+        sess.add(
+            Season(
+                name="all",
+                start_date=datetime.date(2000, 1, 1),
+                end_date=datetime.date(2100, 1, 1),
+            )
+        )
+        assert golf_round.postSeasons(sess) == []
+        assert sess.query(Standing).count() == 0
+
+    def test_not_in_season(self, sess, add_round):
+        golf_round = self._add_rounds(sess, add_round, 1)[0]
+        golf_round.date_played = datetime.date(2019, 1, 1)
+        assert golf_round.postSeasons(sess) == []
+
+    def test_delete(self, sess, add_round):
+        rounds = self._add_rounds(sess, add_round, 3)
+        for golf_round in rounds:
+            golf_round.postSeasons(sess)
+        sess.commit()
+        Round.delete(sess, rounds[1].round_id)
+        sess.commit()
+        assert self._standings(sess) == [("Nick0", 2, 180, 2), ("Nick1", 2, 216, 0)]
+        Round.purge(sess, datetime.date(2018, 1, 1), datetime.date(2018, 1, 31))
+        sess.commit()
+        assert self._standings(sess) == []
+        assert sess.query(SeasonRound).count() == 0
+
+
+class TestResultTotals:
+    def _totals(self, result):
+        return [getattr(result, name) for name in Result.TOTALS]
+
+    def test_totals(self, sess, add_round):
+        round_id = add_round(sess, 2)
+        golf_round = load_round_snapshot(sess, round_id)
+        # player 1 has a course handicap of 1, a stroke on hole 1
+        assert self._totals(golf_round.results[1]) == [18, 45, 45, 90, 36, 89]
+        golf_round.addScores(sess, 10, {"lstGross": [3, 7], "lstPutts": [1, 3]})
+        sess.commit()
+        assert self._totals(golf_round.results[0]) == [18, 36, 35, 71, 35, 71]
+        assert golf_round.results[1].net_total == 91
+        assert Result.checkTotals(sess) == []
+
+    def test_partial(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3, scores=False)
+        golf_round = load_round_snapshot(sess, round_id)
+        assert golf_round.get_completed_holes() == 0
+        golf_round.addScores(sess, 2, {"lstGross": [4, 5]})
+        sess.commit()
+        assert golf_round.get_completed_holes() == 1
+        assert not golf_round.is_complete()
+        assert self._totals(golf_round.results[1]) == [1, 5, 0, 5, 0, 5]
+
+    def test_course_handicap(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        result = load_round_snapshot(sess, round_id).results[0]
+        result.course_handicap = 3
+        sess.commit()
+        assert result.net_total == 9
+
+    def test_check(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        result_id = load_round_snapshot(sess, round_id).results[0].result_id
+        sess.execute(
+            "UPDATE results SET gross_total = 0, net_total = 1"
+            " WHERE result_id = {}".format(result_id)
+        )
+        sess.expire_all()
+        mismatches = Result.checkTotals(sess, repair=True)
+        assert [(m.result_id, m.column, m.stored, m.expected) for m in mismatches] == [
+            (result_id, "gross_total", 0, 12),
+            (result_id, "net_total", 1, 12),
+        ]
+        sess.commit()
+        assert Result.checkTotals(sess) == []
+
+
+class TestRoundArchive:
+    def test_pack(self):
+        scores = [Score(num=1, gross=4, putts=2), Score(num=2, gross=7, putts=None)]
+        packed = Score.pack(scores)
+        assert packed == bytes([4, 7, 2, Score.PACKED_NO_PUTTS])
+        assert [(sc.num, sc.gross, sc.putts) for sc in Score.unpack(5, packed)] == [
+            (1, 4, 2),
+            (2, 7, None),
+        ]
+
+    @pytest.mark.parametrize(
+        "scores",
+        [
+            [Score(num=2, gross=4, putts=2)],
+            [Score(num=1, gross=200, putts=2)],
+            [Score(num=1, gross=4, putts=200)],
+        ],
+    )
+    def test_pack_fail(self, scores):
+        with pytest.raises(GolfDBException):
+            Score.pack(scores)
+
+    def _games(self, sess, round_id):
+        sess.expunge_all()
+        golf_round = load_round_snapshot(sess, round_id)
+        return [
+            [pl["line"] for pl in game.CreateGame().getScorecard()["players"]]
+            for game in golf_round.games
+        ]
+
+    def test_archive(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        add_round(sess, 2, num_holes=3, name="Partial", scores=False)
+        scorecards = self._games(sess, round_id)
+        day = sess.query(Round).get(round_id).date_played
+        # the round without scores is not complete, it is skipped
+        assert Round.archive(sess, day, day) == 1
+        sess.commit()
+        assert sess.query(Score).count() == 0
+        assert self._games(sess, round_id) == scorecards
+        golf_round = load_round_snapshot(sess, round_id)
+        assert golf_round.get_completed_holes() == 3
+        assert [sc.putts for sc in golf_round.results[0].scores] == [2, 2, 2]
+        # already archived
+        assert Round.archive(sess, day, day) == 0
+
+    def test_correction(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        day = sess.query(Round).get(round_id).date_played
+        Round.archive(sess, day, day)
+        golf_round = load_round_snapshot(sess, round_id)
+        golf_round.addScores(sess, 2, {"lstGross": [3, 6]})
+        sess.commit()
+        assert sess.query(Score).count() == 6
+        sess.expunge_all()
+        golf_round = load_round_snapshot(sess, round_id)
+        assert all(result.packed is None for result in golf_round.results)
+        assert [sc.gross for sc in golf_round.results[1].scores] == [5, 6, 5]
+
+    def test_unarchive(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        day = sess.query(Round).get(round_id).date_played
+        Round.archive(sess, day, day)
+        assert Round.unarchive(sess, round_id) == 2
+        assert Round.unarchive(sess, round_id) == 0
+        assert sess.query(Score).count() == 6
+
+
+class TestRoundDelete:
+    def _counts(self, sess):
+        return [
+            sess.query(cls).count()
+            for cls in (Round, Result, Score, Game, GameResult, Differential)
+        ]
+
+    def test_delete(self, sess, add_round):
+        round_id = add_round(sess, 2, name="One")
+        add_round(sess, 3, name="Two")
+        golf_round = load_round_snapshot(sess, round_id)
+        golf_round.postHandicaps(sess)
+        load_game_results(sess, round_id)
+        assert self._counts(sess) == [2, 5, 90, 4, 2, 2]
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            assert Round.delete(sess, round_id) == 1
+            sess.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        # posted season totals, cached games and posted players are looked
+        # up, one DELETE, the players have too few rounds for an index
+        assert len(statements) == 6
+        assert statements[0].startswith("SELECT season_rounds")
+        assert statements[1].startswith("SELECT games.game_id")
+        assert statements[2].startswith("SELECT DISTINCT differentials.player_id")
+        assert statements[3].startswith("DELETE FROM rounds")
+        assert self._counts(sess) == [1, 3, 54, 2, 0, 0]
+
+    def test_delete_handicaps(self, sess, add_round):
+        rounds = TestRoundHandicaps()._add_rounds(sess, add_round, 6)
+        for golf_round in rounds:
+            players = golf_round.postHandicaps(sess)
+        sess.commit()
+        assert [player.handicap for player in players] == [1.7, 17.9]
+        player_ids = [player.player_id for player in players]
+        Round.delete(sess, rounds[0].round_id)
+        sess.commit()
+        handicaps = [sess.query(Player).get(pid).handicap for pid in player_ids]
+        assert handicaps == [
+            handicap_index(Differential.recent(sess, pid)) for pid in player_ids
+        ]
+        assert handicaps != [1.7, 17.9]
+
+    def test_purge_handicaps(self, sess, add_round):
+        rounds = TestRoundHandicaps()._add_rounds(sess, add_round, 7)
+        for golf_round in rounds:
+            players = golf_round.postHandicaps(sess)
+        sess.commit()
+        handicaps = [player.handicap for player in players]
+        player_ids = [player.player_id for player in players]
+        Round.purge(sess, datetime.date(2018, 1, 6), datetime.date(2018, 1, 7))
+        sess.commit()
+        # back to the index of the first five rounds
+        assert [sess.query(Player).get(pid).handicap for pid in player_ids] == [
+            1.7,
+            17.9,
+        ]
+        assert handicaps != [1.7, 17.9]
+
+    def test_delete_not_found(self, sess, add_round):
+        add_round(sess, 2)
+        assert Round.delete(sess, 99) == 0
+
+    def test_purge(self, sess, add_round):
+        for n, name in enumerate(["One", "Two", "Three"]):
+            golf_round = sess.query(Round).get(add_round(sess, 2, name=name))
+            golf_round.date_played = datetime.date(2018, 1, n + 1)
+        sess.commit()
+        count = Round.purge(sess, datetime.date(2018, 1, 1), datetime.date(2018, 1, 2))
+        sess.commit()
+        assert count == 2
+        assert self._counts(sess)[:4] == [1, 2, 36, 2]
+
+
+class TestUnitOfWork:
+    def test_reuse(self, db):
+        db.create_tables()
+        with db.unit_of_work() as session:
+            session.add(Player(email="sj@tl.com"))
+        with db.unit_of_work() as session2:
+            player = session2.query(Player).one()
+        assert session2 is session
+        # objects stay loaded after commit
+        assert "email" in inspect(player).dict
+        db.close()
+        with db.unit_of_work() as session3:
+            assert session3 is not session
+
+    def test_rollback(self, db):
+        db.create_tables()
+        with pytest.raises(GolfDBException):
+            with db.unit_of_work() as session:
+                session.add(Player(email="sj@tl.com"))
+                session.flush()
+                raise GolfDBException("abort")
+        with db.unit_of_work() as session2:
+            assert session2 is not session
+            assert session2.query(Player).count() == 0
+
+
+class TestGetRound:
+    def _count_statements(self, sess, round_id):
+        statements = []
+
+        def before_execute(conn, cursor, statement, parameters, context, many):
+            statements.append(statement)
+
+        engine = sess.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            golf_round = get_round(sess, round_id)
+            [len(result.scores) for result in golf_round.results]
+            [game.game_type for game in golf_round.games]
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        return golf_round, len(statements)
+
+    def test_cached(self, db, add_round):
+        db.create_tables()
+        with db.unit_of_work() as session:
+            round_id = add_round(session, 4)
+            session.expunge_all()
+            golf_round, statements = self._count_statements(session, round_id)
+            assert statements > 1
+        with db.unit_of_work() as session:
+            cached, statements = self._count_statements(session, round_id)
+        assert cached is golf_round
+        assert statements == 1
+
+    def test_changed(self, db, add_round):
+        db.create_tables()
+        with db.unit_of_work() as session:
+            round_id = add_round(session, 2, num_holes=3)
+            golf_round = get_round(session, round_id)
+        # another session changes a score
+        other = db.create_session()
+        load_round_snapshot(other, round_id).addScores(other, 1, {"lstGross": [9, 9]})
+        other.commit()
+        with db.unit_of_work() as session:
+            golf_round, statements = self._count_statements(session, round_id)
+            assert statements > 1
+            assert golf_round.results[0].scores[0].gross == 9
+
+
+class TestOptimisticLocking:
+    @pytest.fixture
+    def file_db(self, tmp_path):
+        db = Database("sqlite:///{}".format(tmp_path / "golf.sqlite"))
+        db.create_tables()
+        yield db
+        db.close()
+
+    def test_stale_round(self, file_db, add_round):
+        sess = file_db.create_session()
+        round_id = add_round(sess, 2, num_holes=3, scores=False)
+        golf_round = load_round_snapshot(sess, round_id)
+        # another scorer writes the round first
+        other = file_db.create_session()
+        load_round_snapshot(other, round_id).addScores(other, 1, {"lstGross": [4, 5]})
+        other.commit()
+        golf_round.addScores(sess, 2, {"lstGross": [4, 5]})
+        with pytest.raises(StaleDataError):
+            sess.flush()
+
+    def test_game_version(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        game = load_round_snapshot(sess, round_id).games[0]
+        version = game.version
+        game.add_hole_dict_data(1, {"closest": "Nick0"})
+        sess.commit()
+        assert game.version == version + 1
+
+    def test_retry(self, file_db):
+        calls = []
+
+        def update(session):
+            calls.append(session)
+            if len(calls) == 1:
+                raise StaleDataError("rounds changed")
+            return "done"
+
+        assert file_db.retry_unit_of_work(update, backoff=0) == "done"
+        assert len(calls) == 2
+        # the retry starts in a new session
+        assert calls[0] is not calls[1]
+        assert [conflict.attempt for conflict in file_db.conflicts] == [1]
+        assert file_db.conflicts[0].error == "StaleDataError"
+
+    def test_retry_scores(self, file_db, add_round):
+        with file_db.unit_of_work() as session:
+            round_id = add_round(session, 2, num_holes=3, scores=False)
+            get_round(session, round_id)
+        # another scorer writes the round the session has loaded
+        other = file_db.create_session()
+        load_round_snapshot(other, round_id).addScores(other, 1, {"lstGross": [4, 5]})
+        other.commit()
+        file_db.retry_unit_of_work(
+            lambda session: post_scores(
+                session,
+                round_id,
+                lambda golf_round: golf_round.addScores(
+                    session, 2, {"lstGross": [5, 6]}
+                ),
+            ),
+            backoff=0,
+        )
+        with file_db.unit_of_work() as session:
+            golf_round = load_round_snapshot(session, round_id)
+            assert golf_round.get_completed_holes() == 2
+            assert [len(result.scores) for result in golf_round.results] == [2, 2]
+
+    def test_retry_exhausted(self, file_db):
+        def update(session):
+            raise StaleDataError("rounds changed")
+
+        with pytest.raises(GolfDBConflict):
+            file_db.retry_unit_of_work(update, attempts=3, backoff=0)
+        assert [conflict.attempt for conflict in file_db.conflicts] == [1, 2, 3]
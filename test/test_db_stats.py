@@ -0,0 +1,93 @@
+"""test_db_stats.py"""
+import datetime
+from golf_db.db_sqlalchemy import Round, Result, Score
+from golf_db import db_stats
+
+
+class TestPlayerSummary:
+    def test_summary(self, sess, add_round):
+        add_round(sess, 2, num_holes=9)
+        rows = db_stats.player_summary(sess)
+        assert [row.nick_name for row in rows] == ["Nick0", "Nick1"]
+        assert rows[0].rounds == 1
+        assert rows[0].holes == 9
+        assert (rows[0].avg_gross, rows[0].avg_to_par) == (4.0, 0.0)
+        assert (rows[0].pars, rows[1].bogeys) == (9, 9)
+        assert rows[1].avg_to_par == 1.0
+        assert rows[0].putts_per_round == 18.0
+
+    def test_birdie_rate(self, sess, add_round):
+        add_round(sess, 1, num_holes=4)
+        scores = sess.query(Score).order_by(Score.num).all()
+        for score, gross in zip(scores, (2, 3, 4, 6)):
+            score.gross = gross
+        scores[3].putts = None
+        sess.commit()
+        (row,) = db_stats.player_summary(sess)
+        assert (row.eagles, row.birdies, row.pars, row.doubles) == (1, 1, 1, 1)
+        assert row.birdie_rate == 0.5
+        assert row.putts_per_round == 6.0
+
+    def test_filters(self, sess, add_round):
+        add_round(sess, 2, num_holes=3, name="Old")
+        round_id = add_round(sess, 2, num_holes=3, name="New")
+        sess.query(Round).get(round_id).date_played = datetime.date(2020, 6, 1)
+        sess.commit()
+        june = datetime.date(2020, 6, 1)
+        rows = db_stats.player_summary(sess, start=june, end=june)
+        assert [row.nick_name for row in rows] == ["Nick0", "Nick1"]
+        assert all(row.rounds == 1 for row in rows)
+        player_id = sess.query(Result.player_id).filter_by(round_id=round_id).first()[0]
+        rows = db_stats.player_summary(sess, player_ids=[player_id])
+        assert [row.player_id for row in rows] == [player_id]
+
+    def test_empty(self, sess):
+        assert db_stats.player_summary(sess) == []
+
+
+class TestParAverages:
+    def test_par_averages(self, sess, add_round):
+        add_round(sess, 1, num_holes=2)
+        score = sess.query(Score).filter(Score.num == 1).one()
+        score.result.round.course.holes[0].par = 3
+        sess.commit()
+        rows = db_stats.par_averages(sess)
+        assert [(row.par, row.holes, row.avg_to_par) for row in rows] == [
+            (3, 1, 1.0),
+            (4, 1, 0.0),
+        ]
+        assert rows[0].avg_putts == 2.0
+
+
+class TestScoreCounts:
+    def test_score_counts(self, sess, add_round):
+        add_round(sess, 2, num_holes=3)
+        score = sess.query(Score).order_by(Score.score_id).first()
+        score.putts = None
+        sess.commit()
+        rows = db_stats.score_counts(sess)
+        player_ids = sorted({row.player_id for row in rows})
+        assert [tuple(row)[1:] for row in rows] == [
+            (4, 4, None, 1),
+            (4, 4, 2, 2),
+            (4, 5, 2, 3),
+        ]
+        assert [row.player_id for row in rows] == [player_ids[0]] * 2 + [player_ids[1]]
+
+
+class TestArchived:
+    def test_same_stats(self, sess, add_round):
+        add_round(sess, 2, num_holes=3, name="Old")
+        add_round(sess, 2, num_holes=3, name="New")
+        scores = sess.query(Score).order_by(Score.score_id).all()
+        scores[0].gross, scores[1].putts = 2, None
+        sess.commit()
+        summary = [tuple(row) for row in db_stats.player_summary(sess)]
+        pars = [tuple(row) for row in db_stats.par_averages(sess)]
+        counts = [tuple(row) for row in db_stats.score_counts(sess)]
+        day = sess.query(Round.date_played).first()[0]
+        assert Round.archive(sess, day, day) == 2
+        assert sess.query(Score).count() == 0
+        assert [tuple(row) for row in db_stats.player_summary(sess)] == summary
+        assert [tuple(row) for row in db_stats.par_averages(sess)] == pars
+        assert [tuple(row) for row in db_stats.score_counts(sess)] == counts
@@ -0,0 +1,141 @@
+"""test_game_cache.py"""
+import pytest
+from golf_db.game_cache import GameCache, GameEntry
+from golf_db.db_sqlalchemy import Course, Round, Result
+from golf_db.db_sqlalchemy import load_round_snapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+class TestGameCache:
+    def test_take_put(self, clock):
+        cache = GameCache(clock=clock)
+        assert cache.take("a") is None
+        entry = GameEntry("game", 1, "setup")
+        cache.put("a", entry)
+        assert len(cache) == 1
+        assert cache.take("a") is entry
+        # taken out while it is used
+        assert len(cache) == 0
+        assert cache.take("a") is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_size(self, clock):
+        cache = GameCache(size=2, clock=clock)
+        for key in "abc":
+            cache.put(key, GameEntry(key, 1, None))
+        assert len(cache) == 2
+        assert cache.take("a") is None
+        cache.put("b", cache.take("b"))
+        cache.put("d", GameEntry("d", 1, None))
+        # c was least recently used
+        assert cache.take("c") is None
+        assert cache.take("b").game == "b"
+        assert cache.take("d").game == "d"
+
+    def test_max_age(self, clock):
+        cache = GameCache(max_age=10, clock=clock)
+        cache.put("a", GameEntry("a", 1, None))
+        clock.now = 5
+        cache.put("b", GameEntry("b", 1, None))
+        clock.now = 11
+        assert cache.take("a") is None
+        assert cache.take("b").game == "b"
+        cache.put("b", GameEntry("b", 1, None))
+        clock.now = 30
+        # old entries are also dropped when another entry is added
+        cache.put("c", GameEntry("c", 1, None))
+        assert len(cache) == 1
+
+    def test_invalidate(self, clock):
+        cache = GameCache(clock=clock)
+        cache.put("a", GameEntry("a", 1, None))
+        cache.put("b", GameEntry("b", 1, None))
+        cache.invalidate("a")
+        assert len(cache) == 1
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+def _gross_totals(game):
+    return [pl["total"] for pl in game.getScorecard()["players"]]
+
+
+class TestCreateGame:
+    def test_hit(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3, scores=False)
+        golf_round = load_round_snapshot(sess, round_id)
+        gross = golf_round.games[0]
+        game = gross.CreateGame()
+        assert gross.CreateGame() is game
+        golf_round.addScores(sess, 1, {"lstGross": [5, 6], "lstPutts": [2, 2]})
+        sess.commit()
+        # new round version, the same instance applies the new hole
+        assert gross.CreateGame() is game
+        assert _gross_totals(game) == [5, 6]
+
+    def test_miss(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3)
+        golf_round = load_round_snapshot(sess, round_id)
+        net = golf_round.games[1]
+        game = net.CreateGame()
+        net.game_data = {"options": {"use_full_net": True}}
+        golf_round.bump_version()
+        sess.commit()
+        assert net.CreateGame() is not game
+        game = net.CreateGame()
+        golf_round.results[0].course_handicap = 10
+        golf_round.bump_version()
+        sess.commit()
+        assert net.CreateGame() is not game
+
+    def test_reload(self, sess, add_round):
+        """An instance is used with a round loaded by another session."""
+        round_id = add_round(sess, 2, num_holes=18)
+        game = load_round_snapshot(sess, round_id).games[0].CreateGame()
+        sess.expunge_all()
+        golf_round = load_round_snapshot(sess, round_id)
+        assert golf_round.games[0].CreateGame() is game
+        assert game.golf_round is golf_round
+        assert game.getStatus()["line"] == "Round complete"
+
+    def test_deleted_round(self, sess, add_round):
+        round_id = add_round(sess, 2, num_holes=3, name="Old")
+        golf_round = load_round_snapshot(sess, round_id)
+        old = golf_round.games[0].CreateGame()
+        course_id = golf_round.course_id
+        version = golf_round.version
+        players = [
+            (res.player_id, res.tee_id, res.course_handicap)
+            for res in golf_round.results
+        ]
+        Round.delete(sess, round_id)
+        sess.commit()
+        sess.expunge_all()
+        # the ids of the deleted rows are used again
+        new_round = Round(course=sess.query(Course).get(course_id))
+        for player_id, tee_id, course_handicap in players:
+            result = Result(player_id=player_id, tee_id=tee_id, handicap=0.0)
+            result.course_handicap = course_handicap
+            new_round.results.append(result)
+        new_round.addGame(sess, "gross", {})
+        sess.add(new_round)
+        sess.commit()
+        new_round.addScores(sess, 1, {"lstGross": [7, 7], "lstPutts": [2, 2]})
+        sess.commit()
+        assert new_round.round_id == round_id
+        assert new_round.version == version
+        game = load_round_snapshot(sess, round_id).games[0].CreateGame()
+        assert game is not old
+        assert _gross_totals(game) == [7, 7]
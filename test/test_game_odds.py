@@ -0,0 +1,194 @@
+"""test_game_odds.py"""
+import random
+from collections import namedtuple
+import numpy as np
+import pytest
+from golf_db import game_odds
+from golf_db.db_sqlalchemy import Round, Score
+from golf_db.game_odds import Sample, ScoreDistribution
+from golf_db.score_matrix import settle
+
+Row = namedtuple("Row", "player_id par gross putts holes")
+
+
+def _points(game, attr):
+    return settle(np.array([getattr(pl, attr)["total"] for pl in game._players]))
+
+
+def _match(total):
+    return np.array([np.sign(total), -np.sign(total)])
+
+
+def _best_ball(game):
+    result = np.sign(game.team_list[0]._total)
+    return np.array([result, result, -result, -result])
+
+
+# game, players, options, winnings from the state of the game
+GAMES = [
+    ("skins", 4, {}, lambda game: _points(game, "dct_skins")),
+    ("skins", 3, {"use_carryover": False}, lambda game: _points(game, "dct_skins")),
+    ("snake", 4, {"snake_type": "Hold"}, lambda game: _points(game, "dct_points")),
+    ("snake", 3, {"snake_type": "Points"}, lambda game: _points(game, "dct_points")),
+    ("bestball", 4, {"teams": "[(0,1),(2,3)]"}, _best_ball),
+    ("match", 2, {}, lambda game: _match(game._players[0].total)),
+]
+
+
+def _scores(rnd, num_players):
+    """Random gross and putts of a hole, at most one 3 putt."""
+    putts = [rnd.choice([1, 2]) for _ in range(num_players)]
+    if rnd.random() < 0.5:
+        putts[rnd.randrange(num_players)] = 3
+    gross = [p + rnd.choice([1, 2, 3]) for p in putts]
+    return {"lstGross": gross, "lstPutts": putts}
+
+
+@pytest.fixture
+def golf_round(sess, add_round):
+    round_id = add_round(sess, 4, scores=False)
+    golf_round = sess.query(Round).get(round_id)
+    golf_round.addGame(sess, "skins", {})
+    rnd = random.Random(1)
+    for hole_num in range(1, 6):
+        golf_round.addScores(sess, hole_num, _scores(rnd, 4))
+    sess.commit()
+    return golf_round
+
+
+class TestDistribution:
+    @pytest.mark.parametrize("course_handicap", [-2, 0, 9, 18, 36])
+    def test_default_to_par(self, course_handicap):
+        probs = game_odds.default_to_par(course_handicap)
+        assert probs.sum() == pytest.approx(1.0)
+        scratch = (game_odds.TO_PAR * game_odds.SCRATCH_TO_PAR).sum()
+        assert (game_odds.TO_PAR * probs).sum() == pytest.approx(
+            scratch + course_handicap / 18
+        )
+
+    def test_history(self, golf_round):
+        player_id = golf_round.results[0].player_id
+        # gross 5 and 2 putts on par 4, a score on par 3 is not used
+        rows = [Row(player_id, 4, 5, 2, 10000), Row(player_id, 3, 2, None, 10000)]
+        distribution = ScoreDistribution(golf_round, rows)
+        assert distribution.gross_table.shape == (4, 18, game_odds.TABLE_SIZE)
+        assert (distribution.gross_table[0] == 5).all()
+        assert (distribution.putts_table[0] == 2).all()
+        # other players have the default chances
+        assert (distribution.gross_table[1] == 5).mean() < 0.5
+
+    def test_load(self, sess, golf_round):
+        distribution = ScoreDistribution.load(sess, golf_round)
+        # 5 holes of history weigh more than none
+        gross = golf_round.results[0].scores[0].gross
+        empty = ScoreDistribution(golf_round, [])
+        assert (distribution.gross_table[0, 0] == gross).sum() > (
+            empty.gross_table[0, 0] == gross
+        ).sum()
+
+    def test_sample(self, golf_round):
+        golf_round.results[0].scores.append(Score(num=6, gross=9, putts=4))
+        golf_round.bump_version()
+        game = golf_round.games[-1].CreateGame()
+        sample = ScoreDistribution(golf_round, []).sample(
+            game.matrix, 1000, np.random.default_rng(1)
+        )
+        assert sample.start == 5
+        assert sample.gross.shape == sample.putts.shape == (4, 13, 1000)
+        assert sample.gross.dtype == sample.putts.dtype == np.int8
+        # the scores of hole 6 are kept
+        assert (sample.gross[0, 0] == 9).all() and (sample.putts[0, 0] == 4).all()
+        assert (sample.putts[:, 1:] < sample.gross[:, 1:]).all()
+        assert (sample.putts[:, 1:] >= 0).all()
+
+
+class TestSimulate:
+    @pytest.mark.parametrize("game_type,num_players,options,winnings", GAMES)
+    def test_same_rules(
+        self, sess, add_round, game_type, num_players, options, winnings
+    ):
+        """Each trial ends as the game played with the scores of the trial."""
+        trials = 8
+        round_id = add_round(sess, num_players, scores=False)
+        golf_round = sess.query(Round).get(round_id)
+        golf_round.addGame(sess, game_type, options)
+        rnd = random.Random(game_type)
+        for hole_num in range(1, 6):
+            golf_round.addScores(sess, hole_num, _scores(rnd, num_players))
+        # hole 6 is not finished
+        golf_round.results[0].scores.append(Score(num=6, gross=4, putts=3))
+        golf_round.bump_version()
+        sess.commit()
+        game = golf_round.games[-1].CreateGame()
+        sample = ScoreDistribution(golf_round, []).sample(
+            game.matrix, trials, np.random.default_rng(1)
+        )
+        # the game asks which 3 putt was closest, keep the first
+        three_putts = sample.putts >= 3
+        sample.putts[three_putts & (three_putts.cumsum(axis=0) > 1)] = 2
+        simulated = game.simulate(sample)
+        assert simulated.shape == (num_players, trials)
+        for trial in range(trials):
+            for index in range(sample.gross.shape[1]):
+                golf_round.addScores(
+                    sess,
+                    sample.start + index + 1,
+                    {
+                        "lstGross": sample.gross[:, index, trial].tolist(),
+                        "lstPutts": sample.putts[:, index, trial].tolist(),
+                    },
+                )
+            sess.commit()
+            game.update()
+            assert simulated[:, trial] == pytest.approx(winnings(game))
+
+    def test_complete(self, sess, add_round):
+        round_id = add_round(sess, 4)
+        golf_round = sess.query(Round).get(round_id)
+        golf_round.addGame(sess, "skins", {})
+        sess.commit()
+        game = golf_round.games[-1].CreateGame()
+        sample = ScoreDistribution(golf_round, []).sample(game.matrix, 10)
+        assert sample.gross.shape == (4, 0, 10)
+        odds = game.getOdds(sample)
+        expected = _points(game, "dct_skins").tolist()
+        assert [pl["expected"] for pl in odds["players"]] == pytest.approx(expected)
+        assert [pl["win"] for pl in odds["players"]] == [x > 0 for x in expected]
+
+    def test_snake_tie(self, sess, add_round):
+        """A tie of 3 putts is drawn at random, more putts lose."""
+        round_id = add_round(sess, 4, num_holes=18)
+        golf_round = sess.query(Round).get(round_id)
+        golf_round.addGame(sess, "snake", {"snake_type": "Hold"})
+        sess.commit()
+        game = golf_round.games[-1].CreateGame()
+        trials = 20000
+        putts = np.full((4, 1, trials), 3, dtype=np.int8)
+        sample = Sample(17, putts + 2, putts, np.random.default_rng(1))
+        losers = game.simulate(sample) < 0
+        assert (losers.sum(axis=0) == 1).all()
+        assert losers.mean(axis=1) == pytest.approx([0.25] * 4, abs=0.02)
+        putts[2] = 4
+        assert (game.simulate(sample)[2] < 0).all()
+
+
+class TestRoundOdds:
+    def test_round_odds(self, sess, golf_round):
+        golf_round.addGame(sess, "bestball", {"teams": "[(0,3),(1,2)]"})
+        sess.commit()
+        lst_odds = game_odds.round_odds(sess, golf_round, trials=1000, seed=1)
+        # gross and net have no odds
+        assert [odds is None for odds in lst_odds] == [True, True, False, False]
+        skins = lst_odds[2]
+        assert skins["game"].short_description == "Skins"
+        assert skins["trials"] == 1000
+        assert [pl["player"] for pl in skins["players"]] == [
+            result.player for result in golf_round.results
+        ]
+        assert sum(pl["expected"] for pl in skins["players"]) == pytest.approx(0)
+        assert all(0 <= pl["win"] <= 1 for pl in skins["players"])
+        assert skins["line"].startswith("Nick0 ")
+        best_ball = lst_odds[3]["players"]
+        assert best_ball[0]["win"] == best_ball[3]["win"]
+        again = game_odds.round_odds(sess, golf_round, trials=1000, seed=1)
+        assert again[2]["line"] == skins["line"]
@@ -0,0 +1,30 @@
+"""test_handicap.py"""
+import pytest
+from golf_db.handicap import score_differential, handicap_index
+
+
+class TestHandicap:
+    @pytest.mark.parametrize(
+        "adjusted_gross, rating, slope, expected",
+        [(72, 70.1, 120, 1.8), (90, 70.1, 120, 18.7), (85, 72.0, 113, 13.0)],
+    )
+    def test_score_differential(self, adjusted_gross, rating, slope, expected):
+        assert score_differential(adjusted_gross, rating, slope) == expected
+
+    @pytest.mark.parametrize("count", [0, 1, 4])
+    def test_index_not_enough(self, count):
+        assert handicap_index(count * [10.0]) is None
+
+    @pytest.mark.parametrize(
+        "differentials, expected",
+        [
+            ([10.0, 12.0, 14.0, 16.0, 18.0], 9.6),
+            ([10.0, 12.0, 14.0, 16.0, 18.0, 20.0, 8.0], 8.6),
+            (20 * [15.0], 14.4),
+            # only the 20 most recent are used
+            (20 * [15.0] + 5 * [1.0], 14.4),
+            (5 * [-1.5], -1.4),
+        ],
+    )
+    def test_index(self, differentials, expected):
+        assert handicap_index(differentials) == expected
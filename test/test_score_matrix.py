@@ -0,0 +1,106 @@
+"""test_score_matrix.py"""
+import numpy as np
+import pytest
+from golf_db import score_matrix
+from golf_db.score_matrix import ScoreMatrix
+from golf_db.db_sqlalchemy import Round
+from golf_db.sql_game_stableford import SqlGameStableford
+
+
+@pytest.fixture
+def golf_round(sess, add_round):
+    round_id = add_round(sess, 3, num_holes=18, scores=False)
+    golf_round = sess.query(Round).get(round_id)
+    for hole in range(1, 11):
+        golf_round.addScores(sess, hole, {"lstGross": [3, 4, 6], "lstPutts": [1, 2, 3]})
+    sess.commit()
+    return golf_round
+
+
+@pytest.fixture
+def matrix(golf_round):
+    matrix = ScoreMatrix(
+        golf_round.course, [result.course_handicap for result in golf_round.results]
+    )
+    matrix.load(golf_round)
+    return matrix
+
+
+class TestScoreMatrix:
+    def test_load(self, matrix):
+        assert matrix.gross.dtype == np.int8
+        assert matrix.gross.shape == (3, 18)
+        assert matrix.last_hole() == 10
+        assert matrix.gross[:, 9].tolist() == [3, 4, 6]
+        assert matrix.putts[:, 0].tolist() == [1, 2, 3]
+        assert not matrix.played[:, 10:].any()
+        assert matrix.par.tolist() == [4] * 18
+        assert matrix.stroke_index.tolist() == list(range(1, 19))
+
+    def test_shared(self, golf_round, matrix):
+        other = ScoreMatrix(golf_round.course, [0, 1, 2])
+        other.load(golf_round)
+        assert other.gross is matrix.gross
+        # a new version is read again
+        golf_round.bump_version()
+        other.load(golf_round)
+        assert other.gross is not matrix.gross
+
+    def test_bumps(self, golf_round, matrix):
+        bumps = matrix.bumps(0)
+        assert bumps is matrix.bumps(0)
+        for row, result in enumerate(golf_round.results):
+            assert bumps[row].tolist() == golf_round.course.calcBumps(
+                result.course_handicap
+            )
+        assert matrix.bumps(1)[0].tolist() == golf_round.course.calcBumps(-1)
+        # strokes on the hardest holes
+        assert matrix.net(0, bumps).tolist() == [3, 3, 5]
+        assert matrix.to_par(0, bumps).tolist() == [-1, -1, 1]
+
+    @pytest.mark.parametrize("stableford_type", ["Modified", "Classic", "British"])
+    def test_stableford(self, matrix, stableford_type):
+        table = SqlGameStableford.dct_scoring[stableford_type]
+        matrix.gross = matrix.gross.copy()
+        matrix.gross[:, 0] = [0, 9, 4]
+        points = matrix.stableford(0, matrix.bumps(0), table).tolist()
+        # below -3 and above 2 score as min and max
+        to_par = matrix.to_par(0, matrix.bumps(0)).tolist()
+        expected = [
+            table[d] if d in table else table["min"] if d < 0 else table["max"]
+            for d in to_par
+        ]
+        assert points == expected
+
+    def test_totals(self, matrix):
+        out_tot, in_tot, total = matrix.totals(matrix.gross)
+        assert out_tot.tolist() == [27, 36, 54]
+        assert in_tot.tolist() == [3, 4, 6]
+        assert total.tolist() == [30, 40, 60]
+        # more leading dimensions, one set of scores per trial
+        trials = np.stack([matrix.gross, matrix.gross + 1])
+        assert matrix.totals(trials)[2].tolist() == [[30, 40, 60], [40, 50, 70]]
+
+
+class TestHole:
+    def test_low(self):
+        assert score_matrix.low(np.array([5, 3, 4])) == (3, 1)
+        assert score_matrix.low(np.array([3, 3, 4])) == (3, 2)
+
+    @pytest.mark.parametrize(
+        "nets,lower,ties",
+        [
+            ([4, 4, 4], [0, 0, 0], [3, 3, 3]),
+            ([3, 5, 3], [0, 2, 0], [2, 1, 2]),
+            ([5, 3, 5], [1, 0, 1], [2, 1, 2]),
+            ([5, 3, 4], [2, 0, 1], [1, 1, 1]),
+        ],
+    )
+    def test_ranks(self, nets, lower, ties):
+        result = score_matrix.ranks(np.array(nets, dtype=np.int8))
+        assert [values.tolist() for values in result] == [lower, ties]
+
+    def test_settle(self):
+        winnings = score_matrix.settle(np.array([[3, 0], [0, 0], [0, 3]]))
+        assert winnings.tolist() == [[3, -1.5], [-1.5, -1.5], [-1.5, 3]]
+        assert score_matrix.settle(np.array([[2, 1]])).tolist() == [[0, 0]]
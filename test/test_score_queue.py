@@ -0,0 +1,135 @@
+"""test_score_queue.py"""
+import json
+import time
+import pytest
+from golf_db.db_sqlalchemy import Database, Score, load_round_snapshot
+from golf_db.db_ingest import ScoreRecord
+from golf_db.exceptions import GolfDBConflict
+from golf_db import score_queue
+from golf_db.score_queue import ScoreQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    # the queue writes from its own thread, a file database is shared
+    db = Database("sqlite:///{}".format(tmp_path / "golf.sqlite"))
+    db.create_tables()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "scores.journal")
+
+
+def _score_count(db):
+    with db.unit_of_work() as session:
+        return session.query(Score).count()
+
+
+class TestScoreQueue:
+    def test_put(self, db, journal, add_round):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        queue = ScoreQueue(db, journal, interval=60)
+        seqs = [queue.put(ScoreRecord(round_id, n + 1, [4, 5])) for n in range(3)]
+        assert seqs == [1, 2, 3]
+        assert len(queue) == 3
+        # nothing written before the interval
+        assert _score_count(db) == 0
+        with open(journal) as fp:
+            assert len(fp.readlines()) == 3
+        queue.flush()
+        assert len(queue) == 0
+        assert _score_count(db) == 6
+        # journal is empty once everything is written
+        with open(journal) as fp:
+            assert fp.read() == ""
+        queue.close()
+        assert queue.info_needed == {round_id: []}
+
+    def test_batch_size(self, db, journal, add_round):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        queue = ScoreQueue(db, journal, batch_size=2, interval=60)
+        for n in range(3):
+            queue.put(ScoreRecord(round_id, n + 1, [4, 5]))
+        # a full batch is written without waiting
+        for _ in range(100):
+            if len(queue) == 1:
+                break
+            time.sleep(0.05)
+        assert len(queue) == 1
+        assert _score_count(db) == 4
+        with open(journal) as fp:
+            assert json.loads(fp.readlines()[-1]) == {"flushed": 2}
+        queue.close()
+        assert _score_count(db) == 6
+
+    def test_recover(self, db, journal, add_round):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        lines = [
+            dict(ScoreRecord(round_id, n + 1, [4, 5])._asdict(), seq=n + 1)
+            for n in range(3)
+        ]
+        lines.insert(1, {"flushed": 1})
+        with open(journal, "w") as fp:
+            for line in lines:
+                fp.write(json.dumps(line) + "\n")
+            # a crash while writing the last record
+            fp.write('{"seq": 4, "round_id"')
+        queue = ScoreQueue(db, journal, interval=60)
+        assert len(queue) == 2
+        assert queue.put(ScoreRecord(round_id, 1, [3, 3])) == 4
+        queue.close()
+        golf_round = load_round_snapshot(db.create_session(), round_id)
+        assert [sc.gross for sc in golf_round.results[0].scores] == [3, 4, 4]
+
+    def test_bad_record(self, db, journal, add_round):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        queue = ScoreQueue(db, journal, interval=60)
+        queue.put(ScoreRecord(round_id, 1, [4, 5]))
+        queue.put(ScoreRecord(round_id, 9, [4, 5]))
+        queue.put(ScoreRecord(round_id, 2, [4, 5]))
+        queue.close()
+        assert _score_count(db) == 4
+        assert [record.hole for record, _ in queue.errors] == [9]
+
+    def test_conflict(self, db, journal, add_round, monkeypatch):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        queue = ScoreQueue(db, journal, interval=0.01)
+
+        def conflict(func):
+            raise GolfDBConflict("write conflict not resolved")
+
+        monkeypatch.setattr(db, "retry_unit_of_work", conflict)
+        for n in range(2):
+            queue.put(ScoreRecord(round_id, n + 1, [4, 5]))
+        # the records stay queued, flush and close do not wait for them
+        queue.flush()
+        assert len(queue) == 2
+        queue.close()
+        assert queue.errors == []
+        monkeypatch.undo()
+        queue = ScoreQueue(db, journal, interval=60)
+        assert len(queue) == 2
+        queue.close()
+        assert _score_count(db) == 4
+
+    def test_unexpected_error(self, db, journal, add_round, monkeypatch):
+        round_id = add_round(db.create_session(), 2, num_holes=3, scores=False)
+        queue = ScoreQueue(db, journal, interval=60)
+        ingest_scores = score_queue.ingest_scores
+
+        def fail_hole_2(session, records):
+            if any(record.hole == 2 for record in records):
+                raise ValueError("bad hole")
+            return ingest_scores(session, records)
+
+        monkeypatch.setattr(score_queue, "ingest_scores", fail_hole_2)
+        for n in range(3):
+            queue.put(ScoreRecord(round_id, n + 1, [4, 5]))
+        queue.flush()
+        assert len(queue) == 0
+        queue.close()
+        assert _score_count(db) == 4
+        assert queue.errors == [(ScoreRecord(round_id, 2, [4, 5]), "bad hole")]
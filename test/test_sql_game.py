@@ -0,0 +1,132 @@
+"""test_sql_game.py - hole by hole update of the sql games."""
+import random
+import pytest
+from golf_db import game_cache
+from golf_db.db_sqlalchemy import Round, Score
+
+PARS = [4, 3, 5, 4, 4, 3, 4, 5, 4, 4, 5, 3, 4, 4, 3, 5, 4, 4]
+HANDICAPS = [7, 17, 1, 11, 3, 15, 5, 13, 9, 8, 2, 18, 10, 4, 16, 6, 12, 14]
+
+GAMES = [
+    ("gross", 4, {}),
+    ("net", 4, {}),
+    ("putts", 4, {}),
+    ("skins", 4, {}),
+    ("stableford", 4, {}),
+    ("greenie", 4, {"wager": 1.0}),
+    ("snake", 4, {"snake_type": "Hold"}),
+    ("rewards", 4, {}),
+    ("bestball", 4, {"teams": "[(0,3),(1,2)]"}),
+    ("six_point", 3, {}),
+    ("eighty_one", 3, {}),
+    ("match", 2, {}),
+]
+
+
+def _add_round(sess, add_round, num_players, game_type, options):
+    """Round without scores on a course of PARS, the game is the last game."""
+    round_id = add_round(
+        sess,
+        num_players,
+        name="Game",
+        scores=False,
+        pars=PARS,
+        hole_handicaps=HANDICAPS,
+        handicap_step=4,
+    )
+    golf_round = sess.query(Round).get(round_id)
+    golf_round.addGame(sess, game_type, options)
+    sess.commit()
+    return golf_round
+
+
+def _hole_scores(rnd, num_players, hole_num):
+    """Gross and putts of a hole, only one player can win a greenie or snake."""
+    par = PARS[hole_num - 1]
+    lstGross, lstPutts = [], []
+    for n in range(num_players):
+        if n == hole_num % num_players:
+            # on the green in regulation half of the time
+            putts = rnd.choice([1, 2, 3])
+            gross = par - 2 + putts + rnd.choice([0, 1])
+        else:
+            putts = 2
+            gross = rnd.choice([par - 1, par + 1, par + 2])
+        lstGross.append(gross)
+        lstPutts.append(putts)
+    return {"lstGross": lstGross, "lstPutts": lstPutts}
+
+
+def _full_game(golf_round):
+    """Game computed from the first hole, not the cached instance."""
+    game_cache.invalidate()
+    return golf_round.games[-1].CreateGame()
+
+
+def _lines(game, status=True):
+    return (
+        [pl["line"] for pl in game.getScorecard()["players"]],
+        [pl["line"] for pl in game.getLeaderboard()["leaderboard"]],
+        # status of a complete round needs Course.total
+        game.getStatus()["line"] if status else None,
+    )
+
+
+class TestApplyHole:
+    @pytest.mark.parametrize("game_type,num_players,options", GAMES)
+    def test_incremental(self, sess, add_round, game_type, num_players, options):
+        """update() after every hole and a correction matches a full update."""
+        rnd = random.Random(game_type)
+        golf_round = _add_round(sess, add_round, num_players, game_type, options)
+        game = golf_round.games[-1].CreateGame()
+        for hole_num in range(1, 19):
+            scores = _hole_scores(rnd, num_players, hole_num)
+            golf_round.addScores(sess, hole_num, scores)
+            sess.commit()
+            game.update()
+            if hole_num == 12:
+                # correct hole 5, holes 5-12 are applied again
+                applied = []
+                apply_hole = game.apply_hole
+                game.apply_hole = lambda n: applied.append(n) or apply_hole(n)
+                golf_round.addScores(sess, 5, _hole_scores(rnd, num_players, 5))
+                sess.commit()
+                game.update()
+                del game.apply_hole
+                assert applied == list(range(5, 13))
+            status = hole_num < 18
+            assert _lines(game, status) == _lines(_full_game(golf_round), status)
+        full = _full_game(golf_round)
+        full.recompute()
+        assert _lines(game, False) == _lines(full, False)
+
+    def test_update_twice(self, sess, add_round):
+        rnd = random.Random(1)
+        golf_round = _add_round(sess, add_round, 4, "skins", {})
+        for hole_num in range(1, 10):
+            golf_round.addScores(sess, hole_num, _hole_scores(rnd, 4, hole_num))
+        sess.commit()
+        game = golf_round.games[-1].CreateGame()
+        lines = _lines(game)
+        game.update()
+        assert _lines(game) == lines
+        game.replay(3)
+        assert _lines(game) == lines
+
+    def test_partial_hole(self, sess, add_round):
+        """A best ball hole is decided when all players have a score."""
+        golf_round = _add_round(
+            sess, add_round, 4, "bestball", {"teams": "[(0,1),(2,3)]"}
+        )
+        for result in golf_round.results[:3]:
+            result.scores.append(Score(num=1, gross=3, putts=1))
+        golf_round.bump_version()
+        sess.commit()
+        game = golf_round.games[-1].CreateGame()
+        assert [team._hole[0] for team in game.team_list] == [None, None]
+        golf_round.results[3].scores.append(Score(num=1, gross=5, putts=2))
+        golf_round.bump_version()
+        sess.commit()
+        game.update()
+        # a stroke for Nick2 on the 7th hardest hole
+        assert [team._hole[0] for team in game.team_list] == [-1, 1]
@@ -4,13 +4,16 @@ import console
 import ui
 import dialogs
 import datetime
-from golf_db.db_sqlalchemy import Round
+from golf_db.db_listing import list_rounds
 from RoundCreate import RoundCreate
 from RoundGames import RoundGames
 from RoundScores import RoundScores
 from RoundLeaderboard import RoundLeaderboard
 from RoundScorecard import RoundScorecard
 
+# most recent rounds offered by select round
+ROUND_LIST_SIZE = 50
+
 
 def make_button_item(action, image_name=None, title=None):
     if image_name:
@@ -69,13 +72,12 @@ class MainView(ui.View):
 
     def select_round(self, sender):
         """Select an existing round to use with app"""
-        session = self.db.Session()
-        rounds = session.query(Round).all()
-        rrounds = list(reversed(rounds))
-        golf_round = dialogs.list_dialog("Select Round", rrounds)
-        if golf_round:
-            self.set_golf_round(golf_round)
-            self.goto_leaderboard()
+        with self.db.unit_of_work() as session:
+            page = list_rounds(session, limit=ROUND_LIST_SIZE)
+            golf_round = dialogs.list_dialog("Select Round", page.rows)
+            if golf_round:
+                self.set_golf_round(golf_round)
+                self.goto_leaderboard()
 
     def switch_views(self):
         for i in range(len(self.view_array)):
@@ -45,32 +45,32 @@ class RoundCreate(GolfView):
             self._date_played = date_played
 
     def add_player(self, sender):
-        session = self.db.Session()
-        players = session.query(Player).all()
-        names = sorted([player.getFullName() for player in players])
-        names += ["<Remove Player>"]
-        name = dialogs.list_dialog("Select Player", names)
-        if name:
-            if name == "<Remove Player>":
-                sender.title = "<Add Player>"
-                sender._player = None
-            else:
-                sender.title = name
-                sender._player = [
-                    player for player in players if name == player.getFullName()
-                ][0]
+        with self.db.unit_of_work() as session:
+            players = session.query(Player).all()
+            names = sorted([player.getFullName() for player in players])
+            names += ["<Remove Player>"]
+            name = dialogs.list_dialog("Select Player", names)
+            if name:
+                if name == "<Remove Player>":
+                    sender.title = "<Add Player>"
+                    sender._player = None
+                else:
+                    sender.title = name
+                    sender._player = [
+                        player for player in players if name == player.getFullName()
+                    ][0]
 
     def select_course(self, sender):
-        session = self.db.Session()
-        courses = session.query(Course).all()
-        course_names = sorted([course.name for course in courses])
-        name = dialogs.list_dialog("Select Course", course_names)
-        if name:
-            sender.title = name
-            self._course = [course for course in courses if name == course.name][0]
-            self._tee = None
-            self["btnSelectTee"].title = "<Select Tee>"
-            self["btnSelectTee"].enabled = True
+        with self.db.unit_of_work() as session:
+            courses = session.query(Course).all()
+            course_names = sorted([course.name for course in courses])
+            name = dialogs.list_dialog("Select Course", course_names)
+            if name:
+                sender.title = name
+                self._course = [course for course in courses if name == course.name][0]
+                self._tee = None
+                self["btnSelectTee"].title = "<Select Tee>"
+                self["btnSelectTee"].enabled = True
 
     def select_tee(self, sender):
         if not self._course:
@@ -103,27 +103,27 @@ class RoundCreate(GolfView):
             self.console_alert("\n".join(lst_errors))
             return
         # Start the round
-        session = self.db.Session()
-        golf_round = Round(
-            course_id=self._course.course_id, date_played=self._date_played
-        )
-        session.add(golf_round)
-        session.commit()
-        # HARDWIRED to simple
-        # golf_round.set_option('calc_course_handicap', 'simple')
-        session.commit()
-        # add players
-        for pl in self.btnPlayers:
-            if pl._player is not None:
-                result = Result(
-                    round=golf_round,
-                    player_id=pl._player.player_id,
-                    tee_id=self._tee.tee_id,
-                    handicap=pl._player.handicap,
-                )
-                result.calcCourseHandicap(self._tee)
-                session.add(result)
-        session.commit()
-        # switch back to main view
-        self._mainView.set_golf_round(golf_round)
-        self._mainView.goto_games()
+        with self.db.unit_of_work() as session:
+            golf_round = Round(
+                course_id=self._course.course_id, date_played=self._date_played
+            )
+            session.add(golf_round)
+            session.commit()
+            # HARDWIRED to simple
+            # golf_round.set_option('calc_course_handicap', 'simple')
+            session.commit()
+            # add players
+            for pl in self.btnPlayers:
+                if pl._player is not None:
+                    result = Result(
+                        round=golf_round,
+                        player_id=pl._player.player_id,
+                        tee_id=self._tee.tee_id,
+                        handicap=pl._player.handicap,
+                    )
+                    result.calcCourseHandicap(self._tee)
+                    session.add(result)
+            session.commit()
+            # switch back to main view
+            self._mainView.set_golf_round(golf_round)
+            self._mainView.goto_games()
@@ -6,7 +6,7 @@ import ui
 import dialogs
 import datetime
 
-from golf_db.db_sqlalchemy import Round, Game
+from golf_db.db_sqlalchemy import Round, Game, get_round
 from golf_db.sql_game_factory import (
     SqlGolfGameList,
     SqlGolfGameFactory,
@@ -139,24 +139,20 @@ class RoundGames(GolfView):
 
     def _update_games(self):
         """Load all defined games into tvGames."""
-        session = self.db.Session()
-        self.golf_round = (
-            session.query(Round)
-            .filter(Round.round_id == self._mainView._round_id)
-            .one()
-        )
-        self.games = [game.CreateGame() for game in self.golf_round.games]
-        items = []
-        for game in self.games:
-            dct = {"title": game.short_description}
-            if game.game_options:
-                dct["accessory_type"] = "detail_button"
-            items.append(dct)
-        lds = GamesViewDataSource(self)
-        self.tvGames.data_source = lds
-        self.tvGames.delegate = lds
-        self.tvGames.editing = False
-        self.tvGames.reload_data()
+        with self.db.unit_of_work() as session:
+            self.golf_round = get_round(session, self._mainView._round_id)
+            self.games = [game.CreateGame() for game in self.golf_round.games]
+            items = []
+            for game in self.games:
+                dct = {"title": game.short_description}
+                if game.game_options:
+                    dct["accessory_type"] = "detail_button"
+                items.append(dct)
+            lds = GamesViewDataSource(self)
+            self.tvGames.data_source = lds
+            self.tvGames.delegate = lds
+            self.tvGames.editing = False
+            self.tvGames.reload_data()
 
     def activate(self):
         """Form activated. Load all defined games into tblGames."""
@@ -184,8 +180,7 @@ class RoundGames(GolfView):
                 dct = {}
             round_id = self._mainView._round_id
             print("round_id:{} dct:{}".format(round_id, dct))
-            session = self.db.Session()
-            golf_round = session.query(Round).filter(Round.round_id == round_id).one()
-            golf_round.addGame(session, name, dct)
-            session.commit()
+            with self.db.unit_of_work() as session:
+                golf_round = get_round(session, round_id)
+                golf_round.addGame(session, name, dct)
             self._update_games()
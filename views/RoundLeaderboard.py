@@ -5,7 +5,7 @@ import ui
 import dialogs
 import datetime
 
-from golf_db.db_sqlalchemy import Round
+from golf_db.db_sqlalchemy import Round, get_round
 from .golf_view import GolfView
 
 
@@ -142,16 +142,12 @@ class RoundLeaderboard(GolfView):
                         self._add_control(lbl)
 
     def activate(self):
-        session = self.db.Session()
-        self.golf_round = (
-            session.query(Round)
-            .filter(Round.round_id == self._mainView._round_id)
-            .one()
-        )
-        self.segGames.segments = [game.game_type for game in self.golf_round.games]
-        self.games = [game.CreateGame() for game in self.golf_round.games]
-        self.segGames.selected_index = 0
-        self.select_game(None)
+        with self.db.unit_of_work() as session:
+            self.golf_round = get_round(session, self._mainView._round_id)
+            self.segGames.segments = [game.game_type for game in self.golf_round.games]
+            self.games = [game.CreateGame() for game in self.golf_round.games]
+            self.segGames.selected_index = 0
+            self.select_game(None)
 
     def select_game(self, sender):
         self.game = self.games[self.segGames.selected_index]
@@ -5,7 +5,8 @@ import ui
 import dialogs
 import datetime
 
-from golf_db.db_sqlalchemy import Round, Score, Game
+from golf_db.db_sqlalchemy import Round, Score, get_round
+from golf_db.db_sqlalchemy import post_scores, set_game_hole_data
 from golf_db.exceptions import GolfGameException
 from golf_view import GolfView
 
@@ -94,24 +95,20 @@ class RoundScores(GolfView):
             self.btnGross[n].hidden = True
             self.btnPutts[n].hidden = True
 
-        session = self.db.Session()
-        self.golf_round = (
-            session.query(Round)
-            .filter(Round.round_id == self._mainView._round_id)
-            .one()
-        )
-        self.players = []
-        for n, result in enumerate(self.golf_round.results):
-            self.lblPlayers[n].hidden = False
-            self.btnGross[n].hidden = False
-            self.btnPutts[n].hidden = False
-            self.lblPlayers[n].text = result.player.getFullName()
-            self.players.append(
-                PlayerForm(result.result_id, self.btnGross[n], self.btnPutts[n])
-            )
+        with self.db.unit_of_work() as session:
+            self.golf_round = get_round(session, self._mainView._round_id)
+            self.players = []
+            for n, result in enumerate(self.golf_round.results):
+                self.lblPlayers[n].hidden = False
+                self.btnGross[n].hidden = False
+                self.btnPutts[n].hidden = False
+                self.lblPlayers[n].text = result.player.getFullName()
+                self.players.append(
+                    PlayerForm(result.result_id, self.btnGross[n], self.btnPutts[n])
+                )
 
-        self._set_hole_number(self._hole_num)
-        self._get(session)
+            self._set_hole_number(self._hole_num)
+            self._get(session)
 
     def _set_hole_number(self, hole_num):
         # print('{} _set_hole_num() hole_num:{}'.format(self.__class__.__name__, hole_num))
@@ -162,11 +159,14 @@ class RoundScores(GolfView):
         # print(all_game_status)
         # self.lblStatus.text = all_game_status
 
-    def _save(self, session=None):
-        """Save the from values to the database."""
+    def _save(self):
+        """Save the from values to the database.
+
+        Another phone may score the same round, each write is retried on a
+        version conflict.
+        """
         print("{} _save() _hole_num:{}".format(self.__class__.__name__, self._hole_num))
-        if not session:
-            session = self.db.Session()
+        rows = []
         for player in self.players:
             try:
                 gross = int(player.btnGross.title)
@@ -174,69 +174,56 @@ class RoundScores(GolfView):
             except Exception as ex:
                 print("_save() error - {}".format(ex))
                 continue
-            score = (
-                session.query(Score)
-                .filter(
-                    Score.result_id == player.result_id, Score.num == self._hole_num
-                )
-                .first()
+            rows.append(
+                {
+                    "result_id": player.result_id,
+                    "num": self._hole_num,
+                    "gross": gross,
+                    "putts": putts,
+                }
             )
-            if score:
-                score.gross = gross
-                score.putts = putts
-            else:
-                score = Score(
-                    result_id=player.result_id,
-                    gross=gross,
-                    putts=putts,
-                    num=self._hole_num,
-                )
-                session.add(score)
-        session.commit()
-        # now validate scores
-        lst_game_more_info_needed = []
-        golf_round = (
-            session.query(Round)
-            .filter(Round.round_id == self._mainView._round_id)
-            .one()
-        )
-        for game in golf_round.games:
-            try:
-                game.CreateGame()
-            except GolfGameException as ex:
-                print(
-                    "{} Game - {} - {}".format(
-                        ex.dct["game"].short_description,
-                        ex.dct["msg"],
-                        ",".join([pl.nick_name for pl in ex.dct["players"]]),
-                    )
+
+        def update(session):
+            # now validate scores and refresh game results
+            return post_scores(
+                session,
+                self._mainView._round_id,
+                lambda golf_round: golf_round.upsertScores(session, rows),
+            )
+
+        lst_game_more_info_needed = self.db.retry_unit_of_work(update)
+        for ex in lst_game_more_info_needed:
+            print(
+                "{} Game - {} - {}".format(
+                    ex.dct["game"].short_description,
+                    ex.dct["msg"],
+                    ",".join([pl.nick_name for pl in ex.dct["players"]]),
                 )
-                lst_game_more_info_needed.append(ex)
+            )
 
         if lst_game_more_info_needed:
             for ex in lst_game_more_info_needed:
                 player_nick_names = [pl.nick_name for pl in ex.dct["players"]]
                 name = dialogs.list_dialog(ex.dct["msg"], player_nick_names)
                 if name:
-                    game = (
-                        session.query(Game)
-                        .filter(Game.game_id == ex.dct["game"].game.game_id)
-                        .one()
+                    game_id = ex.dct["game"].game.game_id
+                    self.db.retry_unit_of_work(
+                        lambda session: set_game_hole_data(
+                            session, game_id, ex.dct["hole_num"], {ex.dct["key"]: name}
+                        )
                     )
-                    game.add_hole_dict_data(ex.dct["hole_num"], {ex.dct["key"]: name})
-            session.commit()
 
     def next_hole(self, sender):
-        session = self.db.Session()
-        self._save(session)
-        self._set_hole_number(self._hole_num + 1)
-        self._get(session)
+        self._save()
+        with self.db.unit_of_work() as session:
+            self._set_hole_number(self._hole_num + 1)
+            self._get(session)
 
     def prev_hole(self, sender):
-        session = self.db.Session()
-        self._save(session)
-        self._set_hole_number(self._hole_num - 1)
-        self._get(session)
+        self._save()
+        with self.db.unit_of_work() as session:
+            self._set_hole_number(self._hole_num - 1)
+            self._get(session)
 
     def set_gross(self, sender):
         par_3_scores = [